@@ -0,0 +1,50 @@
+import argparse
+import logging
+import os
+import sys
+from config import Config
+from core.utils.logger import AppLogger
+
+def parse_args():
+    settings = Config.BATCH_SETTINGS
+    parser = argparse.ArgumentParser(description="Пакетный анализ видеозаписей на соблюдение СИЗ")
+    parser.add_argument('source', help="Видеофайл или папка с видео")
+    parser.add_argument('--model', required=True, help="Имя модели из data/models")
+    parser.add_argument('--output', default='data/reports', help="Папка для отчетов и размеченного видео")
+    parser.add_argument('--format', dest='report_format', choices=['csv', 'json', 'parquet'],
+                        default=settings['report_format'], help="Формат отчета")
+    parser.add_argument('--workers', type=int, default=settings['workers'], help="Число процессов")
+    parser.add_argument('--chunk-seconds', type=float, default=settings['chunk_seconds'],
+                        help="Длина фрагмента на процесс, сек")
+    parser.add_argument('--no-video', action='store_true', help="Не сохранять видео с разметкой")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    logger = AppLogger.get_logger()
+    logger.addHandler(logging.StreamHandler(sys.stdout))
+
+    # Добавление корневой директории в PYTHONPATH (нужно и процессам пула)
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.append(root_dir)
+
+    from core.processing.batch_analyzer import BatchAnalyzer
+
+    try:
+        analyzer = BatchAnalyzer(args.model, args.output, settings={
+            'workers': args.workers,
+            'chunk_seconds': args.chunk_seconds,
+            'report_format': args.report_format,
+            'annotate': not args.no_video
+        })
+        reports = analyzer.run(args.source)
+    except Exception as e:
+        logger.error(f"Ошибка пакетного анализа: {str(e)}", exc_info=True)
+        sys.exit(1)
+
+    for name, outputs in reports.items():
+        logger.info(f"{name}: " + ", ".join(f"{kind} → {path}" for kind, path in outputs.items()))
+    sys.exit(0 if reports and not any('error' in outputs for outputs in reports.values()) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+import cv2
+import numpy as np
+from core.utils.logger import AppLogger
+from core.utils.perf_stats import LatencyStats, ResourceSampler
+from core.detection.detection_frame import DetectionFrame
+
+DEFAULT_CLASSES = ['glove', 'helmet', 'pants', 'vest']
+
+
+# Ключевые точки COCO в долях рамки человека (x, y)
+_SKELETON_TEMPLATE = np.array([
+    (0.50, 0.08), (0.45, 0.06), (0.55, 0.06), (0.40, 0.08), (0.60, 0.08),   # нос, глаза, уши
+    (0.30, 0.22), (0.70, 0.22), (0.22, 0.40), (0.78, 0.40), (0.18, 0.55),   # плечи, локти, запястье
+    (0.82, 0.55), (0.38, 0.55), (0.62, 0.55), (0.38, 0.75), (0.62, 0.75),   # запястье, бедра, колени
+    (0.38, 0.95), (0.62, 0.95)                                              # лодыжки
+], dtype=np.float32)
+
+
+def synthetic_scene(width, height, people, class_names, seed=0):
+    """Кадр-шум и DetectionFrame: позы people человек в сетке и боксы СИЗ на них (воспроизводимо по seed)"""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+    cols = max(1, int(np.ceil(np.sqrt(people))))
+    rows = max(1, int(np.ceil(people / cols)))
+    cell_w, cell_h = width / cols, height / rows
+
+    keypoints, boxes, cls_ids = [], [], []
+    for i in range(people):
+        x0, y0 = (i % cols) * cell_w, (i // cols) * cell_h
+        pw, ph = cell_w * 0.6, cell_h * 0.9
+        px, py = x0 + cell_w * 0.2, y0 + cell_h * 0.05
+        kpts = _SKELETON_TEMPLATE * (pw, ph) + (px, py)
+        keypoints.append(kpts)
+
+        for cls_id, name in enumerate(class_names):
+            if 'helmet' in name:
+                boxes.append((px + pw * 0.35, py, px + pw * 0.65, py + ph * 0.1))
+            elif 'vest' in name:
+                boxes.append((px + pw * 0.25, py + ph * 0.2, px + pw * 0.75, py + ph * 0.55))
+            elif 'pants' in name:
+                boxes.append((px + pw * 0.3, py + ph * 0.55, px + pw * 0.7, py + ph))
+            elif 'glove' in name:
+                boxes.append((px + pw * 0.1, py + ph * 0.5, px + pw * 0.26, py + ph * 0.6))
+            else:
+                continue
+            cls_ids.append(cls_id)
+
+    detections = DetectionFrame(
+        np.array(boxes, dtype=np.float32).reshape(-1, 4),
+        rng.uniform(0.5, 1.0, len(cls_ids)).astype(np.float32),
+        np.array(cls_ids, dtype=np.int32),
+        np.array(keypoints, dtype=np.float32).reshape(people, 17, 2),
+        frame.shape
+    )
+    return frame, detections
+
+
+def load_clip_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+class PipelineBenchmark:
+    """Замер этапов конвейера: YOLODetector, PoseDetector, SIZDetector.check_items,
+    DetectionDrawer и convert_to_qimage"""
+
+    def __init__(self, model_name=None, iterations=100, warmup=10):
+        self.logger = AppLogger.get_logger()
+        self.iterations = iterations
+        self.warmup = warmup
+        self.model_name = model_name
+        self.resources = ResourceSampler()
+
+        from core.detection.yolo_detector import YOLODetector
+        from core.detection.pose_detection import PoseDetector
+        from core.detection.siz_detection import SIZDetector
+        from core.processing.frame_processor import FrameProcessor
+
+        self.yolo = YOLODetector()
+        self.pose = PoseDetector()
+        self.siz = SIZDetector()
+        self.frame_processor = FrameProcessor()
+        self.frame_processor.set_detectors(self.yolo, self.pose, self.siz)
+        self.drawer = self.frame_processor.drawer
+        self.class_names = DEFAULT_CLASSES
+
+        if model_name:
+            from core.models.model_registry import ModelRegistry
+            model_info = ModelRegistry.instance().get_model_info(model_name)
+            if model_info is None or not self.yolo.load_model(model_name, model_info):
+                raise ValueError(f"Модель {model_name} не загружена")
+            self.class_names = list(self.yolo.class_names[model_name])
+
+        try:
+            import PyQt6.QtGui  # noqa: F401
+            self.has_qt = True
+        except ImportError:
+            self.has_qt = False
+
+    def _measure(self, func, frames):
+        """Прогон func по кадрам по кругу: warmup без учета, затем iterations замеров"""
+        stats = LatencyStats()
+        for i in range(self.warmup):
+            func(frames[i % len(frames)])
+        self.resources.reset()
+        for i in range(self.iterations):
+            frame = frames[i % len(frames)]
+            start = time.perf_counter()
+            func(frame)
+            stats.add(time.perf_counter() - start)
+        return dict(stats.summary(), **self.resources.sample())
+
+    def run_case(self, case_name, frames, detections=None):
+        """Все доступные этапы для одного набора кадров"""
+        results = {}
+        shape = frames[0].shape
+
+        boxes = None
+        if self.model_name:
+            results['yolo'] = self._measure(lambda f: self.yolo.detect(f, self.model_name, plot=False), frames)
+            if detections is None:
+                _, boxes = self.yolo.detect(frames[0], self.model_name, plot=False)
+
+        results['pose'] = self._measure(self.pose.detect, frames)
+        if detections is None:
+            pose_results = self.pose.detect(frames[0])
+            results['detection_frame'] = self._measure(
+                lambda f: DetectionFrame.from_results(boxes, pose_results, shape), frames)
+            detections = DetectionFrame.from_results(boxes, pose_results, shape)
+
+        if len(detections) > 0:
+            # Сопоставление с людьми кэшируется в DetectionFrame — каждый замер на свежей копии
+            results['siz_check_items'] = self._measure(
+                lambda f: self.siz.check_items(DetectionFrame(detections.xyxy, detections.conf, detections.cls,
+                                                              detections.keypoints, shape),
+                                               shape, self.class_names), frames)
+            statuses, people_count, detected_siz = self.siz.check_items(detections, shape, self.class_names)
+            required_siz = {name: people_count for name in self.class_names}
+            missing_areas = self.siz.get_missing_siz_areas(
+                detections, shape, detected_siz, required_siz, self.class_names)
+            results['drawer'] = self._measure(
+                lambda f: self.drawer.draw_detections(f.copy(), detections, statuses, self.model_name,
+                                                      missing_areas), frames)
+
+        if self.has_qt:
+            results['convert_to_qimage'] = self._measure(self.frame_processor.convert_to_qimage, frames)
+
+        self.logger.info(f"Бенчмарк {case_name}: " + ", ".join(
+            f"{stage} p50={r.get('p50_ms')} мс" for stage, r in results.items()))
+        return {'case': case_name, 'shape': list(shape), 'stages': results}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк этапов конвейера детекции СИЗ")
+    parser.add_argument('--model', default=None, help="Модель из data/models (без нее этап YOLO пропускается)")
+    parser.add_argument('--clip', action='append', default=[], help="Видеозапись для замеров (можно несколько)")
+    parser.add_argument('--resolutions', default='640x480,1280x720,1920x1080')
+    parser.add_argument('--people', default='1,4,8', help="Число людей в синтетических кадрах")
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--output', default=None, help="Путь к JSON (по умолчанию data/benchmarks/<время>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logger = AppLogger.get_logger()
+
+    # Добавление корневой директории в PYTHONPATH
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.append(root_dir)
+
+    bench = PipelineBenchmark(args.model, args.iterations, args.warmup)
+    cases = []
+
+    for width, height in (map(int, r.split('x')) for r in args.resolutions.split(',')):
+        for people in (int(p) for p in args.people.split(',')):
+            frame, detections = synthetic_scene(width, height, people, bench.class_names)
+            cases.append(bench.run_case(f"synthetic_{width}x{height}_p{people}", [frame], detections))
+
+    for clip in args.clip:
+        frames = load_clip_frames(clip, args.iterations)
+        if not frames:
+            logger.error(f"Не удалось прочитать кадры из {clip}")
+            continue
+        cases.append(bench.run_case(f"clip_{os.path.basename(clip)}", frames))
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'opencv': cv2.__version__,
+        'model': args.model,
+        'iterations': args.iterations,
+        'warmup': args.warmup,
+        'cases': cases
+    }
+
+    output = args.output or os.path.join('data', 'benchmarks', f"{datetime.now():%Y-%m-%d_%H-%M-%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(output)
+
+if __name__ == "__main__":
+    main()
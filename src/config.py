@@ -20,30 +20,174 @@ class Config:
     DB_NAME = "ppe.db"
     
     CAMERA_INDEX = 0
+    # USB-камеры на Linux (V4L2, MJPEG)
+    CAMERA_SETTINGS = {
+        'target_size': 640,        # Размер входа модели: выбирается наименьшее разрешение не меньше него
+        'resolutions': [(640, 480), (800, 600), (1280, 720), (1920, 1080), (2560, 1440), (3840, 2160)],
+        'fps': 30,
+        'decode_in_thread': True,  # Получать сжатый MJPEG и декодировать через imdecode в потоке захвата
+        'reduced_decode': True,    # Декодировать JPEG в 1/2 или 1/4 масштаба, если кадр заметно больше нужного
+        'threaded': True,          # Отдельный поток захвата с буфером в один кадр
+        'read_timeout': 2.0,       # Ожидание кадра в read(), сек
+        'max_failures': 50         # Подряд неудачных чтений до остановки потока захвата
+    }
     RTSP_SETTINGS = {
         'timeout': 5000,
         'buffer_size': 1,
         'reconnect_delay': 3,
         'max_fps': 30
     }
+    # Воспроизведение видеофайлов (опережающее декодирование)
+    PLAYBACK_SETTINGS = {
+        'queue_size': 8,           # Кадров, декодированных наперед
+        'late_frames': 1.0,        # Опоздание (в кадрах), после которого кадр пропускается через grab()
+        'max_skip': 30,            # Подряд пропущенных кадров, после которых кадр все равно декодируется
+        'poll_interval': 0.01,     # Опрос очереди, когда кадр еще не готов, сек
+        'seek_step': 5.0,          # Шаг перемотки стрелками, сек
+        'speeds': [0.25, 0.5, 1.0, 1.5, 2.0, 4.0]
+    }
+
+    # Повторы кадров живых источников (камера, RTSP) и зависание камеры
+    FREEZE_SETTINGS = {
+        'enabled': True,
+        'thumb_size': (32, 32),      # Миниатюра для отпечатка кадра (ширина, высота)
+        'near_threshold': 3,         # Наибольшая разница ячеек миниатюры (0..255), при которой кадр — почти повтор
+        'max_reuse_seconds': 1.0,    # Почти совпадающий кадр — повтор не дольше N сек (и не дольше шага stride)
+        'freeze_seconds': 30.0       # Побитовые повторы дольше N сек — событие «камера зависла»
+    }
+
+    # Журнал нарушений СИЗ (таблица violations в ppe.db)
+    VIOLATION_SETTINGS = {
+        'batch_size': 200,       # Максимум строк в одной транзакции executemany
+        'flush_interval': 1.0,   # Период сброса очереди в БД, сек
+        'episode_gap': 3.0,      # Через сколько секунд без наблюдений эпизод закрывается
+        'match_distance': 1.0    # Допустимое смещение области (в размерах области) для того же человека
+    }
+
+    # Реестр моделей в MODELS_DIR
+    MODEL_REGISTRY_SETTINGS = {
+        'recheck_interval': 2.0,  # Не чаще раза в N секунд проверять mtime папок без наблюдателя
+        'poll_interval': 5.0,     # Период опроса, если пакет watchdog не установлен
+        'hash_chunk_size': 1 << 20
+    }
+
+    # Кэш загруженных YOLO-моделей и прогрев при активации
+    MODEL_CACHE_SETTINGS = {
+        'memory_budget_mb': 1024,  # Суммарный объем весов в кэше; старые модели выгружаются (LRU)
+        'warmup': True,            # Прогон пустого кадра сразу после загрузки
+        'warmup_imgsz': 640,       # Размер входа модели для прогрева
+        'warmup_runs': 2
+    }
+
+    # Режим сервиса без GUI (src/headless.py)
+    HEADLESS_SETTINGS = {
+        'max_fps': 10,            # Ограничение частоты анализа на поток
+        'reconnect_delay': 3,     # Пауза перед переподключением к потерянному источнику, сек
+        'join_timeout': 5,        # Ожидание завершения потоков при остановке, сек
+        # Режим processes: процесс на камеру, кадры через shared_memory
+        'mode': 'threads',        # threads | processes
+        'start_method': 'spawn',  # Способ запуска процессов камер (multiprocessing): spawn | fork
+        'share_models': True,     # При fork модели загружаются один раз в родителе и наследуются процессами
+        'memory_report_interval': 300.0,  # Отчет о памяти процессов камер в журнал, сек (0 — выключен)
+        'ring_slots': 4,          # Слотов кадров в кольце на камеру
+        'max_frame_width': 1920,  # Размер слота; кадры крупнее уменьшаются перед передачей
+        'max_frame_height': 1080,
+        'results_queue_size': 256,
+        'worker_metrics_interval': 2.0,  # Как часто процесс камеры отправляет сводку замеров, сек
+        'restart_delay': 1.0,     # Пауза перед перезапуском упавшего процесса, удваивается подряд
+        'max_restart_delay': 60.0,
+        'restart_reset_after': 60.0  # Процесс, проработавший дольше, перезапускается без паузы
+    }
+
+    # Замеры этапов конвейера (оверлей, строка состояния, экспорт в headless)
+    METRICS_SETTINGS = {
+        'window': 300,            # Размер скользящего окна замеров на этап
+        'status_interval': 1.0,   # Период обновления статистики в строке состояния, сек
+        'export_interval': 10.0,  # Период выгрузки метрик в headless-режиме, сек
+        'export_path': 'data/metrics/headless.json'
+    }
+
+    # Экспорт метрик в формате Prometheus
+    PROMETHEUS_SETTINGS = {
+        'host': '127.0.0.1',
+        'port': None,              # Порт для /metrics; None — HTTP-эндпоинт выключен
+        'textfile_path': None,     # Файл для textfile-коллектора node_exporter; None — выключено
+        'textfile_interval': 15.0  # Период перезаписи файла, сек
+    }
+
+    # Трассировка этапов в формате Chrome Trace Event
+    TRACE_SETTINGS = {
+        'max_events': 200000,      # Ограничение буфера событий (старые вытесняются)
+        'output_dir': 'data/traces',
+        'signal': 'SIGUSR2'        # Сигнал переключения трассировки (POSIX)
+    }
+
+    # Запись видеофрагментов нарушений из кольцевого буфера
+    CLIP_SETTINGS = {
+        'enabled': True,
+        'pre_seconds': 5.0,        # Сколько секунд до начала эпизода попадает в клип
+        'post_seconds': 5.0,       # Сколько секунд после
+        'memory_budget_mb': 64,    # Бюджет кольцевого буфера JPEG на поток
+        'jpeg_quality': 80,
+        'max_width': 1280,         # Кадры шире уменьшаются перед сжатием
+        'queue_size': 32,          # Очередь кадров к фоновому потоку; при переполнении кадр пропускается
+        'max_clip_seconds': 60.0,  # Предел длины клипа: при продолжающихся нарушениях пишется следующий
+        'max_clip_mb': 64,         # Предел объема JPEG-кадров одного клипа в памяти
+        'output_dir': 'data/clips',
+        'fourcc': 'mp4v',
+        'main_stream': True,       # Писать основной поток камеры (record_source) после начала эпизода
+        'main_open_timeout': 10.0  # Запас времени на подключение к основному потоку, сек
+    }
+
+    # Галерея снимков нарушений (контентная адресация + миниатюры)
+    SNAPSHOT_SETTINGS = {
+        'enabled': True,
+        'interval': 2.0,          # Не чаще одного снимка эпизода за N секунд
+        'format': 'jpg',          # jpg | webp
+        'quality': 85,
+        'thumb_width': 240,
+        'hash_threshold': 6,      # Макс. расстояние Хэмминга dHash, при котором снимок считается дубликатом
+        'dedup_window': 60.0,     # Сравнение и со снимками той же камеры и типа нарушения за N секунд
+        'dedup_iou': 0.3,         # ...если это тот же трек или области пересекаются не меньше чем на IoU
+        'queue_size': 8,          # При переполнении очереди снимок пропускается
+        'output_dir': 'data/snapshots'
+    }
+
+    # Каскад: люди по модели поз, затем СИЗ на вырезках людей из кадра полного разрешения
+    CASCADE_SETTINGS = {
+        'enabled': False,      # Для камер без явной настройки в профиле
+        'crop_size': 320,      # Размер входа модели СИЗ для вырезки
+        'padding': 0.15,       # Отступ вокруг рамки человека в долях ее размера
+        'min_crop': 64,        # Минимальная сторона вырезки, пикс
+        'batch_size': 16,      # Вырезок за один вызов модели
+        'max_people': 32,      # Больше людей — анализируются самые крупные
+        'nms_iou': 0.5         # Подавление дублей на пересечении вырезок соседних людей
+    }
+
+    # Кэш результатов анализа видеофайлов (повторный просмотр без инференса)
+    DETECTION_CACHE_SETTINGS = {
+        'enabled': True,
+        'output_dir': 'data/detection_cache',
+        'hash_chunk_size': 1 << 20,  # Размер фрагментов файла для отпечатка содержимого
+        'max_gap_seconds': 0.5,      # Результат ближайшего предыдущего кадра действует не дольше N секунд
+        'max_size_mb': 1024          # При превышении удаляются давно обновлявшиеся записи
+    }
+
+    # Пакетный анализ записей (src/batch_analysis.py)
+    BATCH_SETTINGS = {
+        'workers': None,          # Число процессов; None — по числу ядер
+        'chunk_seconds': 60,      # Длина фрагмента видео на один процесс
+        'report_format': 'csv',   # csv | json | parquet
+        'annotate': True,         # Сохранять видео с разметкой
+        'fourcc': 'mp4v'
+    }
 
     @staticmethod
     def get_available_models():
-        """Возвращает доступные модели, создает папку если ее нет"""
-        models = {}
-        
-        # Создаем папку если ее нет
-        os.makedirs(Config.MODELS_DIR, exist_ok=True)
-        
-        for model_dir in os.listdir(Config.MODELS_DIR):
-            model_path = os.path.join(Config.MODELS_DIR, model_dir)
-            if os.path.isdir(model_path):
-                pt_files = [f for f in os.listdir(model_path) if f.endswith('.pt')]
-                yaml_files = [f for f in os.listdir(model_path) if f.endswith('.yaml')]
-                
-                if pt_files and yaml_files:
-                    models[model_dir] = {
-                        'pt_file': os.path.join(model_path, pt_files[0]),
-                        'yaml_file': os.path.join(model_path, yaml_files[0])
-                    }
-        return models
\ No newline at end of file
+        """Возвращает доступные модели, создает папку если ее нет.
+
+        Результат кэшируется реестром моделей и пересканируется только
+        при изменении mtime папок с моделями.
+        """
+        from core.models.model_registry import ModelRegistry
+        return ModelRegistry.instance().get_available_models()
\ No newline at end of file
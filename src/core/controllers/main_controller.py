@@ -1,6 +1,5 @@
 from PyQt6.QtCore import QObject, pyqtSlot, QSettings, pyqtSignal, Qt
 
-from core.processing.input_handler import InputHandler
 from .theme_manager import ThemeManager
 from ..models.model_manager import ModelManager
 from ..models.rtsp_manager import RtspManager
@@ -14,6 +13,14 @@ from .ui_state_manager import UIStateManager
 from ...ui.builders.ui_builder import UIBuilder
 from rtsp.rtsp_manager import RtspManagerDialog  # Добавленный импорт
 from rtsp.rtsp_storage import RtspStorage  # Добавленный импорт
+from core.storage.violation_store import ViolationStore
+from core.storage.clip_recorder import ClipRecorder
+from core.storage.snapshot_store import SnapshotStore
+from core.storage.detection_cache import DetectionCache
+from core.utils.metrics_registry import MetricsRegistry
+from core.utils.tracer import TRACER
+from PyQt6.QtGui import QKeySequence, QShortcut
+from config import Config
 import os
 
 class MainController(QObject):
@@ -30,8 +37,6 @@ class MainController(QObject):
         self.ui.ui_builder = UIBuilder(self.ui)
         self.ui.ui_builder.build_ui()
 
-        self.input_handler = InputHandler()
-
         if not hasattr(self.ui, 'control_panel'):
             from ui.components.control_panel import ControlPanel
             self.ui.control_panel = ControlPanel(self.ui)
@@ -61,12 +66,12 @@ class MainController(QObject):
         self.rtsp_manager.load_rtsp_list()
         self.theme_manager.load_theme_settings()
         self.ui.destroyed.connect(self.cleanup)
-        self.rtsp_manager.load_rtsp_list()
 
     def _init_components(self):
         self.yolo_detector = YOLODetector()
         self.model_handler = ModelHandler()
         self.model_handler.set_yolo_detector(self.yolo_detector)
+        self.model_handler.registry.start_watching()
         
         self.detection_controller = DetectionController()
         self.detection_controller.setup_detectors()
@@ -79,6 +84,19 @@ class MainController(QObject):
             self.detection_controller.siz
         )
 
+        self.violation_store = ViolationStore()
+        self.video_processor.set_violation_store(self.violation_store)
+        if Config.CLIP_SETTINGS['enabled']:
+            self.clip_recorder = ClipRecorder()
+            self.video_processor.set_clip_recorder(self.clip_recorder)
+        if Config.SNAPSHOT_SETTINGS['enabled']:
+            self.snapshot_store = SnapshotStore()
+            self.video_processor.set_snapshot_store(self.snapshot_store)
+        if Config.DETECTION_CACHE_SETTINGS['enabled']:
+            self.video_processor.set_detection_cache(DetectionCache())
+
+        MetricsRegistry.instance().start_exporters(Config.PROMETHEUS_SETTINGS)
+
     def _setup_connections(self):
         # Подключение сигналов UI через control_panel
         self.ui.control_panel.start_btn.clicked.connect(
@@ -99,6 +117,14 @@ class MainController(QObject):
         self.ui.ui_builder.control_panel.landmarks_check.stateChanged.connect(
             lambda state: self.video_processor.toggle_landmarks(state == Qt.CheckState.Checked.value)
         )
+        self.ui.control_panel.overlay_check.stateChanged.connect(
+            lambda state: self.video_processor.toggle_overlay(state == Qt.CheckState.Checked.value)
+        )
+        self.video_processor.stats_updated.connect(self.ui.status_bar.set_stats)
+        self.video_processor.processing_stopped.connect(lambda: self.ui.status_bar.set_stats(""))
+        self.trace_shortcut = QShortcut(QKeySequence("Ctrl+Shift+T"), self.ui)
+        self.trace_shortcut.activated.connect(self._toggle_tracing)
+        self._setup_playback_shortcuts()
         self.ui.model_panel.activate_model_btn.clicked.connect(
             self.model_manager.activate_model
         )
@@ -119,6 +145,7 @@ class MainController(QObject):
         self.video_processor.update_frame.connect(self.ui.ui_builder.video_display.update_frame)
         self.video_processor.siz_status_changed.connect(self.processing_manager.update_siz_status)
         self.video_processor.input_error.connect(self.processing_manager.on_input_error)
+        self.video_processor.source_health.connect(lambda message: self.ui.status_bar.show_message(message, 10000))
         
         self.model_handler.model_loaded.connect(self.model_manager.on_model_loaded)
         self.model_handler.model_loading.connect(self.model_manager.on_model_loading)
@@ -169,13 +196,56 @@ class MainController(QObject):
         self.ui.control_panel.start_btn.setEnabled(False)
         self.ui.status_bar.show_message("Выбрана новая модель - требуется активация", 2000)
 
+    def _toggle_tracing(self):
+        """Ctrl+Shift+T: включение/выключение трассировки этапов"""
+        path = TRACER.toggle()
+        if TRACER.enabled:
+            self.ui.status_bar.show_message("Трассировка включена (Ctrl+Shift+T — сохранить)", 3000)
+        elif path:
+            self.ui.status_bar.show_message(f"Трассировка сохранена: {path}", 5000)
+
+    def _setup_playback_shortcuts(self):
+        """Управление воспроизведением видеофайла: пауза, перемотка, скорость"""
+        step = Config.PLAYBACK_SETTINGS['seek_step']
+        actions = {
+            "Ctrl+Space": self._toggle_playback_pause,
+            "Ctrl+Left": lambda: self.video_processor.seek_playback(-step, relative=True),
+            "Ctrl+Right": lambda: self.video_processor.seek_playback(step, relative=True),
+            "Ctrl+[": lambda: self._step_playback_speed(-1),
+            "Ctrl+]": lambda: self._step_playback_speed(1),
+        }
+        self.playback_shortcuts = []
+        for keys, action in actions.items():
+            shortcut = QShortcut(QKeySequence(keys), self.ui)
+            shortcut.activated.connect(action)
+            self.playback_shortcuts.append(shortcut)
+
+    def _toggle_playback_pause(self):
+        if self.video_processor.playback is None:
+            return
+        paused = self.video_processor.pause_playback()
+        self.ui.status_bar.show_message("Пауза (Ctrl+Space — продолжить)" if paused else "Воспроизведение", 2000)
+
+    def _step_playback_speed(self, step):
+        speed = self.video_processor.step_playback_speed(step)
+        if speed is not None:
+            self.ui.status_bar.show_message(f"Скорость воспроизведения: {speed:g}x", 2000)
+
     def cleanup(self):
         """Освобождение ресурсов при закрытии"""
         try:
             if hasattr(self, 'video_processor'):
                 self.video_processor.cleanup()
-            if hasattr(self, 'input_handler') and self.input_handler.cap:
-                self.input_handler.release()
+            if hasattr(self, 'violation_store'):
+                self.violation_store.close()
+            if hasattr(self, 'clip_recorder'):
+                self.clip_recorder.close()
+            if hasattr(self, 'snapshot_store'):
+                self.snapshot_store.close()
+            if hasattr(self, 'model_handler'):
+                self.model_handler.registry.stop_watching()
+            MetricsRegistry.instance().stop()
+            TRACER.stop()
             self.logger.info("Приложение завершает работу, ресурсы освобождены")
         except Exception as e:
             self.logger.error(f"Ошибка при очистке ресурсов: {str(e)}")
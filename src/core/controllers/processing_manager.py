@@ -70,17 +70,36 @@ class ProcessingManager(QObject):
                     )
                     return
             
-            # Инициализация источника
-            success, error_msg = self.main.input_handler.setup_source(source, source_type)
+            # Имя источника для журнала нарушений
+            if source_type == 2:
+                camera_name = self.main.ui.control_panel.rtsp_combo.currentText()
+            elif source_type == 1:
+                camera_name = os.path.basename(source)
+            else:
+                camera_name = f"camera:{source}"
+            self.main.video_processor.set_camera_name(camera_name)
+            self.main.video_processor.set_profile(rtsp_data.get('profile') if source_type == 2 else None)
+            if source_type == 2:
+                self.main.video_processor.set_record_url(rtsp_data.get('record_url'))
+
+            # Инициализация источника: открывается один раз обработчиком видео (V4L2-устройство
+            # нельзя захватить двумя потоками, а RTSP-проверка удваивала бы подключение)
+            success, error_msg = self.main.video_processor.set_video_source(source, source_type)
             if not success:
                 self._show_error_message("Ошибка источника", error_msg)
                 return
 
             # Запуск обработки
-            if self.main.video_processor.set_video_source(source, source_type):
-                self.main.processing_active = True
-                self.set_processing_state(True)
-                self.main.video_processor.start_processing()
+            self.main.processing_active = True
+            self.set_processing_state(True)
+            self.main.video_processor.start_processing()
+            capture_format = self.main.video_processor.input_handler.capture_format
+            if capture_format:
+                self.main.ui.status_bar.show_message(
+                    f"Обработка запущена: {capture_format['fourcc']} {capture_format['width']}x"
+                    f"{capture_format['height']} @ {capture_format['fps']} FPS, "
+                    f"декодирование {capture_format['decode']}", 5000)
+            else:
                 self.main.ui.status_bar.show_message("Обработка запущена", 3000)
 
         except Exception as e:
@@ -114,10 +133,6 @@ class ProcessingManager(QObject):
         self.main.ui.control_panel.start_btn.style().polish(self.main.ui.control_panel.start_btn)
         self.main.ui.control_panel.start_btn.update()
         
-        # Освобождаем ресурсы
-        if hasattr(self.main, 'input_handler') and self.main.input_handler.cap:
-            self.main.input_handler.release()
-        
         status_message = f"Обработка остановлена | Модель: {self.main.model_manager.current_model}"
         self.main.ui.status_bar.show_message(status_message)
 
@@ -255,7 +270,8 @@ class ProcessingManager(QObject):
             
             base_msg = f"Модель: {self.main.model_handler.current_model()} | " if self.main.model_handler.current_model() else ""
             self.main.ui.show_message(base_msg + message)
-            self.current_siz_status = all(statuses) if isinstance(statuses, list) else False
+            self.current_siz_status = (all(s for s in statuses if s is not None)
+                                       if isinstance(statuses, list) else False)
             
         except Exception as e:
             self.main.logger.error(f"Status update error: {str(e)}")
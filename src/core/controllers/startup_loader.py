@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+from PyQt6.QtCore import QObject, pyqtSignal
+from core.utils.logger import AppLogger
+
+class StartupLoader(QObject):
+    """Выполняет тяжелые шаги запуска в фоне, после показа главного окна.
+
+    Задачи независимы и запускаются параллельно; о ходе выполнения
+    сообщает сигнал progress, результаты задач приходят в finished.
+    """
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(dict)
+
+    def __init__(self, tasks, timer=None, max_workers=3):
+        super().__init__()
+        self.logger = AppLogger.get_logger()
+        self.tasks = tasks  # [(ключ, описание, функция), ...]
+        self.timer = timer
+        self.max_workers = max_workers
+        self._thread = None
+
+    def start(self):
+        self.progress.emit(0, "Загрузка компонентов...")
+        self._thread = threading.Thread(target=self._run, name="StartupLoader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        results = {}
+        total = len(self.tasks)
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="Startup") as executor:
+            futures = {
+                executor.submit(self._run_task, label, func): (key, label)
+                for key, label, func in self.tasks
+            }
+            for future in as_completed(futures):
+                key, label = futures[future]
+                results[key] = future.result()
+                done += 1
+                self.progress.emit(int(done * 100 / total), label)
+
+        self.finished.emit(results)
+
+    def _run_task(self, label, func):
+        start = time.perf_counter()
+        try:
+            return func()
+        except Exception as e:
+            self.logger.error(f"Ошибка при запуске ({label}): {str(e)}", exc_info=True)
+            return None
+        finally:
+            if self.timer:
+                self.timer.record(label, time.perf_counter() - start)
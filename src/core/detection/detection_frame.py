@@ -0,0 +1,162 @@
+import numpy as np
+
+KEYPOINTS = 17  # Ключевые точки COCO
+MIN_VISIBLE_POINTS = 5  # Меньше видимых точек — человек не сопоставляется с боксами СИЗ
+
+
+def _to_numpy(value, dtype):
+    """Тензор ultralytics/torch или массив -> непрерывный numpy-массив dtype"""
+    if hasattr(value, 'cpu'):
+        value = value.cpu()
+    if hasattr(value, 'numpy'):
+        value = value.numpy()
+    return np.ascontiguousarray(value, dtype=dtype)
+
+
+class DetectionFrame:
+    """Результаты детекторов одного кадра в непрерывных массивах.
+
+    Создается один раз на кадр из Boxes YOLO и Results модели поз: тензоры
+    переносятся на CPU по одному разу на поле, а ссылки на Results (и его
+    orig_img) не удерживаются. Дальше SIZDetector, DetectionDrawer и кэш
+    детекций работают только с массивами:
+
+    xyxy (N, 4) float32, conf (N,) float32, cls (N,) int32 — боксы СИЗ;
+    keypoints (P, 17, 2) float32, visible (P, 17) bool — позы людей
+    (точка видима, если обе координаты больше нуля); рамки людей (P, 4) —
+    от модели поз, а если их нет — по крайним видимым точкам.
+
+    Центры и размеры людей для сопоставления с боксами считаются векторно
+    при первом обращении и переиспользуются всеми проверками кадра.
+
+    Рабочие зоны камеры задают через set_required, какие СИЗ требуются от
+    каждого человека; люди без требований не сопоставляются с боксами и не
+    проверяются. Без зон все люди проверяются по всем типам камеры.
+    """
+    __slots__ = ('xyxy', 'conf', 'cls', 'keypoints', 'visible', 'shape', '_centers', '_sizes', '_persons',
+                 '_required', '_required_types')
+
+    def __init__(self, xyxy=None, conf=None, cls=None, keypoints=None, shape=None, persons=None):
+        self.xyxy = np.empty((0, 4), np.float32) if xyxy is None else xyxy
+        self.conf = np.empty(0, np.float32) if conf is None else conf
+        self.cls = np.empty(0, np.int32) if cls is None else cls
+        self.keypoints = np.empty((0, KEYPOINTS, 2), np.float32) if keypoints is None else keypoints
+        self.visible = (self.keypoints[..., 0] > 0) & (self.keypoints[..., 1] > 0)
+        self.shape = shape
+        self._centers = None
+        self._sizes = None
+        self._persons = persons
+        self._required = None  # (P, T) bool по типам _required_types
+        self._required_types = ()
+
+    @classmethod
+    def from_results(cls, boxes=None, pose_results=None, shape=None):
+        """Из Boxes YOLODetector.detect и Results PoseDetector.detect (любой может быть None)"""
+        keypoints = persons = None
+        if pose_results is not None and getattr(pose_results, 'keypoints', None) is not None:
+            xy = _to_numpy(pose_results.keypoints.xy, np.float32)
+            if xy.size:
+                keypoints = xy.reshape(-1, KEYPOINTS, 2)
+                person_boxes = getattr(pose_results, 'boxes', None)
+                if person_boxes is not None and len(person_boxes.xyxy) == len(keypoints):
+                    persons = _to_numpy(person_boxes.xyxy, np.float32).reshape(-1, 4)
+        detections = cls(keypoints=keypoints, shape=shape, persons=persons)
+        detections.set_boxes(boxes)
+        return detections
+
+    def set_boxes(self, boxes):
+        """Боксы СИЗ из Boxes YOLODetector.detect (None — без боксов)"""
+        if boxes is not None and hasattr(boxes, 'xyxy') and len(boxes.xyxy):
+            self.xyxy = _to_numpy(boxes.xyxy, np.float32).reshape(-1, 4)
+            self.conf = _to_numpy(boxes.conf, np.float32).reshape(-1)
+            self.cls = _to_numpy(boxes.cls, np.int32).reshape(-1)
+
+    @property
+    def people(self):
+        return len(self.keypoints)
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    def _person_stats(self):
+        visible = self.visible
+        counts = visible.sum(axis=1)
+        weights = visible[..., None]
+        self._centers = (self.keypoints * weights).sum(axis=1) / np.maximum(counts, 1)[:, None]
+        # Размер человека — наибольшее расстояние между его видимыми точками
+        diff = self.keypoints[:, :, None, :] - self.keypoints[:, None, :, :]
+        distances = np.sqrt((diff ** 2).sum(axis=-1))
+        distances *= visible[:, :, None] & visible[:, None, :]
+        sizes = distances.max(axis=(1, 2)) if len(distances) else np.empty(0, np.float32)
+        sizes[counts < 2] = 0
+        self._sizes = sizes
+
+    @property
+    def person_centers(self):
+        """(P, 2) центры видимых точек людей"""
+        if self._centers is None:
+            self._person_stats()
+        return self._centers
+
+    @property
+    def person_sizes(self):
+        """(P,) размеры людей по видимым точкам (0, если видно меньше двух)"""
+        if self._sizes is None:
+            self._person_stats()
+        return self._sizes
+
+    @property
+    def person_boxes(self):
+        """(P, 4) рамки людей x1, y1, x2, y2 (нулевые, если у человека нет видимых точек)"""
+        if self._persons is None:
+            visible = self.visible[..., None]
+            points = self.keypoints
+            low = np.where(visible, points, np.inf).min(axis=1)
+            high = np.where(visible, points, -np.inf).max(axis=1)
+            boxes = np.concatenate((low, high), axis=1) if len(points) else np.empty((0, 4), np.float32)
+            boxes[~np.isfinite(boxes)] = 0
+            self._persons = boxes.astype(np.float32)
+        return self._persons
+
+    def set_required(self, required, siz_types):
+        """required (P, len(siz_types)) bool — обязательные СИЗ каждого человека"""
+        self._required = required
+        self._required_types = tuple(siz_types)
+
+    @property
+    def active(self):
+        """(P,) bool — люди, от которых требуется хотя бы один тип СИЗ"""
+        if self._required is None:
+            return np.ones(self.people, bool)
+        return self._required.any(axis=1)
+
+    def people_requiring(self, siz_type):
+        """Индексы людей, для которых обязателен siz_type"""
+        if self._required is None:
+            return np.arange(self.people)
+        if siz_type not in self._required_types:
+            return np.empty(0, np.int64)
+        return np.flatnonzero(self._required[:, self._required_types.index(siz_type)])
+
+    def requires(self, person, siz_type):
+        if self._required is None:
+            return True
+        return siz_type in self._required_types and bool(self._required[person, self._required_types.index(siz_type)])
+
+    def best_person(self, box, active_only=True):
+        """Индекс человека, ближайшего к центру бокса относительно своего размера, или None.
+
+        Люди вне рабочих зон не рассматриваются (active_only=False — рассматриваются все).
+        """
+        if not self.people:
+            return None
+        candidates = self.visible.sum(axis=1) >= MIN_VISIBLE_POINTS
+        if active_only:
+            candidates &= self.active
+        if not candidates.any():
+            return None
+        box_center = np.array(((box[0] + box[2]) / 2, (box[1] + box[3]) / 2), np.float32)
+        distances = np.sqrt(((self.person_centers - box_center) ** 2).sum(axis=1))
+        scores = 1.0 / (1.0 + distances / (self.person_sizes + 1e-6))
+        scores[~candidates] = -1
+        return int(np.argmax(scores))
@@ -0,0 +1,118 @@
+import json
+from config import Config
+from core.detection.work_zones import WorkZones
+
+SIZ_TYPES = ('glasses', 'glove', 'helmet', 'pants', 'vest')
+
+
+class InferenceProfile:
+    """Параметры инференса камеры из таблицы cameras.
+
+    None в любом поле означает значение по умолчанию (ultralytics / SIZDetector).
+    roi — доля кадра (x1, y1, x2, y2) в диапазоне 0..1; siz_params —
+    переопределения порогов SIZDetector вида {"helmet": {"min_coverage": 0.4}};
+    required_siz — обязательные на камере типы СИЗ из SIZ_TYPES (None — все);
+    cascade — искать СИЗ на вырезках людей, а не на всем кадре (None —
+    CASCADE_SETTINGS['enabled']); zones — WorkZones, рабочие зоны камеры
+    (None — СИЗ требуются во всем кадре).
+    """
+    __slots__ = ('imgsz', 'conf', 'stride', 'roi', 'siz_params', 'required_siz', 'cascade', 'zones')
+
+    def __init__(self, imgsz=None, conf=None, stride=None, roi=None, siz_params=None, required_siz=None,
+                 cascade=None, zones=None):
+        self.imgsz = imgsz
+        self.conf = conf
+        self.stride = stride
+        self.roi = roi
+        self.siz_params = siz_params
+        self.required_siz = tuple(required_siz) if required_siz else None
+        self.cascade = cascade
+        self.zones = zones
+
+    @property
+    def siz_types(self):
+        """Проверяемые на камере типы СИЗ"""
+        return self.required_siz or SIZ_TYPES
+
+    @property
+    def use_cascade(self):
+        return Config.CASCADE_SETTINGS['enabled'] if self.cascade is None else self.cascade
+
+    @classmethod
+    def from_row(cls, imgsz, conf, stride, roi, siz_params, required_siz=None, cascade=None, zones=None):
+        """Профиль из колонок БД (roi, siz_params и zones хранятся строками)"""
+        return cls(
+            imgsz=int(imgsz) if imgsz else None,
+            conf=float(conf) if conf else None,
+            stride=int(stride) if stride and int(stride) > 1 else None,
+            roi=cls.parse_roi(roi),
+            siz_params=json.loads(siz_params) if siz_params else None,
+            required_siz=cls.parse_siz_types(required_siz),
+            cascade=bool(cascade) if cascade is not None else None,
+            zones=cls.parse_zones(zones)
+        )
+
+    def to_row(self):
+        return (
+            self.imgsz,
+            self.conf,
+            self.stride,
+            ",".join(f"{v:g}" for v in self.roi) if self.roi else None,
+            json.dumps(self.siz_params, ensure_ascii=False) if self.siz_params else None,
+            ",".join(self.required_siz) if self.required_siz else None,
+            int(self.cascade) if self.cascade is not None else None,
+            self.zones.to_text() if self.zones else None
+        )
+
+    @staticmethod
+    def parse_roi(text):
+        """'x1,y1,x2,y2' в долях кадра -> кортеж или None; ValueError при неверном формате"""
+        if not text or not str(text).strip():
+            return None
+        values = tuple(float(v) for v in str(text).split(','))
+        if len(values) != 4:
+            raise ValueError("ROI задается четырьмя числами: x1,y1,x2,y2")
+        x1, y1, x2, y2 = values
+        if not (0 <= x1 < x2 <= 1 and 0 <= y1 < y2 <= 1):
+            raise ValueError("ROI задается долями кадра: 0 <= x1 < x2 <= 1, 0 <= y1 < y2 <= 1")
+        if values == (0.0, 0.0, 1.0, 1.0):
+            return None
+        return values
+
+    @staticmethod
+    def parse_siz_types(text):
+        """'helmet,vest' -> ('helmet', 'vest') в порядке SIZ_TYPES; все типы или пусто -> None"""
+        if not text:
+            return None
+        names = {name.strip().lower() for name in str(text).split(',') if name.strip()}
+        types = tuple(siz_type for siz_type in SIZ_TYPES if siz_type in names)
+        return types if types and len(types) < len(SIZ_TYPES) else None
+
+    @staticmethod
+    def parse_zones(text):
+        """JSON рабочих зон -> WorkZones или None; ValueError при неверном формате"""
+        return WorkZones.parse(text, SIZ_TYPES)
+
+    def predict_kwargs(self):
+        """Аргументы для вызова модели ultralytics"""
+        kwargs = {}
+        if self.imgsz:
+            kwargs['imgsz'] = self.imgsz
+        if self.conf:
+            kwargs['conf'] = self.conf
+        return kwargs
+
+    def roi_pixels(self, frame_shape):
+        """ROI в пикселях (x1, y1, x2, y2) для кадра или None"""
+        if not self.roi:
+            return None
+        h, w = frame_shape[:2]
+        x1, y1, x2, y2 = self.roi
+        return int(x1 * w), int(y1 * h), int(x2 * w), int(y2 * h)
+
+    def is_default(self):
+        return not any((self.imgsz, self.conf, self.stride, self.roi, self.siz_params, self.required_siz,
+                        self.cascade is not None, self.zones))
+
+
+DEFAULT_PROFILE = InferenceProfile()
@@ -0,0 +1,97 @@
+import numpy as np
+from config import Config
+
+
+def nms(xyxy, conf, cls, iou_threshold):
+    """Индексы оставленных боксов после подавления немаксимумов отдельно по классам"""
+    if not len(xyxy):
+        return np.empty(0, np.int64)
+    # Сдвиг по классу разводит боксы разных классов, и один проход NMS работает по каждому классу
+    offsets = cls.astype(np.float32)[:, None] * (float(xyxy.max()) + 1.0)
+    boxes = xyxy + offsets
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(-conf)
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        x1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-6)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, np.int64)
+
+
+class PersonCascade:
+    """Каскад «люди, затем СИЗ»: модель СИЗ запускается на вырезках людей.
+
+    Рамки людей берутся из результата модели поз (DetectionFrame.person_boxes),
+    расширяются на padding и вырезаются из кадра полного разрешения. Вырезки
+    идут в модель СИЗ пакетами с входом crop_size, поэтому мелкие люди на
+    большом кадре не теряют детали при уменьшении кадра до imgsz, а объем
+    вычислений растет с числом людей, а не с разрешением. Боксы переводятся
+    в координаты кадра; бокс остается, только если его центр внутри рамки
+    своего человека (соседи, попавшие в отступ, анализируются своими
+    вырезками), затем дубли на пересечении вырезок убирает NMS. Люди вне
+    рабочих зон камеры не вырезаются.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = {**Config.CASCADE_SETTINGS, **(settings or {})}
+
+    def regions(self, detections, frame_shape):
+        """(индексы людей, (K, 4) int вырезки x1, y1, x2, y2) в пределах кадра"""
+        h, w = frame_shape[:2]
+        persons = detections.person_boxes
+        sizes = (persons[:, 2] - persons[:, 0]) * (persons[:, 3] - persons[:, 1])
+        indices = np.flatnonzero((sizes > 0) & detections.active)  # Люди вне рабочих зон не вырезаются
+        max_people = self.settings['max_people']
+        if max_people and len(indices) > max_people:
+            indices = indices[np.argsort(-sizes[indices])[:max_people]]
+        boxes = persons[indices]
+
+        padding = self.settings['padding']
+        half = np.maximum(boxes[:, 2:] - boxes[:, :2], 0) * (0.5 + padding)
+        half = np.maximum(half, self.settings['min_crop'] / 2)
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        regions = np.concatenate((centers - half, centers + half), axis=1)
+        regions = np.clip(np.round(regions), 0, (w, h, w, h)).astype(np.int32)
+        return indices, regions
+
+    def detect(self, yolo, frame, model_type, detections, profile=None):
+        """Заполняет боксы СИЗ detections результатами по вырезкам людей; возвращает число вырезок"""
+        indices, regions = self.regions(detections, frame.shape)
+        valid = (regions[:, 2] > regions[:, 0]) & (regions[:, 3] > regions[:, 1])
+        indices, regions = indices[valid], regions[valid]
+        if not len(regions):
+            return 0
+
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regions]
+        results = yolo.detect_batch(crops, model_type, profile, imgsz=self.settings['crop_size'],
+                                    batch_size=self.settings['batch_size'])
+        persons = detections.person_boxes
+        parts = []
+        for person, (x1, y1, _, _), (xyxy, conf, cls) in zip(indices, regions, results):
+            if not len(xyxy):
+                continue
+            xyxy = xyxy + np.array((x1, y1, x1, y1), np.float32)
+            centers = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+            px1, py1, px2, py2 = persons[person]
+            inside = ((centers[:, 0] >= px1) & (centers[:, 0] <= px2)
+                      & (centers[:, 1] >= py1) & (centers[:, 1] <= py2))
+            if inside.any():
+                parts.append((xyxy[inside], conf[inside], cls[inside]))
+
+        if parts:
+            xyxy = np.concatenate([part[0] for part in parts])
+            conf = np.concatenate([part[1] for part in parts])
+            cls = np.concatenate([part[2] for part in parts])
+            keep = nms(xyxy, conf, cls, self.settings['nms_iou'])
+            detections.xyxy = np.ascontiguousarray(xyxy[keep])
+            detections.conf = np.ascontiguousarray(conf[keep])
+            detections.cls = np.ascontiguousarray(cls[keep])
+        return len(regions)
@@ -1,19 +1,34 @@
-from ultralytics import YOLO
-import cv2
+import threading
 from core.utils.logger import AppLogger
 
 class PoseDetector:
+    MODEL_PATH = 'src/core/detection/key_points/yolo11n-pose.pt'
+
     def __init__(self):
         self.logger = AppLogger.get_logger()
-        self.model = YOLO('src/core/detection/key_points/yolo11n-pose.pt')  # Загружаем модель YOLO для поз
-        self.logger.info("Инициализирован YOLOv11 Pose детектор")
+        self.model = None
+        self._load_lock = threading.Lock()
+
+    def is_loaded(self):
+        return self.model is not None
+
+    def load(self):
+        """Загружает модель YOLO для поз (вызывается в фоне при старте или лениво при первой детекции)"""
+        with self._load_lock:
+            if self.model is None:
+                from ultralytics import YOLO
+                self.model = YOLO(self.MODEL_PATH)  # Загружаем модель YOLO для поз
+                self.logger.info("Инициализирован YOLOv11 Pose детектор")
+        return True
 
     def detect(self, image):
         """Обнаружение ключевых точек тела с помощью YOLOv11 Pose."""
         try:
+            if self.model is None:
+                self.load()
             # YOLOv11 возвращает результаты для всех людей в кадре
             results = self.model(image, verbose=False)
             return results[0] if results else None
         except Exception as e:
             self.logger.error(f"Ошибка детекции позы: {str(e)}")
-            return None
\ No newline at end of file
+            return None
@@ -1,10 +1,43 @@
+import copy
+import json
 from core.utils.logger import AppLogger
+from core.utils.metrics_registry import SIZ_CHECKS
+from core.utils.tracer import TRACER
+from core.detection.inference_profile import SIZ_TYPES
 import numpy as np
 
 class SIZDetector:
     def __init__(self):
         self.logger = AppLogger.get_logger()
         self._setup_thresholds()
+        self._base_params = self.params
+        self._params_key = None
+        self._params_cache = {}  # JSON переопределений -> объединенные параметры
+
+    def set_overrides(self, overrides=None):
+        """Применяет пороги из профиля камеры поверх базовых; None — базовые пороги.
+
+        Объединенные параметры кэшируются по содержимому переопределений,
+        поэтому повторный вызов на каждом кадре ничего не пересчитывает.
+        """
+        key = json.dumps(overrides, sort_keys=True) if overrides else None
+        if key == self._params_key:
+            return
+        params = self._params_cache.get(key) if key else self._base_params
+        if params is None:
+            params = copy.deepcopy(self._base_params)
+            for siz_type, values in overrides.items():
+                if siz_type not in params:
+                    self.logger.warning(f"Неизвестный тип СИЗ в профиле камеры: {siz_type}")
+                    continue
+                for name, value in values.items():
+                    if name not in params[siz_type]:
+                        self.logger.warning(f"Неизвестный параметр {siz_type}.{name} в профиле камеры")
+                        continue
+                    params[siz_type][name] = tuple(value) if isinstance(value, list) else value
+            self._params_cache[key] = params
+        self.params = params
+        self._params_key = key
         
     def _setup_thresholds(self):
         """Обновленные параметры для проверок с учетом точных соотношений"""
@@ -39,66 +72,79 @@ class SIZDetector:
             }
         }
 
-    def check_items(self, boxes, pose_results, frame_shape, class_names):
+    def check_items(self, detections, frame_shape, class_names, siz_types=SIZ_TYPES):
+        """detections — DetectionFrame кадра; siz_types — обязательные на камере типы СИЗ.
+
+        Статус бокса None — бокс не проверялся и не рисуется: класс не обязателен
+        на камере, бокс принадлежит человеку вне рабочих зон или его тип не
+        обязателен в зоне этого человека."""
         self.logger.debug(f"Checking items with class_names: {class_names}")
         try:
-            if boxes is None or len(boxes.xyxy) == 0:
+            if detections is None or len(detections) == 0:
                 self.logger.debug("No boxes detected")
                 return [], 0, {}
 
             # Подсчет людей в кадре
-            people_count = 0
-            if pose_results and hasattr(pose_results, 'keypoints'):
-                people_count = len(pose_results.keypoints.xy)
+            people_count = detections.people
 
             statuses = []
             required_siz = {}  # Словарь для отслеживания необходимых СИЗ
             detected_siz = {}  # Словарь для отслеживания обнаруженных СИЗ
-
-            boxes_np = boxes.xyxy.cpu().numpy()
-            cls_ids = boxes.cls.cpu().numpy()
             
             # Инициализация словарей для каждого типа СИЗ
             for class_name in class_names:
-                if any(siz_type in class_name.lower() for siz_type in ['glasses', 'glove', 'helmet', 'pants', 'vest']):
-                    required_siz[class_name] = people_count
+                siz_type = self._siz_type_of(class_name, siz_types)
+                if siz_type is not None:
+                    required_siz[class_name] = len(detections.people_requiring(siz_type))
                     detected_siz[class_name] = 0
+            checked_all = len(siz_types) == len(SIZ_TYPES)
 
-            for i, (box, cls_id) in enumerate(zip(boxes_np, cls_ids)):
+            for i, (box, cls_id) in enumerate(zip(detections.xyxy, detections.cls)):
                 try:
                     class_name = class_names[int(cls_id)] if class_names else str(cls_id)
                     status = False
+                    if not checked_all and class_name not in required_siz:
+                        statuses.append(None)
+                        continue
                     
-                    if pose_results and hasattr(pose_results, 'keypoints'):
-                        person_idx = self._find_best_person_match(box, pose_results)
+                    if people_count:
+                        # Владелец бокса — ближайший человек среди всех, а не только находящихся в зонах
+                        person_idx = detections.best_person(box, active_only=False)
+                        siz_type = self._siz_type_of(class_name, siz_types)
+                        if person_idx is not None and (not detections.active[person_idx] or (
+                                siz_type is not None and not detections.requires(person_idx, siz_type))):
+                            statuses.append(None)  # Человек вне зон или тип не обязателен в его зоне
+                            continue
                         if person_idx is not None:
-                            kpts = pose_results.keypoints.xy[person_idx].cpu().numpy()
-                            if 'glass' in class_name.lower():
-                                status = self._check_glasses(box, kpts)
-                                if not status:
-                                    self.logger.info(f"Очки не обнаружены на человеке {person_idx}")
-                            elif 'glove' in class_name.lower():
-                                status = self._check_glove(box, kpts, frame_shape[1], frame_shape[0])
-                                if not status:
-                                    self.logger.info(f"Перчатки не обнаружены на человеке {person_idx}")
-                            elif 'helmet' in class_name.lower():
-                                status = self._check_helmet(box, pose_results, frame_shape[1], frame_shape[0])
-                                if not status:
-                                    self.logger.info(f"Каска не обнаружена на человеке {person_idx}")
-                            elif 'pants' in class_name.lower():
-                                status = self._check_pants(box, kpts)
-                                if not status:
-                                    self.logger.info(f"Штаны не обнаружены на человеке {person_idx}")
-                            elif 'vest' in class_name.lower():
-                                status = self._check_vest(box, kpts)
-                                if not status:
-                                    self.logger.info(f"Жилет не обнаружен на человеке {person_idx}")
+                            kpts = detections.keypoints[person_idx]
+                            with TRACER.span('siz_check', 'siz', item=class_name):
+                                if 'glass' in class_name.lower():
+                                    status = self._check_glasses(box, kpts)
+                                    if not status:
+                                        self.logger.info(f"Очки не обнаружены на человеке {person_idx}")
+                                elif 'glove' in class_name.lower():
+                                    status = self._check_glove(box, kpts, frame_shape[1], frame_shape[0])
+                                    if not status:
+                                        self.logger.info(f"Перчатки не обнаружены на человеке {person_idx}")
+                                elif 'helmet' in class_name.lower():
+                                    status = self._check_helmet(box, kpts, frame_shape[1], frame_shape[0])
+                                    if not status:
+                                        self.logger.info(f"Каска не обнаружена на человеке {person_idx}")
+                                elif 'pants' in class_name.lower():
+                                    status = self._check_pants(box, kpts, detections.person_sizes[person_idx])
+                                    if not status:
+                                        self.logger.info(f"Штаны не обнаружены на человеке {person_idx}")
+                                elif 'vest' in class_name.lower():
+                                    status = self._check_vest(box, kpts)
+                                    if not status:
+                                        self.logger.info(f"Жилет не обнаружен на человеке {person_idx}")
                             
                             # Увеличиваем счетчик обнаруженных СИЗ
                             if class_name in detected_siz:
                                 detected_siz[class_name] += 1
                     
                     statuses.append(status)
+                    SIZ_CHECKS.labels(class_name, 'ok' if status else 'fail').inc()
                 except Exception as e:
                     self.logger.warning(f"Error processing box {i}: {str(e)}")
                     statuses.append(False)
@@ -115,6 +161,12 @@ class SIZDetector:
             self.logger.error(f"Check items error: {str(e)}")
             return [], 0, {}
 
+    @staticmethod
+    def _siz_type_of(class_name, siz_types):
+        """Тип СИЗ из siz_types, к которому относится класс модели, или None"""
+        name = class_name.lower()
+        return next((siz_type for siz_type in siz_types if siz_type in name), None)
+
     def _check_glove(self, box, kpts, img_w, img_h):
         """Проверка перчаток с увеличенной областью распознавания"""
         params = self.params['glove']
@@ -149,12 +201,9 @@ class SIZDetector:
             self.logger.error(f"Glove check error: {str(e)}")
             return False
 
-    def _check_helmet(self, box, pose_results, img_w, img_h):
-        """Проверка каски с учетом точного положения относительно головы"""
+    def _check_helmet(self, box, kpts, img_w, img_h):
+        """Проверка каски с учетом точного положения относительно головы (kpts — сопоставленный человек)"""
         params = self.params['helmet']
-        
-        if not pose_results or not hasattr(pose_results, 'keypoints'):
-            return False
 
         try:
             # Координаты bounding box шлема
@@ -171,14 +220,6 @@ class SIZDetector:
                 min(img_h, y2 + int(helmet_height * 1.5))  # Расширение вниз
             )
             
-            # Находим соответствующего человека
-            kpts = pose_results.keypoints.xy.cpu().numpy()
-            person_idx = self._find_best_person_match(box, pose_results)
-            
-            if person_idx is None:
-                return False
-                
-            kpts = kpts[person_idx]
             head_points = []
             
             # Собираем видимые точки головы
@@ -233,7 +274,7 @@ class SIZDetector:
             return False
 
     # Остальные методы остаются без изменений
-    def _check_pants(self, box, kpts):
+    def _check_pants(self, box, kpts, person_height):
         """Проверка штанов с покрытием ног"""
         params = self.params['pants']
         
@@ -250,7 +291,6 @@ class SIZDetector:
             covered = sum(self._is_point_covered(pt, box) for pt in leg_points)
             coverage = covered / len(leg_points)
             
-            person_height = self._estimate_person_size(kpts)
             box_height = box[3] - box[1]
             height_ratio = box_height / (person_height + 1e-6)
             
@@ -319,46 +359,6 @@ class SIZDetector:
             return False
 
     # Остальные вспомогательные методы без изменений
-    def _find_best_person_match(self, box, pose_results):
-        """Находит наиболее подходящего человека с учетом нескольких факторов"""
-        best_match = None
-        best_score = -1
-        
-        for i, kpts in enumerate(pose_results.keypoints.xy.cpu().numpy()):
-            visible_points = sum(1 for kpt in kpts if kpt[0] > 0 and kpt[1] > 0)
-            if visible_points < 5:
-                continue
-                
-            body_center = self._get_body_center(kpts)
-            box_center = ((box[0] + box[2])/2, (box[1] + box[3])/2)
-            
-            distance = np.sqrt((body_center[0]-box_center[0])**2 + (body_center[1]-box_center[1])**2)
-            
-            person_size = self._estimate_person_size(kpts)
-            norm_distance = distance / (person_size + 1e-6)
-            
-            score = 1.0 / (1.0 + norm_distance)
-            
-            if score > best_score:
-                best_score = score
-                best_match = i
-                
-        return best_match
-
-    def _get_body_center(self, kpts):
-        """Вычисляет центр тела по видимым ключевым точкам"""
-        visible = [kpt for kpt in kpts if kpt[0] > 0 and kpt[1] > 0]
-        if not visible:
-            return (0, 0)
-        return np.mean(visible, axis=0)
-
-    def _estimate_person_size(self, kpts):
-        """Оценивает размер человека по ключевым точкам"""
-        visible = [kpt for kpt in kpts if kpt[0] > 0 and kpt[1] > 0]
-        if len(visible) < 2:
-            return 0
-        return np.max([np.linalg.norm(a-b) for a in visible for b in visible])
-
     def _is_point_covered(self, point, box):
         """Проверяет, покрыта ли точка bounding box"""
         return (box[0] <= point[0] <= box[2] and 
@@ -388,16 +388,17 @@ class SIZDetector:
             box[3] + h * ratio
         ]
     
-    def get_missing_siz_areas(self, pose_results, frame_shape, detected_siz, required_siz, class_names):
-        """Возвращает области, где должны быть СИЗ, но их нет"""
+    def get_missing_siz_areas(self, detections, frame_shape, detected_siz, required_siz, class_names,
+                              siz_types=SIZ_TYPES):
+        """Возвращает области, где должны быть СИЗ (из siz_types), но их нет"""
         missing_areas = []
         
-        if pose_results is None or not hasattr(pose_results, 'keypoints'):
+        if detections is None or not detections.people:
             return missing_areas
         
         try:
             # Проверяем каждый тип СИЗ
-            for siz_type in ['glasses', 'glove', 'helmet', 'vest', 'pants']:
+            for siz_type in siz_types:
                 # Проверяем, есть ли этот тип СИЗ в модели
                 if not self._is_siz_in_model(siz_type, class_names):
                     continue
@@ -410,8 +411,8 @@ class SIZDetector:
                     missing_count = required - detected
                     self.logger.info(f"Обнаружено отсутствие {missing_count} {siz_type}")
                     
-                    for person_idx in range(len(pose_results.keypoints.xy)):
-                        kpts = pose_results.keypoints.xy[person_idx].cpu().numpy()
+                    # Только люди, для которых этот тип обязателен в их рабочей зоне
+                    for kpts in detections.keypoints[detections.people_requiring(siz_type)]:
                         
                         # Определяем область для каждого типа СИЗ
                         if siz_type == 'glasses':
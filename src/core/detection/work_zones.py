@@ -0,0 +1,138 @@
+import json
+import numpy as np
+
+FOOT_POINTS = [15, 16]  # Лодыжки COCO: человек относится к зоне, в которой стоит
+
+
+def points_in_polygon(points, polygon):
+    """(N,) bool — точки (N, 2) внутри многоугольника (K, 2).
+
+    Правило чет-нечет: считаются пересечения луча вправо от точки со всеми
+    ребрами сразу, матрицей (N, K) без циклов по точкам и ребрам.
+    """
+    if not len(points):
+        return np.zeros(0, bool)
+    x = points[:, 0:1]
+    y = points[:, 1:2]
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    crosses = (y1 > y) != (y2 > y)
+    dy = np.where(y2 != y1, y2 - y1, 1.0)
+    x_cross = x1 + (y - y1) * (x2 - x1) / dy
+    return ((crosses & (x < x_cross)).sum(axis=1) % 2).astype(bool)
+
+
+class WorkZone:
+    """Многоугольная рабочая зона: вершины в долях кадра, обязательные в ней СИЗ (None — все типы камеры)"""
+    __slots__ = ('name', 'points', 'siz_types')
+
+    def __init__(self, name, points, siz_types=None):
+        self.name = name
+        self.points = tuple(points)
+        self.siz_types = tuple(siz_types) if siz_types else None
+
+    def to_dict(self):
+        zone = {'name': self.name, 'points': [list(point) for point in self.points]}
+        if self.siz_types:
+            zone['siz'] = list(self.siz_types)
+        return zone
+
+
+class WorkZones:
+    """Рабочие зоны камеры из колонки cameras.zones.
+
+    Вне зон (офис, проход, экран с людьми) СИЗ не требуются: человек,
+    опорная точка которого не попала ни в одну зону, не проверяется и для
+    него не рисуются отсутствующие СИЗ. Опорная точка — середина видимых
+    лодыжек, без них — середина нижнего края рамки человека. Человек в
+    нескольких зонах проверяется по объединению их обязательных СИЗ.
+
+    Хранятся как JSON: [{"name": "цех", "points": [[x, y], ...], "siz": ["helmet"]}],
+    координаты вершин — доли кадра 0..1. Пиксельные многоугольники
+    кэшируются по размеру кадра.
+    """
+
+    def __init__(self, zones):
+        self.zones = tuple(zones)
+        self._polygons = {}  # (h, w) -> [(K, 2) float32]
+
+    def __len__(self):
+        return len(self.zones)
+
+    @classmethod
+    def parse(cls, text, known_types):
+        """JSON зон -> WorkZones или None (пусто); ValueError при неверном формате"""
+        if not text or not str(text).strip():
+            return None
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"зоны не являются JSON ({e.msg})")
+        if not isinstance(data, list):
+            raise ValueError('зоны задаются списком [{"name": ..., "points": [[x, y], ...]}]')
+        zones = []
+        for i, item in enumerate(data):
+            if not isinstance(item, dict):
+                raise ValueError(f"зона {i + 1} должна быть объектом")
+            name = str(item.get('name') or f"зона {i + 1}")
+            try:
+                points = [(float(x), float(y)) for x, y in item.get('points') or []]
+            except (TypeError, ValueError):
+                raise ValueError(f"{name}: вершины задаются парами чисел [x, y]")
+            if len(points) < 3:
+                raise ValueError(f"{name}: нужно не меньше трех вершин")
+            if not all(0 <= x <= 1 and 0 <= y <= 1 for x, y in points):
+                raise ValueError(f"{name}: вершины задаются долями кадра 0..1")
+            siz_types = item.get('siz')
+            if siz_types is not None:
+                if isinstance(siz_types, str):
+                    siz_types = siz_types.split(',')
+                siz_types = [str(siz_type).strip().lower() for siz_type in siz_types]
+                unknown = [siz_type for siz_type in siz_types if siz_type not in known_types]
+                if unknown:
+                    raise ValueError(f"{name}: неизвестные типы СИЗ {', '.join(unknown)}")
+                siz_types = [siz_type for siz_type in known_types if siz_type in siz_types]
+            zones.append(WorkZone(name, points, siz_types))
+        return cls(zones) if zones else None
+
+    def to_text(self):
+        return json.dumps([zone.to_dict() for zone in self.zones], ensure_ascii=False)
+
+    def polygons(self, frame_shape):
+        """Вершины зон в пикселях кадра frame_shape"""
+        h, w = frame_shape[:2]
+        polygons = self._polygons.get((h, w))
+        if polygons is None:
+            scale = np.array((w, h), np.float32)
+            polygons = [np.array(zone.points, np.float32) * scale for zone in self.zones]
+            self._polygons[(h, w)] = polygons
+        return polygons
+
+    @staticmethod
+    def anchors(detections):
+        """(P, 2) опорные точки людей: середина видимых лодыжек или низ рамки"""
+        feet = detections.keypoints[:, FOOT_POINTS]
+        visible = detections.visible[:, FOOT_POINTS]
+        counts = visible.sum(axis=1)
+        anchors = (feet * visible[..., None]).sum(axis=1) / np.maximum(counts, 1)[:, None]
+        boxes = detections.person_boxes
+        bottom = np.stack(((boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]), axis=1)
+        return np.where((counts > 0)[:, None], anchors, bottom)
+
+    def required(self, detections, frame_shape, siz_types, offset=(0, 0)):
+        """(P, len(siz_types)) bool: какие СИЗ требуются от каждого человека.
+
+        frame_shape — размер всего кадра (зоны заданы в его долях), offset —
+        начало анализируемой области (ROI), в координатах которой detections.
+        """
+        required = np.zeros((detections.people, len(siz_types)), bool)
+        if not detections.people:
+            return required
+        anchors = self.anchors(detections) + np.array(offset, np.float32)
+        for zone, polygon in zip(self.zones, self.polygons(frame_shape)):
+            inside = points_in_polygon(anchors, polygon)
+            if not inside.any():
+                continue
+            types = zone.siz_types or siz_types
+            required[inside] |= np.array([siz_type in types for siz_type in siz_types], bool)
+        return required
@@ -1,51 +1,181 @@
-from ultralytics import YOLO
 import cv2
+import threading
+import time
+import numpy as np
 import yaml
+from config import Config
 from core.utils.logger import AppLogger
+from core.models.model_cache import ModelCache
 import os 
 
 class YOLODetector:
     def __init__(self):
-        self.models = {}
         self.class_names = {}
         self.current_model_name = ""
+        self.cache = ModelCache()  # Единственный владелец загруженных моделей
+        self._sources = {}  # model_type -> (model_info, version) для повторной загрузки после вытеснения
+        self._load_lock = threading.RLock()
+        self.load_stats = {}  # model_type -> {'load_time', 'warmup_time', 'cached'}
+        self._class_filters = {}  # (model_type, типы СИЗ) -> индексы классов для classes=
         self.logger = AppLogger.get_logger()
         self.logger.info("Инициализирован новый экземпляр YOLODetector")
 
     def is_initialized(self):
         """Проверка инициализации детектора"""
-        return hasattr(self, 'models') and self.models is not None
+        return getattr(self, 'cache', None) is not None
 
-    def load_model(self, model_type, model_info):
+    def load_model(self, model_type, model_info, warmup=True):
+        """warmup=False — без прогона (веса загружаются в родителе для fork, инференс только в процессах камер)"""
         try:
             if not os.path.exists(model_info['pt_file']):
                 raise FileNotFoundError(f"Файл модели {model_info['pt_file']} не найден")
                 
             if not os.path.exists(model_info['yaml_file']):
                 raise FileNotFoundError(f"Конфиг {model_info['yaml_file']} не найден")
-            
-            model = YOLO(model_info['pt_file'])
-            
-            # Загрузка классов из YAML
-            with open(model_info['yaml_file']) as f:
-                data = yaml.safe_load(f)
-                if 'names' not in data:
-                    raise ValueError("YAML файл не содержит ключа 'names'")
-                self.class_names[model_type] = data['names']  # Убедитесь, что это список
-            
-            self.models[model_type] = model
-            self.current_model_name = model_type
-            self.logger.info(f"Модель {model_type} успешно загружена. Классы: {self.class_names[model_type]}")
+
+            version = model_info.get('content_hash') or (model_info['pt_file'], os.path.getmtime(model_info['pt_file']))
+            start = time.perf_counter()
+
+            with self._load_lock:
+                cached = self.cache.get(model_type, version)
+                if cached and self._sources.get(model_type, (None, None))[1] == version \
+                        and self.current_model_name == model_type:
+                    return True  # Модель уже активна (повторный вызов из цепочки активации)
+                if cached:
+                    class_names = cached[1]
+                    stats = {'load_time': time.perf_counter() - start, 'warmup_time': 0.0, 'cached': True}
+                else:
+                    _, class_names, stats = self._load(model_type, model_info, version, warmup)
+
+                self._sources[model_type] = (model_info, version)
+                self.class_names[model_type] = class_names
+                self._class_filters = {key: value for key, value in self._class_filters.items() if key[0] != model_type}
+                self.load_stats[model_type] = stats
+                self.current_model_name = model_type
+            source = "из кэша" if stats['cached'] else f"за {stats['load_time']:.2f} сек, прогрев {stats['warmup_time']:.2f} сек"
+            self.logger.info(f"Модель {model_type} успешно загружена {source}. Классы: {class_names}")
             return True
         except Exception as e:
             self.logger.error(f"Ошибка загрузки модели {model_type}: {str(e)}", exc_info=True)
             return False
+
+    def _load(self, model_type, model_info, version, warmup):
+        """Чтение весов с диска и помещение модели в кэш (вытесненные модели больше нигде не удерживаются)"""
+        start = time.perf_counter()
+        from ultralytics import YOLO  # Тяжелый импорт (torch) откладывается до загрузки модели
+        model = YOLO(model_info['pt_file'])
+        class_names = model_info.get('classes') or self._read_class_names(model_info['yaml_file'])
+        load_time = time.perf_counter() - start
+
+        warmup_time = self._warmup(model_type, model) if warmup else 0.0
+        self.cache.put(model_type, version, model, class_names,
+                       ModelCache.estimate_size(model, model_info['pt_file']))
+        return model, class_names, {'load_time': load_time, 'warmup_time': warmup_time, 'cached': False}
+
+    def model(self, model_type):
+        """Модель из кэша; вытесненная по бюджету памяти загружается заново, None — модель не загружалась"""
+        source = self._sources.get(model_type)
+        if source is None:
+            return None
+        model_info, version = source
+        cached = self.cache.get(model_type, version)
+        if cached:
+            return cached[0]
+
+        with self._load_lock:
+            cached = self.cache.get(model_type, version)  # Могла загрузить другая камера, пока ждали
+            if cached:
+                return cached[0]
+            try:
+                model, _, stats = self._load(model_type, model_info, version, warmup=True)
+            except Exception as e:
+                self.logger.error(f"Ошибка повторной загрузки модели {model_type}: {str(e)}", exc_info=True)
+                return None
+            self.load_stats[model_type] = stats
+            self.logger.info(f"Модель {model_type} вытеснена из кэша и загружена повторно "
+                             f"за {stats['load_time']:.2f} сек")
+            return model
+
+    def class_filter(self, model_type, siz_types):
+        """Индексы классов модели, относящихся к перечисленным типам СИЗ"""
+        key = (model_type, tuple(siz_types))
+        classes = self._class_filters.get(key)
+        if classes is None:
+            names = self.class_names.get(model_type) or []
+            items = names.items() if isinstance(names, dict) else enumerate(names)
+            classes = [int(index) for index, name in items
+                       if any(siz_type in str(name).lower() for siz_type in siz_types)]
+            self._class_filters[key] = classes
+        return classes
+
+    def _read_class_names(self, yaml_file):
+        """Классы из YAML, если реестр моделей их не предоставил"""
+        with open(yaml_file) as f:
+            data = yaml.safe_load(f)
+            if 'names' not in data:
+                raise ValueError("YAML файл не содержит ключа 'names'")
+            return data['names']
+
+    def _warmup(self, model_type, model):
+        """Прогон пустого кадра: первая инференция инициализирует CUDA/аллокатор и сливает слои"""
+        settings = Config.MODEL_CACHE_SETTINGS
+        if not settings['warmup']:
+            return 0.0
+
+        imgsz = settings['warmup_imgsz']
+        dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        start = time.perf_counter()
+        try:
+            for _ in range(max(1, settings['warmup_runs'])):
+                model(dummy, imgsz=imgsz, verbose=False)
+        except Exception as e:
+            self.logger.warning(f"Прогрев модели {model_type} не удался: {str(e)}")
+        return time.perf_counter() - start
     
-    def detect(self, frame, model_type, statuses=None):
-        if model_type not in self.models:
+    def _predict_kwargs(self, model_type, profile):
+        kwargs = {}
+        if profile is not None:
+            kwargs = profile.predict_kwargs()
+            if profile.required_siz:
+                kwargs['classes'] = self.class_filter(model_type, profile.required_siz)
+        return kwargs
+
+    def detect_batch(self, images, model_type, profile=None, imgsz=None, batch_size=16):
+        """Боксы для списка изображений пакетами по batch_size.
+
+        Возвращает для каждого изображения (xyxy (N, 4) float32, conf (N,)
+        float32, cls (N,) int32) в его координатах; imgsz заменяет размер
+        входа из профиля (вырезки каскада меньше кадра).
+        """
+        model = self.model(model_type) if images else None
+        if model is None:
+            return []
+        kwargs = self._predict_kwargs(model_type, profile)
+        if imgsz:
+            kwargs['imgsz'] = imgsz
+        output = []
+        for start in range(0, len(images), batch_size):
+            for result in model(images[start:start + batch_size], verbose=False, **kwargs):
+                boxes = result.boxes
+                output.append((
+                    boxes.xyxy.cpu().numpy().astype(np.float32).reshape(-1, 4),
+                    boxes.conf.cpu().numpy().astype(np.float32).reshape(-1),
+                    boxes.cls.cpu().numpy().astype(np.int32).reshape(-1)
+                ))
+        return output
+
+    def detect(self, frame, model_type, statuses=None, plot=True, profile=None):
+        """plot=False — вернуть только боксы, без отрисовки кадра (результат рисует DetectionDrawer).
+
+        profile — InferenceProfile камеры: imgsz и conf передаются в модель, а
+        обязательные СИЗ — как classes=, чтобы NMS и дальнейшие проверки шли
+        только по нужным классам.
+        """
+        model = self.model(model_type)
+        if model is None:
             return frame, None
             
-        results = self.models[model_type](frame, verbose=False)
+        results = model(frame, verbose=False, **self._predict_kwargs(model_type, profile))
         
         if len(results[0].boxes) == 0:
             return frame, None
@@ -57,6 +187,9 @@ class YOLODetector:
             if hasattr(statuses, '__iter__') and not isinstance(statuses, (str, bool)):
                 statuses = [bool(s) for s in statuses]  # Преобразуем каждый элемент
         
+        if not plot:
+            return frame, boxes
+
         if statuses is not None:
             frame = self._draw_custom_boxes(frame, boxes.xyxy.cpu().numpy(), 
                                         boxes.conf.cpu().numpy(), 
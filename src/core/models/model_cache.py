@@ -0,0 +1,88 @@
+from collections import OrderedDict
+import os
+import threading
+from config import Config
+from core.utils.logger import AppLogger
+
+
+class ModelCache:
+    """LRU-кэш загруженных YOLO-моделей с ограничением по памяти.
+
+    Ключ — имя модели, запись действительна, пока не изменился хэш весов
+    из реестра моделей. Повторная активация модели из кэша не читает .pt
+    с диска и не повторяет прогрев.
+    """
+
+    def __init__(self, memory_budget_mb=None):
+        self.logger = AppLogger.get_logger()
+        budget_mb = memory_budget_mb or Config.MODEL_CACHE_SETTINGS['memory_budget_mb']
+        self.memory_budget = int(budget_mb * 1024 * 1024)
+        self._entries = OrderedDict()  # name -> {'model', 'class_names', 'version', 'size'}
+        self._lock = threading.Lock()
+
+    def get(self, name, version):
+        """Возвращает (model, class_names) или None, если модели нет или веса изменились"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry['version'] != version:
+                del self._entries[name]
+                self.logger.info(f"Модель {name} изменилась на диске, кэш сброшен")
+                return None
+            self._entries.move_to_end(name)
+            return entry['model'], entry['class_names']
+
+    def put(self, name, version, model, class_names, size=None):
+        """Добавляет модель и выгружает самые старые, пока не уложимся в бюджет.
+
+        Возвращает список имен выгруженных моделей.
+        """
+        size = size if size is not None else self.estimate_size(model)
+        with self._lock:
+            self._entries.pop(name, None)
+            self._entries[name] = {
+                'model': model,
+                'class_names': class_names,
+                'version': version,
+                'size': size
+            }
+            evicted = []
+            # Только что добавленную модель не выгружаем, даже если она одна больше бюджета
+            while self._total_size() > self.memory_budget and len(self._entries) > 1:
+                old_name, _ = self._entries.popitem(last=False)
+                evicted.append(old_name)
+
+        for old_name in evicted:
+            self.logger.info(f"Модель {old_name} выгружена из кэша (бюджет {self.memory_budget >> 20} МБ)")
+        return evicted
+
+    def remove(self, name):
+        with self._lock:
+            return self._entries.pop(name, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def names(self):
+        with self._lock:
+            return list(self._entries)
+
+    def memory_usage(self):
+        with self._lock:
+            return self._total_size()
+
+    def _total_size(self):
+        return sum(entry['size'] for entry in self._entries.values())
+
+    @staticmethod
+    def estimate_size(model, fallback_path=None):
+        """Оценка памяти модели по параметрам и буферам torch, иначе — по размеру файла весов"""
+        try:
+            module = model.model
+            tensors = list(module.parameters()) + list(module.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        except Exception:
+            path = fallback_path or getattr(model, 'ckpt_path', None)
+            return os.path.getsize(path) if path and os.path.exists(path) else 0
@@ -20,7 +20,14 @@ class ModelManager(QObject):
         try:
             if self.main.model_handler.load_model(model_name):
                 self.current_model = model_name
-                self.main.ui.status_bar.show_message(f"Модель '{model_name}' активирована", 3000)
+                stats = self.main.yolo_detector.load_stats.get(model_name, {})
+                if stats.get('cached'):
+                    details = " (из кэша)"
+                elif stats:
+                    details = f" (загрузка {stats['load_time']:.1f} с, прогрев {stats['warmup_time']:.1f} с)"
+                else:
+                    details = ""
+                self.main.ui.status_bar.show_message(f"Модель '{model_name}' активирована{details}", 3000)
                 self.main.ui.control_panel.start_btn.setEnabled(True)
             else:
                 self.main.ui.status_bar.show_message("Ошибка активации модели", 3000)
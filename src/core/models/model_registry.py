@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+import yaml
+from config import Config
+from core.utils.logger import AppLogger
+from core.storage.database import Database
+from sql_scripts import SQL
+
+
+class ModelRegistry:
+    """Кэш моделей из Config.MODELS_DIR.
+
+    Папка сканируется один раз, дальше повторно читаются только подпапки,
+    у которых изменился mtime (или mtime/размер .pt/.yaml). Метаданные
+    модели — классы из YAML, размеры файлов и SHA-256 весов — сохраняются
+    в таблице model_metadata. Хэш весов считается лениво, при первом
+    get_model_info (загрузке модели), и пересчитывается только при
+    изменении файла весов; сканирование папки читает только stat и YAML.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, models_dir=None, storage_path: str = None):
+        self.logger = AppLogger.get_logger()
+        self.models_dir = Path(models_dir) if models_dir else Path(Config.MODELS_DIR)
+        self.settings = Config.MODEL_REGISTRY_SETTINGS
+        self.db = Database.get(storage_path)
+
+        self._lock = threading.RLock()
+        self._root_mtime = None
+        self._last_check = 0.0
+        self._entries = {}  # name -> {'signature': ..., 'info': {...}}
+        self._subdirs = {}  # name -> mtime подпапки (включая неполные модели)
+        self._listeners = []
+        self._watcher = None
+        self._stop_event = threading.Event()
+        self._stored = self._load_stored_metadata()
+
+    def get_available_models(self):
+        """Возвращает {name: {'pt_file', 'yaml_file', ...}} без обращения к диску, если кэш актуален"""
+        with self._lock:
+            # После invalidate() папка перечитывается сразу, даже если работает наблюдатель
+            if self._root_mtime is None or (
+                    self._watcher is None and time.monotonic() - self._last_check >= self.settings['recheck_interval']):
+                self.refresh()
+            return {name: dict(entry['info']) for name, entry in self._entries.items()}
+
+    def get_model_info(self, name):
+        """Метаданные модели с хэшем весов (считается при первом обращении)"""
+        with self._lock:
+            if not self._entries or self._root_mtime is None:
+                self.refresh()
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            info = entry['info']
+            if info['content_hash'] is None:
+                info['content_hash'] = self._hash_file(info['pt_file'])
+                self._store_metadata(name, info)
+            return dict(info)
+
+    def invalidate(self):
+        """Принудительная проверка папок при следующем обращении"""
+        with self._lock:
+            self._last_check = 0.0
+            self._root_mtime = None
+
+    def add_listener(self, callback):
+        """callback() вызывается при изменении набора моделей (возможно, из фонового потока)"""
+        self._listeners.append(callback)
+
+    def refresh(self):
+        """Инкрементально обновляет кэш. Возвращает True, если набор моделей изменился"""
+        with self._lock:
+            self._last_check = time.monotonic()
+            try:
+                os.makedirs(self.models_dir, exist_ok=True)
+                root_mtime = os.stat(self.models_dir).st_mtime_ns
+
+                if root_mtime == self._root_mtime:
+                    changed = False
+                    for name in list(self._subdirs):
+                        changed |= self._refresh_entry(name, os.path.join(self.models_dir, name))
+                    return changed
+
+                self._root_mtime = root_mtime
+                seen = set()
+                changed = False
+                with os.scandir(self.models_dir) as it:
+                    for dir_entry in it:
+                        if dir_entry.is_dir():
+                            seen.add(dir_entry.name)
+                            changed |= self._refresh_entry(dir_entry.name, dir_entry.path)
+
+                for name in set(self._subdirs) - seen:
+                    self._subdirs.pop(name, None)
+                    changed |= self._entries.pop(name, None) is not None
+                return changed
+            except Exception as e:
+                self.logger.error(f"Ошибка сканирования моделей: {str(e)}", exc_info=True)
+                return False
+
+    def _refresh_entry(self, name, model_path):
+        """Пересканирует подпапку модели, если изменилась её сигнатура"""
+        cached = self._entries.get(name)
+        try:
+            dir_mtime = os.stat(model_path).st_mtime_ns
+            if cached:
+                info = cached['info']
+                if cached['signature'] == self._signature(dir_mtime, info['pt_file'], info['yaml_file']):
+                    return False
+            elif self._subdirs.get(name) == dir_mtime:
+                return False  # Неполная модель, содержимое папки не менялось
+        except OSError:
+            self._subdirs.pop(name, None)
+            return self._entries.pop(name, None) is not None
+
+        self._subdirs[name] = dir_mtime
+
+        pt_files, yaml_files = [], []
+        with os.scandir(model_path) as it:
+            for file_entry in it:
+                if file_entry.name.endswith('.pt'):
+                    pt_files.append(file_entry.name)
+                elif file_entry.name.endswith('.yaml'):
+                    yaml_files.append(file_entry.name)
+
+        if not pt_files or not yaml_files:
+            if cached:
+                del self._entries[name]
+                return True
+            return False
+
+        pt_file = os.path.join(model_path, sorted(pt_files)[0])
+        yaml_file = os.path.join(model_path, sorted(yaml_files)[0])
+        info = self._build_info(name, pt_file, yaml_file)
+        self._entries[name] = {
+            'signature': self._signature(dir_mtime, pt_file, yaml_file),
+            'info': info
+        }
+        return cached is None or cached['info'] != info
+
+    @staticmethod
+    def _signature(dir_mtime, pt_file, yaml_file):
+        pt_stat = os.stat(pt_file)
+        yaml_stat = os.stat(yaml_file)
+        return (dir_mtime, pt_stat.st_mtime_ns, pt_stat.st_size, yaml_stat.st_mtime_ns, yaml_stat.st_size)
+
+    def _build_info(self, name, pt_file, yaml_file):
+        pt_stat = os.stat(pt_file)
+        yaml_size = os.path.getsize(yaml_file)
+        stored = self._stored.get(name)
+
+        # Хэш весов — самая дорогая часть, пересчитываем только при изменении .pt
+        weights_unchanged = (stored and stored['pt_file'] == pt_file and stored['pt_size'] == pt_stat.st_size
+                             and stored['pt_mtime'] == pt_stat.st_mtime_ns)
+
+        info = {
+            'pt_file': pt_file,
+            'yaml_file': yaml_file,
+            'classes': self._read_classes(yaml_file),
+            'pt_size': pt_stat.st_size,
+            'yaml_size': yaml_size,
+            'pt_mtime': pt_stat.st_mtime_ns,
+            'content_hash': stored['content_hash'] if weights_unchanged else None
+        }
+        if info['content_hash'] is not None and info != stored:
+            self._store_metadata(name, info)
+        return info
+
+    def _read_classes(self, yaml_file):
+        try:
+            with open(yaml_file, encoding='utf-8') as f:
+                names = (yaml.safe_load(f) or {}).get('names', [])
+            if isinstance(names, dict):
+                names = [names[key] for key in sorted(names)]
+            return list(names)
+        except Exception as e:
+            self.logger.warning(f"Не удалось прочитать классы из {yaml_file}: {str(e)}")
+            return []
+
+    def _hash_file(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.settings['hash_chunk_size']), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _load_stored_metadata(self):
+        try:
+            return {
+                name: {
+                    'pt_file': pt_file,
+                    'yaml_file': yaml_file,
+                    'classes': json.loads(classes) if classes else [],
+                    'pt_size': pt_size,
+                    'yaml_size': yaml_size,
+                    'pt_mtime': pt_mtime,
+                    'content_hash': content_hash
+                } for name, pt_file, yaml_file, classes, pt_size, yaml_size, pt_mtime, content_hash
+                in self.db.query(SQL.SELECT_MODEL_METADATA)
+            }
+        except Exception as e:
+            self.logger.error(f"Ошибка чтения метаданных моделей: {str(e)}")
+            return {}
+
+    def _store_metadata(self, name, info):
+        self._stored[name] = dict(info)
+        try:
+            self.db.write(SQL.UPSERT_MODEL_METADATA, (
+                name, info['pt_file'], info['yaml_file'], json.dumps(info['classes'], ensure_ascii=False),
+                info['pt_size'], info['yaml_size'], info['pt_mtime'], info['content_hash']
+            ))
+            self.logger.info(f"Метаданные модели {name} обновлены (sha256 {info['content_hash'][:12]})")
+        except Exception as e:
+            self.logger.error(f"Ошибка сохранения метаданных модели {name}: {str(e)}")
+
+    def start_watching(self):
+        """Запускает наблюдение за папкой моделей (watchdog или периодический опрос mtime)"""
+        if self._watcher is not None:
+            return
+        self.refresh()
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+
+            registry = self
+
+            class _Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if event.event_type not in ('created', 'deleted', 'modified', 'moved'):
+                        return
+                    registry.invalidate()
+                    registry._notify_if_changed()
+
+            observer = Observer()
+            observer.schedule(_Handler(), str(self.models_dir), recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._watcher = observer
+            self.logger.info("Наблюдение за папкой моделей: watchdog")
+        except ImportError:
+            self._stop_event.clear()
+            self._watcher = threading.Thread(target=self._poll_loop, name="ModelRegistryPoll", daemon=True)
+            self._watcher.start()
+            self.logger.info("Наблюдение за папкой моделей: опрос mtime")
+
+    def stop_watching(self):
+        watcher, self._watcher = self._watcher, None
+        if watcher is None:
+            return
+        self._stop_event.set()
+        if hasattr(watcher, 'stop'):
+            watcher.stop()
+        watcher.join(timeout=2)
+
+    def _poll_loop(self):
+        while not self._stop_event.wait(self.settings['poll_interval']):
+            self._notify_if_changed()
+
+    def _notify_if_changed(self):
+        if not self.refresh():
+            return
+        self.logger.info(f"Набор моделей изменился: {sorted(self._entries)}")
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"Ошибка обработчика изменения моделей: {str(e)}")
@@ -1,13 +1,12 @@
 from PyQt6.QtCore import QObject
 from PyQt6.QtWidgets import QMessageBox
 from rtsp.rtsp_manager import RtspManagerDialog
-from rtsp.rtsp_storage import RtspStorage
 
 class RtspManager(QObject):
     def __init__(self, main_controller):
         super().__init__()
         self.main = main_controller
-        self.rtsp_storage = RtspStorage()
+        self.rtsp_storage = main_controller.rtsp_storage  # Общее хранилище контроллера
 
     def load_rtsp_list(self):
         """Обновляет список RTSP потоков в выпадающем списке"""
@@ -64,7 +63,7 @@ class RtspManager(QObject):
     def get_current_rtsp(self):
         current_name = self.main.ui.control_panel.rtsp_combo.currentText()
         if current_name and current_name != "Нет сохраненных RTSP":
-            return self.rtsp_storage.get_all_rtsp().get(current_name, {})
+            return self.rtsp_storage.get_rtsp(current_name) or {}
         return {}
     
     def validate_rtsp_selection(self):
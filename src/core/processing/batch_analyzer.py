@@ -0,0 +1,297 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import cv2
+from config import Config
+from core.utils.logger import AppLogger
+from core.utils.input_validator import InputValidator
+
+FRAME_FIELDS = ['file', 'frame', 'time', 'people', 'detected', 'missing', 'violations', 'compliant']
+SECOND_FIELDS = ['file', 'second', 'frames', 'people_max', 'violation_frames', 'compliance', 'missing']
+
+# Детекторы создаются один раз на процесс пула (см. _init_worker)
+_worker = {}
+
+
+def _init_worker(model_name, model_info):
+    from core.detection.yolo_detector import YOLODetector
+    from core.detection.pose_detection import PoseDetector
+    from core.detection.siz_detection import SIZDetector
+    from .frame_processor import FrameProcessor
+
+    yolo = YOLODetector()
+    if not yolo.load_model(model_name, model_info):
+        raise RuntimeError(f"Не удалось загрузить модель {model_name}")
+    processor = FrameProcessor()
+    processor.set_detectors(yolo, PoseDetector(), SIZDetector())
+    _worker['processor'] = processor
+    _worker['model_name'] = model_name
+
+
+def _seek(cap, start_frame):
+    """Переход к кадру через ближайший предшествующий ключевой кадр.
+
+    Бэкенд может встать на ключевой кадр раньше запрошенного — тогда
+    докручиваем grab() без декодирования в BGR до нужной позиции.
+    """
+    if start_frame <= 0:
+        return 0
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    while position < start_frame and cap.grab():
+        position += 1
+    return position
+
+
+def _analyze_chunk(task):
+    """Обрабатывает фрагмент [start, end) одного файла, возвращает строки отчета и путь к части видео"""
+    processor = _worker['processor']
+    model_name = _worker['model_name']
+    processor.render = bool(task['part_path'])
+
+    cap = cv2.VideoCapture(task['path'])
+    if not cap.isOpened():
+        raise RuntimeError(f"Не удалось открыть {task['path']}")
+
+    writer = None
+    rows = []
+    try:
+        index = _seek(cap, task['start'])
+        fps = task['fps']
+        while index < task['end']:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            processed, status = processor.process(frame, model_name)
+            statuses, people_count, detected_siz = status if status else ([], 0, {})
+            missing = sorted({siz_type for _, siz_type in processor.last_missing_areas})
+            rows.append({
+                'file': task['name'],
+                'frame': index,
+                'time': round(index / fps, 3),
+                'people': people_count,
+                'detected': ';'.join(f"{name}:{count}" for name, count in sorted(detected_siz.items())),
+                'missing': ';'.join(missing),
+                'violations': len(processor.last_missing_areas),
+                'compliant': not processor.last_missing_areas
+            })
+
+            if task['part_path']:
+                if writer is None:
+                    h, w = processed.shape[:2]
+                    writer = cv2.VideoWriter(task['part_path'], cv2.VideoWriter_fourcc(*task['fourcc']), fps, (w, h))
+                writer.write(processed)
+            index += 1
+    finally:
+        cap.release()
+        if writer is not None:
+            writer.release()
+
+    return task['name'], task['chunk'], rows, task['part_path'] if writer is not None else None
+
+
+class BatchAnalyzer:
+    """Анализ видеофайлов без синхронизации с реальным временем.
+
+    Длинные файлы делятся на фрагменты по chunk_seconds, фрагменты
+    обрабатываются пулом процессов; по каждому файлу сохраняются покадровый
+    и посекундный отчеты и, при необходимости, видео с разметкой. Файлы
+    различаются по пути относительно source вместе с расширением (a.mp4 и
+    a.avi — разные отчеты); ошибка фрагмента записывается в отчет его
+    файла, остальные файлы анализируются дальше.
+    """
+
+    def __init__(self, model_name, output_dir, settings=None):
+        self.logger = AppLogger.get_logger()
+        self.settings = dict(Config.BATCH_SETTINGS, **(settings or {}))
+        self.model_name = model_name
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+
+        from core.models.model_registry import ModelRegistry
+        self.model_info = ModelRegistry.instance().get_model_info(model_name)
+        if self.model_info is None:
+            raise ValueError(f"Модель {model_name} не найдена")
+
+    @staticmethod
+    def collect_videos(source):
+        """Файл или все видео из папки (с расширениями InputValidator.VIDEO_EXTENSIONS)"""
+        if os.path.isdir(source):
+            return sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.lower().endswith(InputValidator.VIDEO_EXTENSIONS)
+            )
+        return [source]
+
+    def run(self, source):
+        videos = self.collect_videos(source)
+        if not videos:
+            self.logger.error(f"Видео не найдены: {source}")
+            return {}
+
+        started = time.perf_counter()
+        base_dir = source if os.path.isdir(source) else os.path.dirname(source)
+        part_dir = tempfile.mkdtemp(prefix="ppe_batch_", dir=self.output_dir)
+        tasks, meta = [], {}
+        for index, path in enumerate(videos):
+            file_tasks, file_meta = self._plan(path, os.path.relpath(path, base_dir or '.'), index, part_dir)
+            if file_tasks:
+                tasks.extend(file_tasks)
+                meta[file_meta['name']] = file_meta
+
+        results = {name: {} for name in meta}
+        errors = {}
+        try:
+            with ProcessPoolExecutor(max_workers=self.settings['workers'], initializer=_init_worker,
+                                     initargs=(self.model_name, self.model_info)) as pool:
+                futures = {pool.submit(_analyze_chunk, task): task for task in tasks}
+                for done, future in enumerate(as_completed(futures), 1):
+                    task = futures[future]
+                    name, chunk = task['name'], task['chunk']
+                    try:
+                        _, _, rows, part_path = future.result()
+                    except Exception as e:
+                        errors.setdefault(name, f"фрагмент #{chunk}: {str(e)}")
+                        self.logger.error(f"Пакетный анализ: ошибка фрагмента {name} #{chunk}: {str(e)}")
+                        continue
+                    results[name][chunk] = (rows, part_path)
+                    self.logger.info(f"Пакетный анализ: фрагмент {done}/{len(tasks)} ({name} #{chunk})")
+
+            reports = {}
+            for name, chunks in results.items():
+                if name in errors:
+                    reports[name] = {'error': errors[name]}
+                    continue
+                reports[name] = self._write_outputs(meta[name], [chunks[i] for i in sorted(chunks)])
+        finally:
+            shutil.rmtree(part_dir, ignore_errors=True)
+
+        total_frames = sum(m['frames'] for m in meta.values())
+        elapsed = time.perf_counter() - started
+        self.logger.info(f"Пакетный анализ завершен: {len(meta)} файлов (с ошибками {len(errors)}), "
+                         f"{total_frames} кадров за {elapsed:.1f} сек "
+                         f"({total_frames / elapsed if elapsed else 0:.1f} кадр/с)")
+        return reports
+
+    def _plan(self, path, name, index, part_dir):
+        """Фрагменты файла; name — путь относительно source с расширением, ключ отчетов"""
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            self.logger.error(f"Не удалось открыть {path}")
+            return [], None
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        chunk_frames = max(1, int(self.settings['chunk_seconds'] * fps))
+        tasks = []
+        for chunk, start in enumerate(range(0, max(frames, 1), chunk_frames)):
+            part_path = os.path.join(part_dir, f"{index:05d}_{chunk:05d}.mp4") if self.settings['annotate'] else None
+            tasks.append({
+                'path': path, 'name': name, 'chunk': chunk, 'fps': fps,
+                'start': start, 'end': min(start + chunk_frames, frames) if frames > 0 else float('inf'),
+                'part_path': part_path, 'fourcc': self.settings['fourcc']
+            })
+        return tasks, {'name': name, 'path': path, 'fps': fps, 'frames': frames}
+
+    @staticmethod
+    def report_stem(name):
+        """Имя файлов отчета: относительный путь с расширением, каталоги через '__' (sub/a.mp4 -> sub__a.mp4)"""
+        return name.replace(os.sep, '__').replace('/', '__')
+
+    def _write_outputs(self, meta, chunks):
+        frame_rows = [row for rows, _ in chunks for row in rows]
+        second_rows = self._aggregate_seconds(frame_rows)
+        fmt = self.settings['report_format']
+        stem = self.report_stem(meta['name'])
+
+        outputs = {
+            'frames': self._write_report(frame_rows, FRAME_FIELDS, f"{stem}_frames", fmt),
+            'seconds': self._write_report(second_rows, SECOND_FIELDS, f"{stem}_seconds", fmt)
+        }
+        parts = [part for _, part in chunks if part]
+        if parts:
+            outputs['video'] = self._concat_parts(parts, os.path.join(self.output_dir, f"{stem}_annotated.mp4"), meta['fps'])
+        return outputs
+
+    @staticmethod
+    def _aggregate_seconds(frame_rows):
+        seconds = {}
+        for row in frame_rows:
+            second = int(row['time'])
+            entry = seconds.setdefault(second, {
+                'file': row['file'], 'second': second, 'frames': 0,
+                'people_max': 0, 'violation_frames': 0, 'missing': set()
+            })
+            entry['frames'] += 1
+            entry['people_max'] = max(entry['people_max'], row['people'])
+            if not row['compliant']:
+                entry['violation_frames'] += 1
+                entry['missing'].update(filter(None, row['missing'].split(';')))
+
+        result = []
+        for second in sorted(seconds):
+            entry = seconds[second]
+            entry['compliance'] = round(1 - entry['violation_frames'] / entry['frames'], 3)
+            entry['missing'] = ';'.join(sorted(entry['missing']))
+            result.append(entry)
+        return result
+
+    def _write_report(self, rows, fields, stem, fmt):
+        path = os.path.join(self.output_dir, f"{stem}.{fmt}")
+        if fmt == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+        elif fmt == 'json':
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, ensure_ascii=False)
+        elif fmt == 'parquet':
+            try:
+                import pandas as pd
+            except ImportError:
+                raise RuntimeError("Для отчета в Parquet нужны пакеты pandas и pyarrow")
+            pd.DataFrame(rows, columns=fields).to_parquet(path, index=False)
+        else:
+            raise ValueError(f"Неизвестный формат отчета: {fmt}")
+        return path
+
+    def _concat_parts(self, parts, output_path, fps):
+        """Склейка частей: ffmpeg без перекодирования, если он есть, иначе через OpenCV"""
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg:
+            list_path = output_path + ".txt"
+            with open(list_path, 'w', encoding='utf-8') as f:
+                # В списке concat кавычка внутри '...' записывается как '\''
+                f.writelines("file '{}'\n".format(os.path.abspath(part).replace("'", "'\\''")) for part in parts)
+            try:
+                subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                                '-i', list_path, '-c', 'copy', output_path], check=True)
+                return output_path
+            except subprocess.CalledProcessError as e:
+                self.logger.warning(f"ffmpeg не смог склеить видео ({e}), используется OpenCV")
+            finally:
+                os.remove(list_path)
+
+        writer = None
+        for part in parts:
+            cap = cv2.VideoCapture(part)
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if writer is None:
+                    h, w = frame.shape[:2]
+                    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*self.settings['fourcc']), fps, (w, h))
+                writer.write(frame)
+            cap.release()
+        if writer is not None:
+            writer.release()
+        return output_path
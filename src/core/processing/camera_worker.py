@@ -0,0 +1,120 @@
+import queue
+import signal
+import sys
+import time
+import cv2
+from config import Config
+from core.utils.logger import AppLogger
+from core.utils.pipeline_metrics import PipelineMetrics
+from .shared_frame_ring import SharedFrameRing
+
+RTSP_SOURCE_TYPE = 2  # Индекс типа источника в InputValidator
+FATAL_EXIT_CODE = 78  # EX_CONFIG: ошибка конфигурации, перезапуск не поможет
+
+
+def camera_worker_main(camera, results, stop_event, detectors=None):
+    """Точка входа процесса камеры: захват, анализ и публикация результатов.
+
+    camera — словарь из WorkerSupervisor (name, url, model, model_info, profile,
+    ring). Кадры уходят в кольцо SharedFrameRing, а в очередь results —
+    только номер кадра и результаты анализа. detectors — (yolo, pose, siz),
+    загруженные в родителе до fork: веса моделей тогда не копируются, а
+    остаются общими страницами памяти, пока процесс их не изменит.
+    Процесс, который не может работать при текущей конфигурации (модель не
+    загружается), завершается с кодом FATAL_EXIT_CODE и не перезапускается.
+    """
+    # Ctrl+C в терминале получает вся группа процессов; останавливает супервизор
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logger = AppLogger.get_logger()
+    name = camera['name']
+    settings = Config.HEADLESS_SETTINGS
+
+    from core.detection.yolo_detector import YOLODetector
+    from core.detection.pose_detection import PoseDetector
+    from core.detection.siz_detection import SIZDetector
+    from .input_handler import InputHandler
+    from .frame_processor import FrameProcessor
+
+    if detectors is not None:
+        yolo, pose, siz = detectors
+    else:
+        yolo, pose, siz = YOLODetector(), PoseDetector(), SIZDetector()
+        pose.load()
+        if not yolo.load_model(camera['model'], camera['model_info']):
+            logger.error(f"Процесс камеры {name}: модель {camera['model']} не загружена")
+            sys.exit(FATAL_EXIT_CODE)
+
+    ring = SharedFrameRing.attach(*camera['ring']) if camera['ring'] else None
+    max_h, max_w = (ring.max_shape[:2] if ring else (0, 0))
+    input_handler = InputHandler()
+    frame_processor = FrameProcessor()
+    frame_processor.render = False
+    frame_processor.set_detectors(yolo, pose, siz)
+    frame_processor.set_profile(camera['profile'])
+    metrics = PipelineMetrics(window=Config.METRICS_SETTINGS['window'])
+    frame_processor.set_metrics(metrics)
+
+    min_interval = 1.0 / settings['max_fps'] if settings['max_fps'] else 0.0
+    last_metrics = time.monotonic()
+    dropped = 0
+
+    def publish(message):
+        nonlocal dropped
+        try:
+            results.put_nowait(message)
+        except queue.Full:
+            dropped += 1
+
+    try:
+        while not stop_event.is_set():
+            if not input_handler.is_ready():
+                success, error_msg = input_handler.setup_source(camera['url'], RTSP_SOURCE_TYPE)
+                if not success:
+                    logger.warning(f"Камера {name} недоступна: {error_msg}")
+                    stop_event.wait(settings['reconnect_delay'])
+                    continue
+                publish(('connected', name, None))
+
+            started = time.monotonic()
+            with metrics.stage('capture'):
+                _, frame = input_handler.read_frame()
+            if frame is None:
+                logger.warning(f"Камера {name}: поток прерван, переподключение")
+                input_handler.release()
+                publish(('disconnected', name, None))
+                stop_event.wait(settings['reconnect_delay'])
+                continue
+
+            if input_handler.health_event:
+                publish(('health', name, (input_handler.health_event, input_handler.fingerprint.frozen_for)))
+            _, status = frame_processor.process(frame, camera['model'], input_handler.duplicate)
+            timestamp = time.time()
+            reused = input_handler.duplicate and not frame_processor.last_inferred
+            seq = None
+            h, w = frame.shape[:2]
+            if input_handler.frozen:
+                # Повтор зависшего кадра — не данные: без кадра для клипов и снимков и без нарушений
+                publish(('frame', name, (None, timestamp, (h, w), 0, [], reused)))
+            else:
+                if ring is not None:
+                    if h > max_h or w > max_w:
+                        # В слот уходит уменьшенная копия; исходный размер передается с результатом
+                        scale = min(max_h / h, max_w / w)
+                        frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+                    seq = ring.write(frame, timestamp)
+                publish(('frame', name, (seq, timestamp, (h, w), status[1] if status else 0,
+                                         frame_processor.last_missing_areas, reused)))
+            metrics.frame_done()
+
+            if time.monotonic() - last_metrics >= settings['worker_metrics_interval']:
+                last_metrics = time.monotonic()
+                publish(('metrics', name, dict(metrics.snapshot(), results_dropped=dropped)))
+
+            remaining = min_interval - (time.monotonic() - started)
+            if remaining > 0:
+                stop_event.wait(remaining)
+    finally:
+        input_handler.release()
+        if ring is not None:
+            ring.close()
+        logger.info(f"Процесс камеры {name} остановлен, обработано кадров: {metrics.frames}")
@@ -0,0 +1,267 @@
+import queue
+import threading
+import time
+import cv2
+from config import Config
+from core.utils.logger import AppLogger
+
+
+class FilePlayback:
+    """Воспроизведение видеофайла с опережающим декодированием.
+
+    Поток декодирования читает файл в ограниченную очередь, а кадры отдаются
+    по часам воспроизведения на time.monotonic(): позиция = опорный pts +
+    прошедшее время * скорость. Кадр, который к моменту чтения уже опоздал,
+    пропускается через grab() без retrieve() — он не декодируется в
+    изображение. Так же пропускаются кадры, которые потребитель (анализ) все
+    равно не успеет забрать: шаг декодирования подстраивается под измеренный
+    интервал между его чтениями. Если потребитель отстал, из готовых кадров
+    отдается самый свежий, остальные считаются пропущенными.
+
+    Пауза останавливает часы, перемотка сбрасывает очередь (кадры старой
+    позиции отбрасываются по номеру поколения) и привязывает часы к первому
+    кадру новой позиции. Элементы очереди — (поколение, pts, кадр), конец
+    файла — (поколение, None, None).
+    """
+
+    def __init__(self, cap, settings=None, metrics=None):
+        self.logger = AppLogger.get_logger()
+        self.settings = {**Config.PLAYBACK_SETTINGS, **(settings or {})}
+        self.cap = cap
+        self.metrics = metrics
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if 0 < fps <= 240 else 25.0
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        self.duration = frame_count / self.fps if frame_count > 0 else None
+        self.late_tolerance = self.settings['late_frames'] / self.fps
+
+        self._queue = queue.Queue(maxsize=self.settings['queue_size'])
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._seek_to = None
+        self._pending = None
+        self._rebase = True  # Часы привязываются к первому отданному кадру
+        self._clock_pts = 0.0
+        self._clock_anchor = time.monotonic()
+        self._frame_no = 0
+        self._skipped = 0   # Пропущено потоком декодирования (grab без retrieve)
+        self._dropped = 0   # Декодировано, но вытеснено более свежим кадром
+        self._reported = 0
+        self._consume_interval = 0.0  # Сглаженный интервал между отданными кадрами, сек
+        self._last_return = None
+        self.speed = 1.0
+        self.paused = False
+        self.finished = False
+        self.last_pts = 0.0
+
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._decode_loop, name="FilePlayback", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    # Часы воспроизведения
+
+    def position(self):
+        """Текущая позиция часов в секундах от начала файла"""
+        with self._lock:
+            return self._position()
+
+    def _position(self):
+        if self.paused or self._rebase:
+            return self._clock_pts
+        return self._clock_pts + (time.monotonic() - self._clock_anchor) * self.speed
+
+    def _set_clock(self, pts):
+        self._clock_pts = pts
+        self._clock_anchor = time.monotonic()
+
+    def pause(self):
+        with self._lock:
+            if not self.paused:
+                self._set_clock(self._position())
+                self.paused = True
+                self._last_return = None
+
+    def resume(self):
+        with self._lock:
+            if self.paused:
+                self._set_clock(self._clock_pts)
+                self.paused = False
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+        return self.paused
+
+    def set_speed(self, speed):
+        if speed <= 0:
+            raise ValueError("Скорость воспроизведения должна быть больше нуля")
+        with self._lock:
+            self._set_clock(self._position())
+            self.speed = speed
+
+    def seek(self, seconds):
+        """Перемотка на позицию в секундах; на паузе будет показан кадр новой позиции"""
+        seconds = max(0.0, seconds)
+        if self.duration:
+            seconds = min(seconds, max(0.0, self.duration - 1.0 / self.fps))
+        with self._lock:
+            self._generation += 1
+            self._seek_to = seconds
+            self._pending = None
+            self._rebase = True
+            self._set_clock(seconds)
+            self._last_return = None
+            self.finished = False
+        # Освобождает место в очереди, если поток декодирования ждет в put()
+        self._drain()
+
+    def _drain(self):
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    # Потребитель
+
+    def next_frame(self):
+        """(кадр, pts), если подошло время очередного кадра, иначе None.
+
+        Конец файла — None и finished = True.
+        """
+        while True:
+            item = self._take()
+            if item is None:
+                return None
+            generation, pts, frame = item
+            with self._lock:
+                if generation != self._generation:
+                    continue
+                if pts is None:
+                    self.finished = True
+                    return None
+                if self._rebase:
+                    self._rebase = False
+                    self._set_clock(pts)
+                    self.last_pts = pts
+                    return frame, pts
+                position = self._position()
+            if pts > position:
+                self._pending = item
+                return None
+            # Следующий кадр тоже пора показывать — текущий уже устарел
+            following = self._take()
+            self._pending = following
+            if (following is not None and following[0] == generation
+                    and following[1] is not None and following[1] <= position):
+                self._dropped += 1
+                continue
+            self.last_pts = pts
+            self._track_interval()
+            return frame, pts
+
+    def _track_interval(self):
+        now = time.monotonic()
+        if self._last_return is not None:
+            interval = now - self._last_return
+            self._consume_interval = (interval if not self._consume_interval
+                                      else 0.8 * self._consume_interval + 0.2 * interval)
+        self._last_return = now
+
+    def _take(self):
+        if self._pending is not None:
+            item, self._pending = self._pending, None
+            return item
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def delay(self):
+        """Секунд до времени следующего кадра (для таймера потребителя)"""
+        poll = self.settings['poll_interval']
+        item = self._pending
+        if self.paused or item is None or item[1] is None:
+            return poll
+        with self._lock:
+            if self._rebase:
+                return 0.0
+            return max(0.0, (item[1] - self._position()) / self.speed)
+
+    def take_dropped(self):
+        """Число пропущенных кадров с прошлого вызова"""
+        total = self._skipped + self._dropped
+        dropped, self._reported = total - self._reported, total
+        return dropped
+
+    # Поток декодирования
+
+    def _decode_loop(self):
+        cap = self.cap
+        skipped_in_row = 0
+        last_queued = float('-inf')
+        try:
+            while self._running:
+                with self._lock:
+                    generation = self._generation
+                    seek_to, self._seek_to = self._seek_to, None
+                if seek_to is not None:
+                    cap.set(cv2.CAP_PROP_POS_MSEC, seek_to * 1000.0)
+                    self._frame_no = int(round(seek_to * self.fps))
+                    skipped_in_row = 0
+                    last_queued = float('-inf')
+
+                if not cap.grab():
+                    self._put((generation, None, None))
+                    # Ждем перемотки назад или остановки
+                    while self._running and self._seek_to is None:
+                        time.sleep(self.settings['poll_interval'])
+                    continue
+                pts_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+                pts = pts_msec / 1000.0 if pts_msec > 0 else self._frame_no / self.fps
+                self._frame_no += 1
+
+                frame_time = 1.0 / self.fps
+                with self._lock:
+                    late = not self._rebase and pts < self._position() - self.late_tolerance
+                    # Медиавремя между чтениями потребителя: кадры чаще этого шага он не заберет
+                    step = self._consume_interval * self.speed
+                thin = step > 1.5 * frame_time and pts < last_queued + step - 0.5 * frame_time
+                if (late or thin) and skipped_in_row < self.settings['max_skip']:
+                    # Опоздавший или лишний кадр не декодируется в изображение
+                    skipped_in_row += 1
+                    self._skipped += 1
+                    continue
+                skipped_in_row = 0
+
+                started = time.perf_counter()
+                ret, frame = cap.retrieve()
+                if self.metrics is not None:
+                    self.metrics.record('capture', time.perf_counter() - started)
+                if ret and frame is not None:
+                    last_queued = pts
+                    self._put((generation, pts, frame))
+        except Exception as e:
+            self.logger.error(f"Ошибка декодирования видеофайла: {str(e)}", exc_info=True)
+            self._put((self._generation, None, None))
+
+    def _put(self, item):
+        """Ставит элемент в очередь, пока не сменилось поколение (перемотка) и поток работает"""
+        while self._running and item[0] == self._generation:
+            try:
+                self._queue.put(item, timeout=self.settings['poll_interval'])
+                return
+            except queue.Full:
+                continue
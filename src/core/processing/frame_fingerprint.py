@@ -0,0 +1,80 @@
+import hashlib
+import time
+import zlib
+import cv2
+import numpy as np
+from config import Config
+
+
+class FrameFingerprint:
+    """Отпечаток кадра живого источника: повторы и зависание камеры.
+
+    Кадр уменьшается до миниатюры thumb_size (INTER_AREA усредняет шум
+    матрицы) и переводится в оттенки серого. Отпечаток — CRC32 всего кадра
+    в полном разрешении вместе с хэшем миниатюры: изменение даже нескольких
+    пикселей, незаметное в миниатюре, дает новый отпечаток. duplicate —
+    'exact', если отпечаток совпадает с отпечатком последнего
+    проанализированного кадра (на тех же пикселях анализ даст тот же
+    результат), 'near', если миниатюры отличаются по любой ячейке не больше
+    чем на near_threshold уровней яркости и прошло меньше max_reuse_seconds,
+    иначе False. Мелкий или далекий человек может уместиться в пороге
+    миниатюры, поэтому почти совпадающий кадр FrameProcessor переиспользует
+    не дольше одного шага stride.
+
+    Живая матрица не выдает побитово одинаковых кадров, поэтому зависанием
+    считается только серия точных повторов дольше freeze_seconds: update()
+    возвращает событие 'frozen', а при первом изменившемся кадре — 'resumed'.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = {**Config.FREEZE_SETTINGS, **(settings or {})}
+        self.reset()
+
+    def reset(self):
+        self._anchor = None          # Миниатюра последнего проанализированного кадра
+        self._anchor_digest = None
+        self._anchor_time = 0.0
+        self._digest = None          # Отпечаток предыдущего кадра
+        self._digest_since = 0.0     # Время, с которого отпечаток не меняется
+        self.duplicate = False       # False | 'exact' | 'near'
+        self.frozen = False
+
+    @property
+    def frozen_for(self):
+        """Секунд без изменений изображения (для сообщения о зависании)"""
+        return time.monotonic() - self._digest_since if self.frozen else 0.0
+
+    def update(self, frame, now=None):
+        """Отпечаток очередного кадра; возвращает 'frozen', 'resumed' или None.
+
+        После вызова duplicate — повторяет ли кадр проанализированный ('exact' / 'near').
+        """
+        now = time.monotonic() if now is None else now
+        thumb = cv2.resize(frame, tuple(self.settings['thumb_size']), interpolation=cv2.INTER_AREA)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        digest = (zlib.crc32(np.ascontiguousarray(frame).data),
+                  hashlib.blake2b(thumb.tobytes(), digest_size=8).digest())
+
+        event = None
+        if digest != self._digest:
+            self._digest = digest
+            self._digest_since = now
+            if self.frozen:
+                self.frozen = False
+                event = 'resumed'
+        elif not self.frozen and now - self._digest_since >= self.settings['freeze_seconds']:
+            self.frozen = True
+            event = 'frozen'
+
+        if digest == self._anchor_digest:
+            self.duplicate = 'exact'
+        elif (self._anchor is not None and now - self._anchor_time < self.settings['max_reuse_seconds']
+              and int(np.abs(thumb.astype(np.int16) - self._anchor).max()) <= self.settings['near_threshold']):
+            self.duplicate = 'near'
+        else:
+            self.duplicate = False
+            self._anchor = thumb.astype(np.int16)
+            self._anchor_digest = digest
+            self._anchor_time = now
+        return event
@@ -1,8 +1,11 @@
 import cv2
 import numpy as np
-from PyQt6.QtGui import QImage
-from core.utils.drawing_utils import draw_landmarks
 from core.utils.logger import AppLogger
+from core.utils.pipeline_metrics import PipelineMetrics
+from core.utils.tracer import TRACER
+from core.detection.inference_profile import DEFAULT_PROFILE
+from core.detection.detection_frame import DetectionFrame
+from core.detection.person_cascade import PersonCascade
 from src.ui.builders.detection_drawer import DetectionDrawer
 
 class FrameProcessor:
@@ -13,6 +16,19 @@ class FrameProcessor:
         self.show_landmarks = False
         self.last_face_results = None
         self.last_pose_results = None
+        self.last_missing_areas = []
+        self.last_detections = None  # DetectionFrame последнего анализа
+        self.last_statuses = []
+        self.last_inferred = False  # Последний process() запускал инференс (а не повторил прошлый результат)
+        self.render = True  # False — только анализ, без копии кадра и отрисовки (headless)
+        self.metrics = PipelineMetrics()
+        self.profile = DEFAULT_PROFILE
+        self.cascade = PersonCascade()
+        self._zone_origin = None  # (размер всего кадра, начало ROI) для рабочих зон
+        self._last_model_type = None
+        self._frame_index = 0
+        self._inferred_index = 0  # Номер последнего кадра с инференсом
+        self._last_status = None
 
     def set_detectors(self, yolo, pose, siz):
         self.detectors = {
@@ -37,30 +53,127 @@ class FrameProcessor:
             self.logger.error(f"Ошибка загрузки модели: {str(e)}")
             return False
 
-    def process(self, frame, model_type=None):
-        frame = frame.copy()
+    def set_profile(self, profile=None):
+        """Профиль инференса камеры (imgsz, conf, шаг кадров, ROI, пороги СИЗ)"""
+        self.profile = profile or DEFAULT_PROFILE
+        self._frame_index = 0
+        self._inferred_index = 0
+        self._last_status = None
+        self.last_missing_areas = []
+
+    def process(self, frame, model_type=None, duplicate=False):
+        """duplicate — кадр повторяет проанализированный (InputHandler): результат переиспользуется.
+
+        Точный повтор ('exact') переиспользуется всегда, почти совпадающий
+        кадр ('near') — не дольше одного шага stride после последнего
+        инференса, чтобы не пропустить изменение в пределах порога миниатюры.
+        """
+        with TRACER.span('frame'):
+            profile = self.profile
+            self._frame_index += 1
+            self.last_inferred = False
+            near = duplicate == 'near' and self._frame_index - self._inferred_index <= max(profile.stride or 1, 1)
+            if self._last_status is not None and (
+                    duplicate == 'exact' or near or (profile.stride and self._frame_index % profile.stride)):
+                return self._reuse_last(frame)
+            self.last_inferred = True
+            self._inferred_index = self._frame_index
+
+            if self.detectors.get('siz') is not None:
+                self.detectors['siz'].set_overrides(profile.siz_params)
+            roi = profile.roi_pixels(frame.shape)
+            # Зоны заданы в долях всего кадра, а анализ идет в координатах ROI
+            self._zone_origin = (frame.shape, roi[:2] if roi is not None else (0, 0))
+            if roi is None:
+                result = self._process(frame, model_type)
+            else:
+                result = self._process_roi(frame, model_type, roi)
+            self._last_status = result[1]
+            self._last_model_type = model_type
+            if self.render and profile.zones:
+                self._draw_zones(result[0])
+            return result
+
+    def _reuse_last(self, frame):
+        """Кадр между шагами анализа или повтор: результат предыдущего анализа без инференса"""
+        if self.render:
+            with self.metrics.stage('drawing'):
+                frame = frame.copy()
+                roi = self.profile.roi_pixels(frame.shape)
+                if self.last_detections is not None:
+                    self._draw_detections(frame, roi, self.last_detections, self.last_statuses, self._last_model_type)
+                frame = self.drawer.draw_missing_siz(frame, self.last_missing_areas)
+                if roi is not None:
+                    self._draw_roi(frame, roi)
+                if self.profile.zones:
+                    self._draw_zones(frame)
+        return frame, self._last_status
+
+    def _process_roi(self, frame, model_type, roi):
+        """Анализ только области ROI; координаты нарушений возвращаются в системе всего кадра"""
+        x1, y1, x2, y2 = roi
+        region, status = self._process(frame[y1:y2, x1:x2], model_type)
+        self.last_missing_areas = [
+            ((ax1 + x1, ay1 + y1, ax2 + x1, ay2 + y1), siz_type)
+            for (ax1, ay1, ax2, ay2), siz_type in self.last_missing_areas
+        ]
+        if self.render:
+            with self.metrics.stage('drawing'):
+                frame = frame.copy()
+                frame[y1:y2, x1:x2] = region
+                self._draw_roi(frame, roi)
+        return frame, status
+
+    @staticmethod
+    def _draw_roi(frame, roi):
+        x1, y1, x2, y2 = roi
+        cv2.rectangle(frame, (x1, y1), (x2 - 1, y2 - 1), (255, 200, 0), 1)
+
+    def _draw_zones(self, frame):
+        polygons = [polygon.astype(np.int32) for polygon in self.profile.zones.polygons(frame.shape)]
+        cv2.polylines(frame, polygons, True, (0, 200, 255), 1)
+
+    def _process(self, frame, model_type):
+        metrics = self.metrics
+        if self.render:
+            with metrics.stage('preprocess'):
+                frame = frame.copy()
         status = None
         missing_areas = []
+        self.last_missing_areas = []
+        self.last_detections = None
+        self.last_statuses = []
         
         try:
             # Инициализация результатов
             pose_results = None
             
             if self.detectors.get('pose') is not None:
-                pose_results = self.detectors['pose'].detect(frame)
+                with metrics.stage('pose'):
+                    pose_results = self.detectors['pose'].detect(frame)
                 if pose_results is not None and hasattr(pose_results, 'pose_landmarks'):
                     pose_results = pose_results if pose_results.pose_landmarks else None
 
-            # YOLO детекция
-            boxes = None
-            if model_type and self.detectors.get('yolo') is not None:
-                _, boxes = self.detectors['yolo'].detect(frame, model_type)
+            # Тензоры детекторов переносятся в массивы один раз за кадр
+            detections = DetectionFrame.from_results(None, pose_results, frame.shape)
+            self.last_detections = detections
+            checked = self._apply_zones(detections)
 
-            # Безопасная проверка boxes
-            boxes_valid = boxes is not None and hasattr(boxes, 'xyxy') and len(boxes.xyxy) > 0
+            # YOLO детекция: по всему кадру или, в режиме каскада, по вырезкам найденных людей.
+            # Если зоны заданы, а в них никого нет, СИЗ не ищутся
+            yolo = self.detectors.get('yolo') if model_type else None
+            if yolo is not None and checked:
+                with metrics.stage('detection'):
+                    if self.profile.use_cascade:
+                        if detections.people:
+                            self.cascade.detect(yolo, frame, model_type, detections, self.profile)
+                    else:
+                        _, boxes = yolo.detect(frame, model_type, plot=False, profile=self.profile)
+                        detections.set_boxes(boxes)
             
-            if boxes_valid:
-                status = self._check_compliance(boxes, pose_results, frame.shape, model_type)
+            if len(detections):
+                with metrics.stage('compliance'):
+                    status = self._check_compliance(detections, frame.shape, model_type)
                 if isinstance(status, tuple) and len(status) >= 3:
                     statuses = status[0]
                     people_count = status[1]
@@ -71,30 +184,77 @@ class FrameProcessor:
                     people_count = 0
                     detected_siz = {}
                     
-                frame = self.drawer.draw_detections(frame, boxes, statuses, model_type, pose_results, missing_areas)
+                self.last_missing_areas = missing_areas
+                self.last_statuses = statuses
+                if self.render:
+                    with metrics.stage('drawing'):
+                        frame = self.drawer.draw_detections(frame, detections, statuses, model_type, missing_areas)
                 return frame, (statuses, people_count, detected_siz)
             else:
                 # Если нет боксов, но есть люди, рисуем отсутствующие СИЗ
-                if pose_results is not None and hasattr(pose_results, 'keypoints'):
+                if detections.people:
                     class_names = self.detectors['yolo'].class_names.get(model_type, []) if model_type else []
-                    required_siz = {siz_type: len(pose_results.keypoints.xy) 
-                                for siz_type in ['glasses', 'glove', 'helmet', 'vest', 'pants']}
-                    missing_areas = self.detectors['siz'].get_missing_siz_areas(
-                        pose_results, frame.shape, {}, required_siz, class_names
-                    )
-                    frame = self.drawer.draw_missing_siz(frame, missing_areas)
-                    return frame, ([], len(pose_results.keypoints.xy), {})
+                    siz_types = self.profile.siz_types
+                    required_siz = {siz_type: len(detections.people_requiring(siz_type)) for siz_type in siz_types}
+                    with metrics.stage('compliance'):
+                        missing_areas = self.detectors['siz'].get_missing_siz_areas(
+                            detections, frame.shape, {}, required_siz, class_names, siz_types
+                        )
+                    self.last_missing_areas = missing_areas
+                    if self.render:
+                        with metrics.stage('drawing'):
+                            frame = self.drawer.draw_missing_siz(frame, missing_areas)
+                    return frame, ([], detections.people, {})
                 return frame, ([], 0, {})
 
             # Отрисовка лэндмарков
-            if self.show_landmarks and pose_results is not None:
-                frame = self.drawer.draw_landmarks(frame, pose_results)
+            if self.show_landmarks and detections.people:
+                frame = self.drawer.draw_landmarks(frame, detections)
 
         except Exception as e:
             self.logger.error(f"Frame processing error: {str(e)}", exc_info=True)
             return frame, ([], 0, {})
 
-    def _check_compliance(self, boxes, pose_results, frame_shape, model_type):
+    def _apply_zones(self, detections):
+        """Отмечает обязательные СИЗ людей по рабочим зонам; False — зоны заданы, но в них никого нет"""
+        zones = self.profile.zones
+        if not zones:
+            return True
+        frame_shape, offset = self._zone_origin or (detections.shape, (0, 0))
+        detections.set_required(zones.required(detections, frame_shape, self.profile.siz_types, offset),
+                                self.profile.siz_types)
+        return bool(detections.active.any())
+
+    def replay(self, frame, record, model_type=None):
+        """Результат анализа из кэша детекций: отрисовка без инференса.
+
+        Боксы и позы в record — в координатах области ROI профиля (как их
+        вернули детекторы), отсутствующие СИЗ — в координатах всего кадра.
+        """
+        self.last_missing_areas = list(record.missing_areas)
+        self.last_inferred = False
+        status = record.status
+        self._last_status = status
+        if self.render:
+            with self.metrics.stage('drawing'):
+                frame = frame.copy()
+                roi = self.profile.roi_pixels(frame.shape)
+                self._draw_detections(frame, roi, record.detection_frame(), status[0], model_type)
+                frame = self.drawer.draw_missing_siz(frame, self.last_missing_areas)
+                if roi is not None:
+                    self._draw_roi(frame, roi)
+                if self.profile.zones:
+                    self._draw_zones(frame)
+        return frame, status
+
+    def _draw_detections(self, frame, roi, detections, statuses, model_type):
+        """Боксы СИЗ прошлого анализа (в координатах ROI) поверх кадра"""
+        if not len(detections):
+            return
+        x1, y1, x2, y2 = roi if roi is not None else (0, 0, frame.shape[1], frame.shape[0])
+        frame[y1:y2, x1:x2] = self.drawer.draw_detections(frame[y1:y2, x1:x2].copy(), detections, statuses, model_type)
+
+    def _check_compliance(self, detections, frame_shape, model_type):
         if 'siz' not in self.detectors or self.detectors['siz'] is None:
             self.logger.warning("SIZ detector not initialized")
             return [], 0, {}
@@ -104,19 +264,22 @@ class FrameProcessor:
             if not class_names:
                 self.logger.warning(f"No class names found for model type: {model_type}")
             
+            # Проверяются только обязательные на камере СИЗ
+            siz_types = self.profile.siz_types
             statuses, people_count, detected_siz = self.detectors['siz'].check_items(
-                boxes, pose_results, frame_shape, class_names
+                detections, frame_shape, class_names, siz_types
             )
             
             # Определяем требуемые СИЗ
             required_siz = {}
             for class_name in class_names:
-                if any(siz_type in class_name.lower() for siz_type in ['glasses', 'glove', 'helmet', 'pants', 'vest']):
-                    required_siz[class_name] = people_count
+                siz_type = next((siz_type for siz_type in siz_types if siz_type in class_name.lower()), None)
+                if siz_type is not None:
+                    required_siz[class_name] = len(detections.people_requiring(siz_type))
                     
             # Получаем области отсутствующих СИЗ с передачей class_names
             missing_areas = self.detectors['siz'].get_missing_siz_areas(
-                pose_results, frame_shape, detected_siz, required_siz, class_names
+                detections, frame_shape, detected_siz, required_siz, class_names, siz_types
             )
             
             self.logger.debug(f"Compliance check result: {statuses}, people: {people_count}, detected: {detected_siz}")
@@ -130,7 +293,20 @@ class FrameProcessor:
             self.logger.error(f"Compliance check error: {str(e)}")
             return [], 0, {}, []
 
+    def set_metrics(self, metrics):
+        """Общий накопитель замеров (VideoProcessor/HeadlessService)"""
+        self.metrics = metrics
+
+    def draw_overlay(self, frame):
+        """Оверлей FPS и задержек этапов в левом верхнем углу кадра"""
+        for i, line in enumerate(self.metrics.overlay_lines()):
+            y = 20 + i * 18
+            cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3)
+            cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+        return frame
+
     def convert_to_qimage(self, frame):
+        from PyQt6.QtGui import QImage  # Qt нужен только GUI, headless-режим его не импортирует
         rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         h, w, ch = rgb_image.shape
         bytes_per_line = ch * w
@@ -0,0 +1,327 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from config import Config
+from core.utils.logger import AppLogger
+from core.utils.pipeline_metrics import PipelineMetrics
+from core.utils import metrics_registry
+from core.detection.yolo_detector import YOLODetector
+from core.detection.pose_detection import PoseDetector
+from core.detection.siz_detection import SIZDetector
+from core.models.model_registry import ModelRegistry
+from core.storage.database import Database
+from core.storage.violation_store import ViolationStore
+from core.storage.clip_recorder import ClipRecorder
+from core.storage.snapshot_store import SnapshotStore
+from .input_handler import InputHandler
+from .frame_processor import FrameProcessor
+from .worker_supervisor import WorkerSupervisor
+
+RTSP_SOURCE_TYPE = 2  # Индекс типа источника в InputValidator
+
+
+class CameraStream(threading.Thread):
+    """Поток одной камеры: чтение кадров, анализ и запись нарушений в журнал.
+
+    Модели общие для всех потоков, инференс выполняется под общей блокировкой;
+    на поток приходится только захват с буфером в 1 кадр и FrameProcessor без
+    отрисовки.
+    """
+
+    def __init__(self, service, name, url, model_name, profile=None):
+        super().__init__(name=f"Camera-{name}", daemon=True)
+        self.logger = AppLogger.get_logger()
+        self.service = service
+        self.camera_name = name
+        self.url = url
+        self.model_name = model_name
+        self.input_handler = InputHandler()
+        self.frame_processor = FrameProcessor()
+        self.frame_processor.render = False
+        self.frame_processor.set_detectors(*service.detectors)
+        self.frame_processor.set_profile(profile)
+        self.metrics = PipelineMetrics(window=Config.METRICS_SETTINGS['window'])
+        self.metrics.export_to(name)
+        self.frame_processor.set_metrics(self.metrics)
+        self.connected_once = False
+        self.frames = 0
+
+    def _on_health_event(self, event):
+        if event == 'frozen':
+            self.logger.warning(f"Камера {self.camera_name} зависла: изображение не меняется "
+                                f"{self.input_handler.fingerprint.frozen_for:.0f} сек")
+            self.service.violation_store.close_camera(self.camera_name)
+            if self.service.clip_recorder:
+                self.service.clip_recorder.flush_camera(self.camera_name)
+        else:
+            self.logger.info(f"Камера {self.camera_name}: изображение снова меняется")
+        metrics_registry.record_freeze(self.camera_name, event == 'frozen')
+
+    def _record(self, frame, status, reused):
+        """Журнал нарушений, клипы, снимки и метрики проанализированного кадра"""
+        missing_areas = self.frame_processor.last_missing_areas
+        timestamp = time.time()
+        clip_recorder = self.service.clip_recorder
+        if clip_recorder:
+            clip_recorder.push(self.camera_name, frame, timestamp)
+        opened = self.service.violation_store.record(self.camera_name, self.model_name, missing_areas, timestamp)
+        if opened and clip_recorder:
+            clip_recorder.trigger(self.camera_name, opened)
+        snapshot_store = self.service.snapshot_store
+        if snapshot_store and missing_areas:
+            seen = [episode for episode in self.service.violation_store.active_episodes(self.camera_name)
+                    if episode.last_seen == timestamp]
+            # Отрисовка только для сохраняемых снимков и в потоке записи
+            drawer = self.frame_processor.drawer
+            snapshot_store.submit(self.camera_name, frame, seen, timestamp,
+                                  render=lambda f, areas=missing_areas: drawer.draw_missing_siz(f.copy(), areas))
+        metrics_registry.record_frame(self.camera_name, status[1] if status else 0, missing_areas, opened,
+                                      reused=reused)
+
+    def run(self):
+        settings = Config.HEADLESS_SETTINGS
+        min_interval = 1.0 / settings['max_fps'] if settings['max_fps'] else 0.0
+        stop_event = self.service.stop_event
+
+        while not stop_event.is_set():
+            if not self.input_handler.is_ready():
+                success, error_msg = self.input_handler.setup_source(self.url, RTSP_SOURCE_TYPE)
+                if not success:
+                    self.logger.warning(f"Камера {self.camera_name} недоступна: {error_msg}")
+                    stop_event.wait(settings['reconnect_delay'])
+                    continue
+                self.logger.info(f"Камера {self.camera_name} подключена")
+                if self.connected_once:
+                    metrics_registry.RECONNECTS.labels(self.camera_name).inc()
+                self.connected_once = True
+
+            started = time.monotonic()
+            with self.metrics.stage('capture'):
+                _, frame = self.input_handler.read_frame()
+            if frame is None:
+                self.logger.warning(f"Камера {self.camera_name}: поток прерван, переподключение")
+                self.input_handler.release()
+                self.service.violation_store.close_camera(self.camera_name)
+                stop_event.wait(settings['reconnect_delay'])
+                continue
+
+            event = self.input_handler.health_event
+            if event:
+                self._on_health_event(event)
+            duplicate = self.input_handler.duplicate
+
+            try:
+                with self.service.inference_lock:
+                    _, status = self.frame_processor.process(frame, self.model_name, duplicate)
+                reused = duplicate and not self.frame_processor.last_inferred
+                if self.input_handler.frozen:
+                    # Повтор зависшего кадра — не данные: без журнала, клипов и снимков
+                    metrics_registry.record_frame(self.camera_name, 0, (), reused=reused)
+                else:
+                    self._record(frame, status, reused)
+                self.frames += 1
+                self.metrics.frame_done()
+            except Exception as e:
+                self.logger.error(f"Камера {self.camera_name}: ошибка обработки кадра: {str(e)}", exc_info=True)
+
+            remaining = min_interval - (time.monotonic() - started)
+            if remaining > 0:
+                stop_event.wait(remaining)
+
+        self.input_handler.release()
+        self.service.violation_store.close_camera(self.camera_name)
+        if self.service.clip_recorder:
+            self.service.clip_recorder.flush_camera(self.camera_name)
+        self.logger.info(f"Камера {self.camera_name} остановлена, обработано кадров: {self.frames}")
+
+
+class HeadlessService:
+    """Анализ камер из ppe.db без PyQt: InputHandler → FrameProcessor → SIZDetector → журнал нарушений"""
+
+    def __init__(self, storage_path: str = None, camera_names=None, metrics_path: str = None,
+                 prometheus_settings=None, mode: str = None):
+        self.logger = AppLogger.get_logger()
+        self.mode = mode or Config.HEADLESS_SETTINGS['mode']
+        self.metrics_path = metrics_path or Config.METRICS_SETTINGS['export_path']
+        self.prometheus_settings = dict(Config.PROMETHEUS_SETTINGS, **(prometheus_settings or {}))
+        self.db = Database.get(storage_path)
+        self.camera_names = camera_names
+        self.stop_event = threading.Event()
+        self.inference_lock = threading.Lock()
+        self.streams = []
+        self.supervisor = None  # WorkerSupervisor в режиме processes
+
+        self.yolo = YOLODetector()
+        self.pose = PoseDetector()
+        self.siz = SIZDetector()
+        self.detectors = (self.yolo, self.pose, self.siz)
+        self.storage_path = storage_path
+        # Хранилища запускают свои потоки записи; создаются в start(), в режиме processes — после fork
+        self.violation_store = None
+        self.clip_recorder = None
+        self.snapshot_store = None
+
+    def _create_stores(self, cameras):
+        self.violation_store = ViolationStore(self.storage_path)
+        if Config.CLIP_SETTINGS['enabled']:
+            self.clip_recorder = ClipRecorder(self.storage_path)
+            for name in cameras:
+                self.clip_recorder.set_record_url(name, cameras[name]['record_url'])
+        if Config.SNAPSHOT_SETTINGS['enabled']:
+            self.snapshot_store = SnapshotStore(self.storage_path)
+
+    def start(self):
+        cameras = self.db.registry.cameras()
+        if self.camera_names:
+            missing = set(self.camera_names) - set(cameras)
+            for name in sorted(missing):
+                self.logger.warning(f"Камера {name} не найдена в БД")
+            cameras = {name: camera for name, camera in cameras.items() if name in self.camera_names}
+
+        if not cameras:
+            self.logger.error("Нет камер для обработки")
+            return False
+
+        if self.mode == 'processes':
+            return self._start_processes(cameras)
+
+        self.pose.load()
+        self._create_stores(cameras)
+        registry = ModelRegistry.instance()
+        for name, camera in cameras.items():
+            model_name = camera['model']
+            model_info = registry.get_model_info(model_name)
+            if model_info is None or not self.yolo.load_model(model_name, model_info):
+                self.logger.error(f"Камера {name}: модель {model_name} недоступна, камера пропущена")
+                continue
+            self.streams.append(CameraStream(self, name, camera['url'], model_name, camera['profile']))
+
+        metrics_registry.MetricsRegistry.instance().start_exporters(self.prometheus_settings)
+        for stream in self.streams:
+            stream.start()
+        self.logger.info(f"Headless-режим: запущено потоков {len(self.streams)}")
+        return bool(self.streams)
+
+    def _start_processes(self, cameras):
+        """Режим processes: модели загружает каждый процесс камеры, а при fork — один раз родитель.
+
+        Процессы камер порождаются до запуска потоков хранилищ, экспортеров
+        и супервизора: fork копирует только вызывающий поток, и блокировки,
+        захваченные другими потоками в момент fork, остались бы в процессе
+        камеры захваченными навсегда.
+        """
+        registry = ModelRegistry.instance()
+        workers = []
+        for name, camera in cameras.items():
+            model_info = registry.get_model_info(camera['model'])
+            if model_info is None:
+                self.logger.error(f"Камера {name}: модель {camera['model']} недоступна, камера пропущена")
+                continue
+            workers.append({'name': name, 'url': camera['url'], 'model': camera['model'],
+                            'model_info': model_info, 'profile': camera['profile']})
+        if not workers:
+            return False
+
+        settings = Config.HEADLESS_SETTINGS
+        detectors = None
+        if settings['start_method'] == 'fork' and settings['share_models']:
+            detectors = self._preload_shared_models(workers)
+            if not workers:
+                return False
+
+        self.supervisor = WorkerSupervisor(self, workers, detectors)
+        self.supervisor.spawn_workers()
+        self._create_stores({name: cameras[name] for name in self.supervisor.workers})
+        metrics_registry.MetricsRegistry.instance().start_exporters(self.prometheus_settings)
+        self.supervisor.start()
+        self.logger.info(f"Headless-режим: запущено процессов камер {len(workers)}")
+        return True
+
+    def _preload_shared_models(self, workers):
+        """Загрузка моделей в родителе для наследования процессами при fork.
+
+        Прогрев не выполняется: первый инференс (и инициализация CUDA, которую
+        нельзя наследовать через fork) происходит уже в процессе камеры. Слои
+        сливаются (Conv+BN) здесь же на CPU: иначе первый predict в каждом
+        процессе сливает их сам, записывает в веса и получает их частную копию.
+        """
+        self.pose.load()
+        self._fuse_for_fork('pose', self.pose.model)
+        loaded = set()
+        for worker in list(workers):
+            if worker['model'] in loaded:
+                continue
+            if not self.yolo.load_model(worker['model'], worker['model_info'], warmup=False):
+                self.logger.error(f"Камера {worker['name']}: модель {worker['model']} не загружена, камера пропущена")
+                workers.remove(worker)
+                continue
+            self._fuse_for_fork(worker['model'], self.yolo.model(worker['model']))
+            loaded.add(worker['model'])
+        self.logger.info(f"Модели загружены для общих процессов камер: {sorted(loaded)}")
+        return self.detectors
+
+    def _fuse_for_fork(self, model_type, model):
+        """Слияние слоев модели ultralytics без обращения к CUDA; повторно AutoBackend их не трогает"""
+        try:
+            model.model.fuse(verbose=False)
+        except Exception as e:
+            self.logger.warning(f"Слияние слоев модели {model_type} до fork не удалось: {str(e)}")
+
+    def run_forever(self):
+        """Блокирует до stop() (например, по SIGTERM), периодически выгружая метрики"""
+        last_export = time.monotonic()
+        while not self.stop_event.wait(1.0):
+            if self.streams and not any(stream.is_alive() for stream in self.streams):
+                break
+            if self.supervisor and not self.supervisor.is_alive():
+                break
+            if time.monotonic() - last_export >= Config.METRICS_SETTINGS['export_interval']:
+                last_export = time.monotonic()
+                self.export_metrics()
+        self.shutdown()
+
+    def metrics_snapshot(self):
+        snapshot = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'cameras': (self.supervisor.metrics_snapshot() if self.supervisor else
+                        {stream.camera_name: stream.metrics.snapshot() for stream in self.streams})
+        }
+        if self.supervisor:
+            snapshot['memory'] = self.supervisor.memory_report()
+        return snapshot
+
+    def export_metrics(self):
+        """Атомарно перезаписывает JSON со сводкой метрик по камерам"""
+        try:
+            os.makedirs(os.path.dirname(self.metrics_path) or '.', exist_ok=True)
+            tmp_path = self.metrics_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.metrics_snapshot(), f, ensure_ascii=False)
+            os.replace(tmp_path, self.metrics_path)
+        except Exception as e:
+            self.logger.error(f"Ошибка выгрузки метрик: {str(e)}")
+
+    def stop(self):
+        self.stop_event.set()
+
+    def shutdown(self):
+        self.stop_event.set()
+        timeout = Config.HEADLESS_SETTINGS['join_timeout']
+        for stream in self.streams:
+            stream.join(timeout=timeout)
+            if stream.is_alive():
+                self.logger.warning(f"Поток {stream.name} не завершился за {timeout} сек")
+        if self.supervisor:
+            self.supervisor.stop()
+        if self.streams or self.supervisor:
+            self.export_metrics()
+        if self.violation_store:
+            self.violation_store.close()
+        if self.clip_recorder:
+            self.clip_recorder.close()
+        if self.snapshot_store:
+            self.snapshot_store.close()
+        metrics_registry.MetricsRegistry.instance().stop()
+        self.logger.info("Headless-режим остановлен")
@@ -1,8 +1,12 @@
 import os
+import sys
 import time
 import cv2
+from config import Config
 from core.utils.logger import AppLogger
 from core.utils.input_validator import InputValidator, InputType
+from core.utils import metrics_registry
+from .frame_fingerprint import FrameFingerprint
 
 class InputHandler:
     def __init__(self):
@@ -10,9 +14,21 @@ class InputHandler:
         self.cap = None
         self.current_input_type = None
         self.camera_initialized = False
+        self.capture_format = {}  # Согласованный формат камеры (V4L2): fourcc, разрешение, FPS, декодирование
+        # Отпечатки кадров живого источника: повторы не анализируются, долгий повтор — зависание
+        self.fingerprint = FrameFingerprint() if Config.FREEZE_SETTINGS['enabled'] else None
+        self.duplicate = False   # Повтор проанализированного кадра: False | 'exact' | 'near'
+        self.health_event = None  # 'frozen' / 'resumed' после последнего чтения
+        self.frozen = False      # Камера зависла: результаты кадров не являются данными
 
     def setup_source(self, source, selected_source_type):
         """Оптимизированная инициализация видео источника"""
+        success, error_msg = self._setup_source(source, selected_source_type)
+        source_type = self.current_input_type.name.lower() if self.current_input_type else 'unknown'
+        metrics_registry.SOURCE_OPENS.labels(source_type, 'ok' if success else 'error').inc()
+        return success, error_msg
+
+    def _setup_source(self, source, selected_source_type):
         start_time = time.time()
         
         # Проверяем, что для файлового источника путь не пустой
@@ -28,10 +44,18 @@ class InputHandler:
 
         if self.cap:
             self.cap.release()
+        self.capture_format = {}
+        self.duplicate = False
+        self.health_event = None
+        self.frozen = False
+        if self.fingerprint is not None:
+            self.fingerprint.reset()
         
         try:
             if input_type == InputType.CAMERA:
                 camera_index = int(normalized_source)
+                if sys.platform.startswith('linux'):
+                    return self._setup_v4l2_camera(camera_index, start_time)
                 self.cap = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)
                 
                 # Добавляем проверку доступности камеры
@@ -61,6 +85,7 @@ class InputHandler:
                     self.cap.set(cv2.CAP_PROP_READ_TIMEOUT_MSEC, 500)
                     self.cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, 500)
                     
+                    self.current_input_type = input_type
                     self.logger.info(f"RTSP подключен: {rtsp_url}")
                     return True, None
             
@@ -86,6 +111,20 @@ class InputHandler:
             return False, error_msg
 
 
+    def _setup_v4l2_camera(self, camera_index, start_time):
+        from .v4l2_capture import V4L2Capture
+        self.cap = V4L2Capture(camera_index)
+        if not self.cap.isOpened():
+            error_msg = f"Камера с индексом {camera_index} недоступна"
+            self.logger.error(error_msg)
+            self.cap.release()
+            self.cap = None
+            return False, error_msg
+        self.capture_format = self.cap.format
+        self.current_input_type = InputType.CAMERA
+        self.logger.info(f"Камера инициализирована за {(time.time()-start_time):.2f} сек")
+        return True, None
+
     def get_frame(self):
         if not self.is_ready():
             self.logger.warning("Источник не готов")
@@ -107,7 +146,8 @@ class InputHandler:
         return self.current_input_type == InputType.FILE
 
     def release(self):
-        if self.cap and self.cap.isOpened():
+        # V4L2Capture может быть уже закрыт потоком захвата, но устройство все равно освобождается
+        if self.cap and (self.cap.isOpened() or not isinstance(self.cap, cv2.VideoCapture)):
             self.cap.release()
             self.cap = None
             self.logger.info("Ресурсы камеры освобождены")
@@ -119,8 +159,15 @@ class InputHandler:
             
         ret, frame = self.cap.read()
         if not ret:
+            source_type = self.current_input_type.name.lower() if self.current_input_type else 'unknown'
+            metrics_registry.CAPTURE_FAILURES.labels(source_type).inc()
             if self.is_file_source():
                 self.logger.info("Достигнут конец видеофайла")
             return None, None
-            
+
+        # В файле неподвижная сцена — обычное содержимое, отпечатки только для живых источников
+        if self.fingerprint is not None and not self.is_file_source():
+            self.health_event = self.fingerprint.update(frame)
+            self.duplicate = self.fingerprint.duplicate
+            self.frozen = self.fingerprint.frozen
         return ret, frame
\ No newline at end of file
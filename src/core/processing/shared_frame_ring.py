@@ -0,0 +1,97 @@
+from multiprocessing import shared_memory
+import numpy as np
+
+
+class SharedFrameRing:
+    """Кольцевой буфер кадров в multiprocessing.shared_memory (один писатель).
+
+    Блок памяти: заголовок int64 [slots, 4] — (seq, высота, ширина, время в мкс)
+    и слоты фиксированного размера под кадр BGR не больше max_shape.
+    Писатель (процесс камеры) отмечает слот как занятый (seq = -1), копирует
+    кадр и публикует номер; читатель копирует кадр по номеру и сверяет номер
+    после копирования — если слот успели перезаписать, кадр считается
+    потерянным (None), а не возвращается наполовину новым.
+    """
+
+    HEADER_FIELDS = 4
+
+    def __init__(self, shm, slots, max_shape, owner):
+        self.shm = shm
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.owner = owner
+        self.frame_size = int(np.prod(self.max_shape))
+        header_bytes = slots * self.HEADER_FIELDS * 8
+        self.header = np.ndarray((slots, self.HEADER_FIELDS), dtype=np.int64, buffer=shm.buf)
+        self.data = np.ndarray((slots, self.frame_size), dtype=np.uint8, buffer=shm.buf, offset=header_bytes)
+        self._seq = 0
+
+    @classmethod
+    def create(cls, slots, max_shape):
+        size = slots * cls.HEADER_FIELDS * 8 + slots * int(np.prod(max_shape))
+        ring = cls(shared_memory.SharedMemory(create=True, size=size), slots, max_shape, owner=True)
+        ring.header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, slots, max_shape):
+        """Подключение из другого процесса; блок удаляет только создатель"""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            # Процессы multiprocessing наследуют resource_tracker создателя: повторная
+            # регистрация ничего не меняет, а unregister снял бы и запись создателя
+            shm = shared_memory.SharedMemory(name=name)
+        ring = cls(shm, slots, max_shape, owner=False)
+        # Перезапущенный писатель продолжает нумерацию предыдущего
+        ring._seq = max(0, int(ring.header[:, 0].max()))
+        return ring
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def spec(self):
+        """Параметры для attach() в другом процессе"""
+        return self.name, self.slots, self.max_shape
+
+    def write(self, frame, timestamp):
+        """Публикует кадр и возвращает его номер; кадр должен помещаться в max_shape"""
+        h, w = frame.shape[:2]
+        size = frame.size
+        if frame.ndim != 3 or h > self.max_shape[0] or w > self.max_shape[1] or size > self.frame_size:
+            raise ValueError(f"Кадр {frame.shape} не помещается в слот {self.max_shape}")
+
+        self._seq += 1
+        slot = self._seq % self.slots
+        header = self.header[slot]
+        header[0] = -1
+        self.data[slot, :size] = frame.reshape(-1)
+        header[1] = h
+        header[2] = w
+        header[3] = int(timestamp * 1e6)
+        header[0] = self._seq
+        return self._seq
+
+    def read(self, seq):
+        """Копия кадра с номером seq или None, если он уже перезаписан"""
+        slot = seq % self.slots
+        header = self.header[slot]
+        if header[0] != seq:
+            return None
+        h, w = int(header[1]), int(header[2])
+        frame = self.data[slot, :h * w * 3].reshape(h, w, 3).copy()
+        if header[0] != seq:
+            return None
+        return frame
+
+    def close(self):
+        # Представления numpy держат буфер — освобождаем их до закрытия блока
+        self.header = None
+        self.data = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,161 @@
+import threading
+import time
+import cv2
+import numpy as np
+from config import Config
+from core.utils.logger import AppLogger
+
+
+class V4L2Capture:
+    """USB-камера через V4L2 (Linux) с MJPEG и согласованным разрешением.
+
+    Разрешение выбирается как наименьшее из CAMERA_SETTINGS['resolutions'],
+    меньшая сторона которого не меньше размера входа модели. Камера отдает
+    сжатые кадры MJPEG (CAP_PROP_FORMAT = -1), а декодирование через
+    cv2.imdecode (libjpeg-turbo) выполняет поток захвата; если кадр заметно
+    больше нужного, JPEG декодируется сразу в уменьшенном масштабе (1/2, 1/4).
+    Интерфейс совпадает с нужной InputHandler частью cv2.VideoCapture.
+    """
+
+    REDUCED_FLAGS = ((4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+    def __init__(self, index, target_size=None, settings=None):
+        self.logger = AppLogger.get_logger()
+        self.settings = {**Config.CAMERA_SETTINGS, **(settings or {})}
+        self.target_size = target_size or self.settings['target_size']
+        self.index = index
+        self.format = {}
+        self._output_size = None  # (ширина, высота) кадра после декодирования
+        self._decode_flag = cv2.IMREAD_COLOR
+        self._raw = False
+
+        self._lock = threading.Condition()
+        self._frame = None
+        self._frame_id = 0
+        self._read_id = 0
+        self._running = False
+        self._thread = None
+
+        self.cap = cv2.VideoCapture(index, cv2.CAP_V4L2)
+        if self.cap.isOpened():
+            self._negotiate()
+            if self.settings['threaded']:
+                self._running = True
+                self._thread = threading.Thread(target=self._capture_loop, name=f"V4L2-{index}", daemon=True)
+                self._thread.start()
+
+    def _negotiate(self):
+        cap = self.cap
+        # Для V4L2 формат задается до разрешения, иначе драйвер выбирает его сам
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        width, height = self._pick_resolution()
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        cap.set(cv2.CAP_PROP_FPS, self.settings['fps'])
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        fourcc = "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).strip('\x00') or '?'
+        actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        # Сжатые кадры отдаем в imdecode сами — только для MJPEG
+        if fourcc == 'MJPG' and self.settings['decode_in_thread']:
+            self._raw = bool(cap.set(cv2.CAP_PROP_FORMAT, -1))
+        scale = 1
+        if self._raw and self.settings['reduced_decode']:
+            for factor, flag in self.REDUCED_FLAGS:
+                if min(actual_width, actual_height) // factor >= self.target_size:
+                    scale, self._decode_flag = factor, flag
+                    break
+
+        self._output_size = (actual_width // scale, actual_height // scale)
+        self.format = {
+            'backend': 'v4l2',
+            'fourcc': fourcc,
+            'width': actual_width,
+            'height': actual_height,
+            'requested': f"{width}x{height}",
+            'fps': round(cap.get(cv2.CAP_PROP_FPS), 2),
+            'decode': f"imdecode 1/{scale}" if self._raw else 'backend',
+            'output': "x".join(map(str, self._output_size))
+        }
+        self.logger.info(
+            f"V4L2 камера {self.index}: {fourcc} {actual_width}x{actual_height} @ {self.format['fps']} FPS "
+            f"(запрошено {width}x{height}), декодирование: {self.format['decode']}, кадр {self.format['output']}"
+        )
+
+    def _pick_resolution(self):
+        candidates = sorted(self.settings['resolutions'], key=lambda size: size[0] * size[1])
+        for width, height in candidates:
+            if min(width, height) >= self.target_size:
+                return width, height
+        return candidates[-1]
+
+    def _grab_decoded(self):
+        ret, data = self.cap.read()
+        if not ret or data is None:
+            return None
+        if self._raw:
+            return cv2.imdecode(np.asarray(data).reshape(-1), self._decode_flag)
+        return data
+
+    def _capture_loop(self):
+        failures = 0
+        while self._running:
+            frame = self._grab_decoded()
+            if frame is None:
+                failures += 1
+                if failures >= self.settings['max_failures']:
+                    self.logger.error(f"V4L2 камера {self.index}: кадры не поступают")
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+            with self._lock:
+                self._frame = frame
+                self._frame_id += 1
+                self._lock.notify_all()
+        with self._lock:
+            self._running = False
+            self._lock.notify_all()
+
+    def isOpened(self):
+        if self._thread is not None:
+            return self.cap.isOpened() and (self._running or self._frame_id > self._read_id)
+        return self.cap.isOpened()
+
+    def read(self):
+        """Следующий кадр, еще не отданный вызывающему (ждет не дольше read_timeout)"""
+        if self._thread is None:
+            frame = self._grab_decoded()
+            return frame is not None, frame
+        deadline = time.monotonic() + self.settings['read_timeout']
+        with self._lock:
+            while self._frame_id == self._read_id and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False, None
+                self._lock.wait(remaining)
+            if self._frame_id == self._read_id:
+                return False, None
+            self._read_id = self._frame_id
+            return True, self._frame
+
+    def get(self, prop):
+        """Размеры — отдаваемого кадра (с учетом уменьшенного декодирования), остальное — от драйвера"""
+        if prop == cv2.CAP_PROP_FRAME_WIDTH and self._output_size:
+            return self._output_size[0]
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT and self._output_size:
+            return self._output_size[1]
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def release(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.cap.release()
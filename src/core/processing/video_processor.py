@@ -1,11 +1,15 @@
-from collections import deque
 import time
 from PyQt6.QtCore import QObject, QTimer, pyqtSignal, QThread
 import cv2
 import numpy as np
 from core.utils.input_validator import InputType
+from config import Config
 from core.utils.logger import AppLogger
+from core.utils.pipeline_metrics import PipelineMetrics
+from core.utils import metrics_registry
 from .input_handler import InputHandler
+from .file_playback import FilePlayback
+from core.storage.detection_cache import DetectionRecord
 from src.core.processing.frame_processor import FrameProcessor
 from PyQt6.QtGui import QImage
 
@@ -14,24 +18,31 @@ class VideoProcessor(QObject):
     siz_status_changed = pyqtSignal(object)
     input_error = pyqtSignal(str)
     processing_stopped = pyqtSignal()
+    stats_updated = pyqtSignal(str)
+    source_health = pyqtSignal(str)  # Сообщение о зависании камеры и его окончании
     
     def __init__(self):
         super().__init__()
         self.logger = AppLogger.get_logger()
         self.timer = QTimer()
         self.timer.timeout.connect(self._process_frame)
-        self.frame_times = deque(maxlen=30)
-        self.last_frame_time = time.time()
+        self.metrics = PipelineMetrics(window=Config.METRICS_SETTINGS['window'])
+        self.last_stats_time = 0.0
+        self.show_overlay = False
         self.input_handler = InputHandler()
         self.frame_processor = FrameProcessor()
+        self.frame_processor.set_metrics(self.metrics)
         
         self.target_fps = 30
-        self.frame_skip_counter = 0
-        self.video_start_time = 0
-        self.last_video_pts = -1
-        self.frame_drop_threshold = 2
-        self.consecutive_drops = 0
+        self.playback = None  # FilePlayback для файлового источника
         self._alive = True
+        self.violation_store = None
+        self.clip_recorder = None
+        self.snapshot_store = None
+        self.detection_cache = None
+        self.cache_session = None  # DetectionCacheSession текущего файла
+        self.source_path = None
+        self.camera_name = None
 
         self._setup_initial_state()
 
@@ -39,24 +50,57 @@ class VideoProcessor(QObject):
         self.processing_active = False
         self.model_loaded = False
         self.active_model_type = None
+        self.active_model_info = None
         self._alive = True
 
     def set_detectors(self, yolo, pose, siz):
         self.frame_processor.set_detectors(yolo, pose, siz)
 
+    def set_violation_store(self, store):
+        """Подключает журнал нарушений, в который пишутся отсутствующие СИЗ"""
+        self.violation_store = store
+
+    def set_clip_recorder(self, recorder):
+        """Подключает запись видеофрагментов нарушений"""
+        self.clip_recorder = recorder
+
+    def set_snapshot_store(self, store):
+        """Подключает галерею снимков нарушений"""
+        self.snapshot_store = store
+
+    def set_detection_cache(self, cache):
+        """Подключает кэш результатов анализа видеофайлов"""
+        self.detection_cache = cache
+
+    def set_camera_name(self, name):
+        """Имя источника, под которым нарушения попадают в журнал и метрики"""
+        self.camera_name = name
+        self.metrics.export_to(name)
+
+    def set_record_url(self, url):
+        """Основной поток текущей камеры для записи нарушений (анализ идет по субпотоку)"""
+        if self.clip_recorder and self.camera_name:
+            self.clip_recorder.set_record_url(self.camera_name, url)
+
+    def set_profile(self, profile):
+        """Профиль инференса текущей камеры (None — значения по умолчанию)"""
+        self.frame_processor.set_profile(profile)
+
     def set_video_source(self, source, selected_source_type):
         self.stop_processing()
         success, error_msg = self.input_handler.setup_source(source, selected_source_type)
-        
-        if success and self.input_handler.is_file_source():
-            fps = self.input_handler.cap.get(cv2.CAP_PROP_FPS)
-            self.frame_interval = 1000 / fps if fps > 0 else 33
+        self.source_path = source if success and self.input_handler.is_file_source() else None
         return success, error_msg
 
     def load_model(self, model_type, model_info):
         success = self.frame_processor.load_model(model_type, model_info)
         if success:
+            if self.cache_session is not None and model_type != self.active_model_type:
+                # Результаты другой модели в кэш текущего файла не попадают
+                self.cache_session.close()
+                self.cache_session = None
             self.active_model_type = model_type
+            self.active_model_info = model_info
             self.model_loaded = True
         return success
 
@@ -68,8 +112,7 @@ class VideoProcessor(QObject):
             
         if not self.timer.isActive():
             self.processing_active = True
-            self.video_start_time = time.time()
-            self.last_video_pts = -1
+            self.metrics.reset()
             
             if self.input_handler.is_file_source():
                 # Дополнительная проверка для файлового источника
@@ -77,8 +120,18 @@ class VideoProcessor(QObject):
                     self.input_error.emit("Не удалось открыть видеофайл")
                     self.logger.error("Видеофайл не открыт")
                     return
+                # Кадры декодируются наперед в отдельном потоке, таймер взводится до времени следующего кадра
+                self.playback = FilePlayback(self.input_handler.cap, metrics=self.metrics)
+                if self.detection_cache and self.source_path:
+                    self.cache_session = self.detection_cache.open(
+                        self.source_path, self.active_model_type, self.active_model_info,
+                        self.frame_processor.profile, self.playback.fps
+                    )
+                self.playback.start()
+                self.timer.setSingleShot(True)
                 self.timer.start(0)
             else:
+                self.timer.setSingleShot(False)
                 self.timer.start(33)
 
     def stop_processing(self):
@@ -88,8 +141,20 @@ class VideoProcessor(QObject):
         self.processing_active = False
         if self.timer.isActive():
             self.timer.stop()
+        if self.playback is not None:
+            # Поток декодирования читает из cap — останавливается до его освобождения
+            self.playback.stop()
+            self.playback = None
+        if self.cache_session is not None:
+            self.cache_session.close()
+            self.cache_session = None
         
         self.input_handler.release()
+
+        if self.violation_store and self.camera_name:
+            self.violation_store.close_camera(self.camera_name)
+        if self.clip_recorder and self.camera_name:
+            self.clip_recorder.flush_camera(self.camera_name)
         
         if self._alive:
             self.processing_stopped.emit()
@@ -104,46 +169,168 @@ class VideoProcessor(QObject):
             return
             
         try:
-            # Получаем кадр с явной проверкой на None
-            ret, frame = self.input_handler.read_frame()
-            if frame is None:
-                if self.input_handler.is_file_source():
-                    self.stop_processing()
-                return
+            if self.playback is not None:
+                item = self.playback.next_frame()
+                dropped = self.playback.take_dropped()
+                if dropped and self.camera_name:
+                    metrics_registry.FRAMES_DROPPED.labels(self.camera_name).inc(dropped)
+                if item is None:
+                    if self.playback.finished:
+                        self.logger.info("Достигнут конец видеофайла")
+                        self.stop_processing()
+                    return
+                frame, pts = item
+                duplicate = frozen = False
+            else:
+                # Получаем кадр с явной проверкой на None
+                with self.metrics.stage('capture'):
+                    ret, frame = self.input_handler.read_frame()
+                if frame is None:
+                    if self.input_handler.is_file_source():
+                        self.stop_processing()
+                    return
+                duplicate = self.input_handler.duplicate
+                frozen = self.input_handler.frozen
+                if self.input_handler.health_event:
+                    self._on_health_event(self.input_handler.health_event)
 
-            # Для файлов - синхронизация времени
-            if self.input_handler.is_file_source():
-                current_pts = self.input_handler.cap.get(cv2.CAP_PROP_POS_MSEC)
-                real_time = (time.time() - self.video_start_time) * 1000
-                
-                if current_pts < real_time:
-                    skip_frames = int((real_time - current_pts) / self.frame_interval)
-                    skip_frames = min(skip_frames, self.frame_drop_threshold)
-                    
-                    for _ in range(skip_frames):
-                        if self.input_handler.read_frame()[1] is None:
-                            break
-                    self.consecutive_drops += skip_frames
-                else:
-                    self.consecutive_drops = 0
-
-            # Обработка кадра, если не превышен лимит пропусков
-            if self.consecutive_drops < self.frame_drop_threshold:
-                processed_frame, status = self.frame_processor.process(frame, self.active_model_type)
-                
+            session = self.cache_session if self.playback is not None else None
+            frame_index = int(round(pts * self.playback.fps)) if session else None
+            cached = session.lookup(frame_index) if session else None
+            if cached is not None:
+                processed_frame, status = self.frame_processor.replay(frame, cached, self.active_model_type)
+            else:
+                processed_frame, status = self.frame_processor.process(frame, self.active_model_type, duplicate)
+                if session and self.frame_processor.last_inferred:
+                    fp = self.frame_processor
+                    session.store(frame_index, DetectionRecord.from_results(
+                        fp.last_detections, fp.last_statuses, fp.last_missing_areas, status
+                    ))
+            
+            timestamp = time.time()
+            if frozen:
+                # Зависшая камера: результат повторяется, но данными не является —
+                # без журнала и доказательств, статус «нет данных»
                 if processed_frame is not None:
                     self._emit_frame(processed_frame)
-                if status is not None:
-                    self.siz_status_changed.emit(status)
-            else:
-                self.consecutive_drops -= 1
+                self.siz_status_changed.emit(None)
+                if self.camera_name:
+                    metrics_registry.record_frame(self.camera_name, 0, (), reused=not self.frame_processor.last_inferred)
+                self.metrics.frame_done()
+                self._emit_stats()
+                return
+
+            if self.clip_recorder and self.camera_name and processed_frame is not None:
+                # Кадр с разметкой, без оверлея; дальше он не изменяется
+                self.clip_recorder.push(self.camera_name, processed_frame, timestamp)
+
+            if processed_frame is not None:
+                display_frame = processed_frame
+                if self.show_overlay:
+                    # Оверлей рисуется на копии, чтобы не попасть в клип и снимок нарушения
+                    keep_clean = self.clip_recorder or self.snapshot_store
+                    display_frame = self.frame_processor.draw_overlay(
+                        processed_frame.copy() if keep_clean else processed_frame)
+                self._emit_frame(display_frame)
+            if status is not None:
+                self.siz_status_changed.emit(status)
+            opened = []
+            if self.violation_store and self.camera_name:
+                opened = self.violation_store.record(
+                    self.camera_name, self.active_model_type,
+                    self.frame_processor.last_missing_areas, timestamp
+                )
+                if opened and self.clip_recorder:
+                    self.clip_recorder.trigger(self.camera_name, opened)
+                if self.snapshot_store and processed_frame is not None and self.frame_processor.last_missing_areas:
+                    # Эпизоды, наблюдаемые в этом кадре
+                    seen = [episode for episode in self.violation_store.active_episodes(self.camera_name)
+                            if episode.last_seen == timestamp]
+                    self.snapshot_store.submit(self.camera_name, processed_frame, seen, timestamp)
+            if self.camera_name:
+                people_count = status[1] if status else 0
+                metrics_registry.record_frame(
+                    self.camera_name, people_count, self.frame_processor.last_missing_areas, opened,
+                    reused=duplicate and not self.frame_processor.last_inferred
+                )
+            self.metrics.frame_done()
+            self._emit_stats()
                 
         except Exception as e:
             self.logger.error(f"Ошибка обработки кадра: {str(e)}", exc_info=True)
+        finally:
+            if self.playback is not None and self.processing_active:
+                self.timer.start(int(self.playback.delay() * 1000))
+
+    def _on_health_event(self, event):
+        name = self.camera_name or "источник"
+        if event == 'frozen':
+            seconds = self.input_handler.fingerprint.frozen_for
+            message = f"Камера {name} зависла: изображение не меняется {seconds:.0f} сек"
+            self.logger.warning(message)
+        else:
+            message = f"Камера {name}: изображение снова меняется"
+            self.logger.info(message)
+        if self.camera_name:
+            metrics_registry.record_freeze(self.camera_name, event == 'frozen')
+            if event == 'frozen':
+                if self.violation_store:
+                    self.violation_store.close_camera(self.camera_name)
+                if self.clip_recorder:
+                    self.clip_recorder.flush_camera(self.camera_name)
+        self.source_health.emit(message)
+
+    def pause_playback(self, paused=None):
+        """Пауза/продолжение воспроизведения файла; возвращает новое состояние паузы"""
+        if self.playback is None:
+            return False
+        if paused is None:
+            return self.playback.toggle_pause()
+        if paused:
+            self.playback.pause()
+        else:
+            self.playback.resume()
+        return self.playback.paused
+
+    def seek_playback(self, seconds, relative=False):
+        """Перемотка файла на позицию (или на seconds от текущей при relative=True)"""
+        if self.playback is None:
+            return
+        target = self.playback.last_pts + seconds if relative else seconds
+        self.playback.seek(target)
+        if self.violation_store and self.camera_name:
+            # Эпизоды до перемотки не продолжаются кадрами новой позиции
+            self.violation_store.close_camera(self.camera_name)
+        self.logger.info(f"Перемотка видеофайла: {self.playback.position():.1f} сек")
+
+    def step_playback_speed(self, step):
+        """Соседняя скорость из PLAYBACK_SETTINGS['speeds'] (step = +1 быстрее, -1 медленнее)"""
+        if self.playback is None:
+            return None
+        speeds = Config.PLAYBACK_SETTINGS['speeds']
+        current = min(range(len(speeds)), key=lambda i: abs(speeds[i] - self.playback.speed))
+        speed = speeds[max(0, min(len(speeds) - 1, current + step))]
+        self.playback.set_speed(speed)
+        self.logger.info(f"Скорость воспроизведения: {speed:g}x")
+        return speed
 
     def _emit_frame(self, frame):
         if self._alive:
-            self.update_frame.emit(self.frame_processor.convert_to_qimage(frame))
+            with self.metrics.stage('conversion'):
+                image = self.frame_processor.convert_to_qimage(frame)
+            # Получатель в главном потоке вызывается синхронно — это время отображения
+            with self.metrics.stage('display'):
+                self.update_frame.emit(image)
+
+    def _emit_stats(self):
+        now = time.monotonic()
+        if now - self.last_stats_time >= Config.METRICS_SETTINGS['status_interval']:
+            self.last_stats_time = now
+            self.stats_updated.emit(self.metrics.status_text())
+
+    def toggle_overlay(self, state):
+        self.show_overlay = state
+        self.logger.info(f"Overlay visibility: {'ON' if state else 'OFF'}")
 
     def toggle_landmarks(self, state):
         self.frame_processor.toggle_landmarks(state)
\ No newline at end of file
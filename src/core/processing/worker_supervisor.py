@@ -0,0 +1,260 @@
+import gc
+import multiprocessing
+import queue
+import threading
+import time
+import cv2
+from config import Config
+from core.utils.logger import AppLogger
+from core.utils import metrics_registry
+from core.utils.perf_stats import process_memory
+from .camera_worker import camera_worker_main, FATAL_EXIT_CODE
+from .shared_frame_ring import SharedFrameRing
+
+
+class _WorkerSlot:
+    """Процесс одной камеры и состояние его перезапусков"""
+    __slots__ = ('camera', 'ring', 'process', 'restarts', 'started_at', 'restart_at', 'connected_once', 'frames',
+                 'failed')
+
+    def __init__(self, camera, ring):
+        self.camera = camera
+        self.ring = ring
+        self.process = None
+        self.restarts = 0
+        self.started_at = 0.0
+        self.restart_at = None
+        self.connected_once = False
+        self.frames = 0
+        self.failed = False  # Процесс завершился с FATAL_EXIT_CODE и не перезапускается
+
+
+class WorkerSupervisor:
+    """Процесс на камеру: захват и инференс вне GIL основного процесса.
+
+    Кадры передаются через SharedFrameRing, результаты (номер кадра, люди,
+    отсутствующие СИЗ) — через общую очередь. Поток-агрегатор ведет журнал
+    нарушений, клипы и снимки, как CameraStream в режиме потоков. Упавший
+    процесс перезапускается с экспоненциальной паузой, остальные камеры
+    продолжают работать. Процесс с кодом FATAL_EXIT_CODE (ошибка
+    конфигурации) не перезапускается; когда так остановлены все процессы,
+    супервизор завершается.
+
+    detectors — модели, загруженные в родителе: при start_method 'fork'
+    процессы наследуют их без повторной загрузки и копирования весов.
+    fork допустим, только пока в родителе нет других потоков, поэтому
+    spawn_workers() вызывается до запуска хранилищ и start(), а упавшие
+    процессы перезапускаются через чистый forkserver (с предзагруженными
+    модулями, модель процесс загружает сам).
+    """
+
+    FORKSERVER_PRELOAD = ['core.processing.camera_worker', 'ultralytics']
+
+    def __init__(self, service, cameras, detectors=None):
+        self.logger = AppLogger.get_logger()
+        self.service = service
+        self.settings = Config.HEADLESS_SETTINGS
+        self.context = multiprocessing.get_context(self.settings['start_method'])
+        self.restart_context = self.context
+        if self.settings['start_method'] == 'fork':
+            self.restart_context = multiprocessing.get_context('forkserver')
+            self.restart_context.set_forkserver_preload(self.FORKSERVER_PRELOAD)
+        # Очередь и событие из контекста перезапуска: их блокировки передаются и в процессы forkserver
+        self.results = self.restart_context.Queue(maxsize=self.settings['results_queue_size'])
+        self.stop_event = self.restart_context.Event()
+        self.metrics = {}  # camera -> последняя сводка PipelineMetrics из процесса
+        self.detectors = detectors if self.settings['start_method'] == 'fork' else None
+
+        publish_frames = Config.CLIP_SETTINGS['enabled'] or Config.SNAPSHOT_SETTINGS['enabled']
+        max_shape = (self.settings['max_frame_height'], self.settings['max_frame_width'], 3)
+        self.workers = {}
+        for camera in cameras:
+            ring = SharedFrameRing.create(self.settings['ring_slots'], max_shape) if publish_frames else None
+            camera = dict(camera, ring=ring.spec() if ring else None)
+            self.workers[camera['name']] = _WorkerSlot(camera, ring)
+
+        self._drawer = None
+        self._aggregator = threading.Thread(target=self._aggregate_loop, name="WorkerAggregator", daemon=True)
+        self._monitor = threading.Thread(target=self._monitor_loop, name="WorkerSupervisor", daemon=True)
+
+    def spawn_workers(self):
+        """Первый запуск процессов камер; вызывается, пока в родителе нет других потоков"""
+        if self.detectors is not None:
+            # Объекты, созданные до fork, уходят из-под сборщика мусора: его обход
+            # не трогает их заголовки, и общие страницы не копируются в процессах
+            gc.collect()
+            gc.freeze()
+        for slot in self.workers.values():
+            self._spawn(slot, self.context, self.detectors)
+
+    def start(self):
+        """Потоки агрегатора и наблюдения за процессами (после spawn_workers)"""
+        self._aggregator.start()
+        self._monitor.start()
+
+    def is_alive(self):
+        return self._monitor.is_alive()
+
+    def metrics_snapshot(self):
+        return dict(self.metrics)
+
+    def memory_report(self):
+        """Память родителя и процессов камер; uss процесса — его собственный прирост сверх общих страниц"""
+        workers = {}
+        for name, slot in self.workers.items():
+            if slot.process is not None and slot.process.is_alive():
+                workers[name] = process_memory(slot.process.pid)
+        known = [info for info in workers.values() if info]
+        parent = process_memory()
+        return {
+            'shared_models': self.detectors is not None,
+            'parent': parent,
+            'workers': workers,
+            'worker_uss_mb_mean': round(sum(info['uss_mb'] for info in known) / len(known), 1) if known else None,
+            'total_pss_mb': round(sum(info['pss_mb'] for info in known) + (parent or {}).get('pss_mb', 0), 1)
+        }
+
+    def stop(self):
+        self.stop_event.set()
+        timeout = self.settings['join_timeout']
+        for name, slot in self.workers.items():
+            if slot.process is None:
+                continue
+            slot.process.join(timeout=timeout)
+            if slot.process.is_alive():
+                self.logger.warning(f"Процесс камеры {name} не завершился за {timeout} сек, принудительная остановка")
+                slot.process.terminate()
+                slot.process.join(timeout=timeout)
+        self._monitor.join(timeout=timeout)
+        self._aggregator.join(timeout=timeout)  # Дочитывает очередь и завершается
+        for name, slot in self.workers.items():
+            self.service.violation_store.close_camera(name)
+            if self.service.clip_recorder:
+                self.service.clip_recorder.flush_camera(name)
+            if slot.ring is not None:
+                slot.ring.close()
+        self.results.close()
+
+    def _spawn(self, slot, context, detectors=None):
+        name = slot.camera['name']
+        slot.process = context.Process(
+            target=camera_worker_main, args=(slot.camera, self.results, self.stop_event, detectors),
+            name=f"Camera-{name}", daemon=True
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        slot.restart_at = None
+        self.logger.info(f"Процесс камеры {name} запущен (pid {slot.process.pid})")
+
+    def _monitor_loop(self):
+        interval = self.settings['memory_report_interval']
+        next_report = time.monotonic() + min(interval, 30.0)  # Первый отчет — после прогрева процессов
+        while not self.stop_event.wait(1.0):
+            now = time.monotonic()
+            if interval and now >= next_report:
+                next_report = now + interval
+                self._log_memory()
+            for name, slot in self.workers.items():
+                if slot.failed or slot.process.is_alive():
+                    continue
+                if slot.process.exitcode == FATAL_EXIT_CODE:
+                    slot.failed = True
+                    self.logger.error(f"Процесс камеры {name} завершился из-за ошибки конфигурации, "
+                                      f"камера остановлена без перезапуска")
+                    self.service.violation_store.close_camera(name)
+                    continue
+                if slot.restart_at is None:
+                    # Долго проработавший процесс перезапускается без накопленной паузы
+                    if now - slot.started_at >= self.settings['restart_reset_after']:
+                        slot.restarts = 0
+                    delay = min(self.settings['restart_delay'] * (2 ** slot.restarts),
+                                self.settings['max_restart_delay'])
+                    slot.restart_at = now + delay
+                    slot.restarts += 1
+                    self.logger.error(f"Процесс камеры {name} завершился (код {slot.process.exitcode}), "
+                                      f"перезапуск через {delay:.0f} сек")
+                    self.service.violation_store.close_camera(name)
+                    metrics_registry.WORKER_RESTARTS.labels(name).inc()
+                elif now >= slot.restart_at:
+                    self._spawn(slot, self.restart_context)
+            if all(slot.failed for slot in self.workers.values()):
+                self.logger.error("Все процессы камер остановлены из-за ошибок конфигурации")
+                return
+
+    def _log_memory(self):
+        report = self.memory_report()
+        parent = report['parent'] or {}
+        self.logger.info(
+            f"Память: родитель RSS {parent.get('rss_mb')} МБ, процессов камер {len(report['workers'])}, "
+            f"собственная память процесса в среднем {report['worker_uss_mb_mean']} МБ, "
+            f"всего PSS {report['total_pss_mb']} МБ (общие модели: {'да' if report['shared_models'] else 'нет'})"
+        )
+
+    def _aggregate_loop(self):
+        while True:
+            try:
+                message = self.results.get(timeout=1.0)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    return
+                continue
+            kind, name, payload = message
+            try:
+                if kind == 'frame':
+                    self._on_frame(self.workers[name], *payload)
+                elif kind == 'metrics':
+                    self.metrics[name] = payload
+                    metrics_registry.FPS.labels(name).set(payload['fps'])
+                elif kind == 'connected':
+                    slot = self.workers[name]
+                    self.logger.info(f"Камера {name} подключена")
+                    if slot.connected_once:
+                        metrics_registry.RECONNECTS.labels(name).inc()
+                    slot.connected_once = True
+                elif kind == 'disconnected':
+                    self.service.violation_store.close_camera(name)
+                elif kind == 'health':
+                    event, seconds = payload
+                    if event == 'frozen':
+                        self.logger.warning(f"Камера {name} зависла: изображение не меняется {seconds:.0f} сек")
+                        self.service.violation_store.close_camera(name)
+                        if self.service.clip_recorder:
+                            self.service.clip_recorder.flush_camera(name)
+                    else:
+                        self.logger.info(f"Камера {name}: изображение снова меняется")
+                    metrics_registry.record_freeze(name, event == 'frozen')
+            except Exception as e:
+                self.logger.error(f"Камера {name}: ошибка обработки результата: {str(e)}", exc_info=True)
+
+    def _on_frame(self, slot, seq, timestamp, shape, people_count, missing_areas, reused=False):
+        service = self.service
+        name = slot.camera['name']
+        slot.frames += 1
+
+        frame = None
+        if seq is not None and (service.clip_recorder or (service.snapshot_store and missing_areas)):
+            frame = slot.ring.read(seq)
+            if frame is not None and frame.shape[:2] != tuple(shape):
+                frame = cv2.resize(frame, (shape[1], shape[0]))
+            elif frame is None:
+                metrics_registry.FRAMES_DROPPED.labels(name).inc()
+
+        clip_recorder = service.clip_recorder
+        if clip_recorder and frame is not None:
+            clip_recorder.push(name, frame, timestamp)
+        opened = service.violation_store.record(name, slot.camera['model'], missing_areas, timestamp)
+        if opened and clip_recorder:
+            clip_recorder.trigger(name, opened)
+        if service.snapshot_store and missing_areas and frame is not None:
+            seen = [episode for episode in service.violation_store.active_episodes(name)
+                    if episode.last_seen == timestamp]
+            drawer = self._get_drawer()
+            service.snapshot_store.submit(name, frame, seen, timestamp,
+                                          render=lambda f, areas=missing_areas: drawer.draw_missing_siz(f.copy(), areas))
+        metrics_registry.record_frame(name, people_count, missing_areas, opened, reused)
+
+    def _get_drawer(self):
+        if self._drawer is None:
+            from src.ui.builders.detection_drawer import DetectionDrawer
+            self._drawer = DetectionDrawer()
+        return self._drawer
@@ -0,0 +1,58 @@
+import threading
+from core.detection.inference_profile import InferenceProfile, DEFAULT_PROFILE
+from core.utils.logger import AppLogger
+from sql_scripts import SQL
+
+
+class CameraRegistry:
+    """Кэш камер и моделей из ppe.db в памяти.
+
+    Данные читаются из БД один раз и отдаются из словарей, пока какая-либо
+    запись через Database.write() не сбросит кэш.
+    """
+
+    def __init__(self, database):
+        self.logger = AppLogger.get_logger()
+        self.database = database
+        self._lock = threading.Lock()
+        self._cameras = None  # name -> {"url", "record_url", "comment", "model", "profile"}
+        self._models = None  # name -> (id, name, comment)
+
+    def invalidate(self):
+        with self._lock:
+            self._cameras = None
+            self._models = None
+
+    def cameras(self) -> dict:
+        with self._lock:
+            if self._cameras is None:
+                self._cameras = {
+                    name: {
+                        "url": rtsp,
+                        "record_url": record,
+                        "comment": comment,
+                        "model": model,
+                        "profile": self._profile(name, profile)
+                    } for name, rtsp, record, comment, model, *profile in self.database.query(SQL.SELECT_CAMERAS)
+                }
+            return self._cameras
+
+    def _profile(self, name, row):
+        """Профиль камеры; неверное значение в одной строке не скрывает остальные камеры"""
+        try:
+            return InferenceProfile.from_row(*row)
+        except (ValueError, TypeError) as e:
+            self.logger.error(f"Камера {name}: некорректный профиль инференса ({e}), используются значения по умолчанию")
+            return DEFAULT_PROFILE
+
+    def get_camera(self, name: str) -> dict:
+        return self.cameras().get(name)
+
+    def models(self) -> dict:
+        with self._lock:
+            if self._models is None:
+                self._models = {row[1]: row for row in self.database.query(SQL.SELECT_MODELS)}
+            return self._models
+
+    def get_model(self, name: str):
+        return self.models().get(name)
@@ -0,0 +1,244 @@
+from collections import deque
+from datetime import datetime
+import os
+import queue
+import threading
+import cv2
+import numpy as np
+from config import Config
+from core.utils.logger import AppLogger
+from core.storage.database import Database
+from core.storage.main_stream_recorder import MainStreamRecorder
+from sql_scripts import SQL
+
+
+class FrameRingBuffer:
+    """Кольцевой буфер JPEG-кадров одного потока, ограниченный по длительности и памяти"""
+
+    def __init__(self, max_seconds, memory_budget):
+        self.max_seconds = max_seconds
+        self.memory_budget = memory_budget
+        self.frames = deque()  # (timestamp, jpeg)
+        self.size = 0
+
+    def append(self, timestamp, jpeg):
+        self.frames.append((timestamp, jpeg))
+        self.size += len(jpeg)
+        while self.frames and (self.size > self.memory_budget
+                               or timestamp - self.frames[0][0] > self.max_seconds):
+            _, old = self.frames.popleft()
+            self.size -= len(old)
+
+    def since(self, timestamp):
+        return [item for item in self.frames if item[0] >= timestamp]
+
+
+class _PendingClip:
+    __slots__ = ('camera', 'episodes', 'label', 'start', 'end', 'frames', 'size')
+
+    def __init__(self, camera, start, end, frames, label=None):
+        self.camera = camera
+        self.episodes = []  # Эпизоды, которым клип назначается в БД
+        self.label = label  # Первый эпизод цепочки клипов — для имени файла
+        self.start = start
+        self.end = end
+        self.frames = frames
+        self.size = sum(len(jpeg) for _, jpeg in frames)
+
+    def append(self, timestamp, jpeg):
+        self.frames.append((timestamp, jpeg))
+        self.size += len(jpeg)
+
+
+class ClipRecorder:
+    """Видеофрагменты нарушений: N секунд до начала эпизода и M секунд после.
+
+    Кадровый цикл только кладет кадр в ограниченную очередь (push) и сообщает
+    о новых эпизодах (trigger). Сжатие в JPEG, кольцевой буфер и сбор клипа
+    выполняет поток ClipBuffer, кодирование MP4 — поток ClipEncoder. При
+    переполнении очереди кадр пропускается, обработка видео не ждет;
+    управляющие сообщения (trigger, flush) в этом случае уходят в отдельную
+    неограниченную очередь и тоже не блокируют вызывающий поток.
+
+    Клип ограничен max_clip_seconds и max_clip_mb: при непрерывных нарушениях
+    он завершается и запись продолжается следующим клипом.
+    """
+
+    _STOP = object()
+
+    def __init__(self, storage_path: str = None, settings: dict = None):
+        self.logger = AppLogger.get_logger()
+        self.settings = {**Config.CLIP_SETTINGS, **(settings or {})}
+        self.db = Database.get(storage_path)
+        self.dropped = 0
+
+        self._frames = queue.Queue(maxsize=self.settings['queue_size'])
+        self._control = deque()  # Управляющие сообщения, не поместившиеся в очередь кадров
+        self._clips = queue.Queue()
+        self._buffers = {}  # camera -> FrameRingBuffer
+        self._pending = {}  # camera -> _PendingClip
+        self._record_urls = {}  # camera -> основной поток камеры
+        self.main_stream = MainStreamRecorder(storage_path, self.settings) if self.settings['main_stream'] else None
+
+        self._buffer_thread = threading.Thread(target=self._buffer_loop, name="ClipBuffer", daemon=True)
+        self._encoder_thread = threading.Thread(target=self._encoder_loop, name="ClipEncoder", daemon=True)
+        self._buffer_thread.start()
+        self._encoder_thread.start()
+
+    def push(self, camera, frame, timestamp):
+        """Передает кадр в буфер; кадр не должен изменяться после вызова"""
+        try:
+            self._frames.put_nowait(('frame', camera, frame, timestamp))
+        except queue.Full:
+            self.dropped += 1
+
+    def set_record_url(self, camera, url):
+        """Основной поток камеры: при нарушении он дополнительно записывается в полном разрешении"""
+        if url:
+            self._record_urls[camera] = url
+        else:
+            self._record_urls.pop(camera, None)
+
+    def trigger(self, camera, episodes):
+        """Начало эпизодов нарушения: запросить клип вокруг них"""
+        if episodes:
+            self._send(('trigger', camera, list(episodes), None))
+            url = self._record_urls.get(camera)
+            if url and self.main_stream is not None:
+                self.main_stream.record(camera, url, episodes)
+
+    def flush_camera(self, camera):
+        """Дописать незавершенный клип камеры по уже накопленным кадрам (остановка потока)"""
+        self._send(('flush', camera, None, None))
+
+    def _send(self, message):
+        """Управляющее сообщение не должно ни потеряться, ни ждать места в очереди кадров"""
+        try:
+            self._frames.put_nowait(message)
+        except queue.Full:
+            # Очередь полна, значит поток буфера заберет сообщение после ближайшего кадра
+            self._control.append(message)
+
+    def close(self):
+        self._frames.put((self._STOP, None, None, None))
+        self._buffer_thread.join(timeout=5)
+        self._encoder_thread.join(timeout=30)
+        if self.main_stream is not None:
+            self.main_stream.close()
+
+    def _buffer_loop(self):
+        settings = self.settings
+        budget = int(settings['memory_budget_mb'] * 1024 * 1024)
+        quality = [int(cv2.IMWRITE_JPEG_QUALITY), settings['jpeg_quality']]
+
+        while True:
+            message = self._frames.get()
+            while self._control:
+                self._handle(*self._control.popleft(), budget, quality)
+            if message[0] is self._STOP:
+                for camera in list(self._pending):
+                    self._finish(camera)
+                self._clips.put(self._STOP)
+                return
+            self._handle(*message, budget, quality)
+
+    def _handle(self, kind, camera, payload, timestamp, budget, quality):
+        try:
+            if kind == 'frame':
+                jpeg = self._encode(payload, quality)
+                if jpeg is None:
+                    return
+                buffer = self._buffers.get(camera)
+                if buffer is None:
+                    buffer = self._buffers[camera] = FrameRingBuffer(self.settings['pre_seconds'], budget)
+                buffer.append(timestamp, jpeg)
+
+                pending = self._pending.get(camera)
+                if pending is not None:
+                    pending.append(timestamp, jpeg)
+                    if timestamp >= pending.end:
+                        self._finish(camera)
+                    elif self._clip_full(pending):
+                        self._continue_clip(pending, timestamp)
+            elif kind == 'trigger':
+                self._start_clip(camera, payload)
+            elif kind == 'flush':
+                self._finish(camera)
+                self._buffers.pop(camera, None)
+        except Exception as e:
+            self.logger.error(f"Ошибка буфера клипов ({camera}): {str(e)}", exc_info=True)
+
+    def _encode(self, frame, quality):
+        max_width = self.settings['max_width']
+        if max_width and frame.shape[1] > max_width:
+            scale = max_width / frame.shape[1]
+            frame = cv2.resize(frame, (max_width, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode('.jpg', frame, quality)
+        return jpeg.tobytes() if ok else None
+
+    def _start_clip(self, camera, episodes):
+        started_at = min(episode.started_at for episode in episodes)
+        end = started_at + self.settings['post_seconds']
+        pending = self._pending.get(camera)
+        if pending is None:
+            buffer = self._buffers.get(camera)
+            frames = buffer.since(started_at - self.settings['pre_seconds']) if buffer else []
+            label = episodes[0].episode_id
+            pending = self._pending[camera] = _PendingClip(camera, started_at, end, frames, label)
+        else:
+            # Новое нарушение во время записи — продлеваем текущий клип
+            pending.end = max(pending.end, end)
+        pending.episodes.extend(episode.episode_id for episode in episodes)
+
+    def _clip_full(self, pending):
+        duration = pending.frames[-1][0] - pending.frames[0][0]
+        return (duration >= self.settings['max_clip_seconds']
+                or pending.size >= self.settings['max_clip_mb'] * 1024 * 1024)
+
+    def _continue_clip(self, pending, timestamp):
+        """Клип достиг предела: сохранить его и продолжить запись эпизодов следующим"""
+        self._finish(pending.camera)
+        self._pending[pending.camera] = _PendingClip(pending.camera, timestamp, pending.end, [], pending.label)
+
+    def _finish(self, camera):
+        pending = self._pending.pop(camera, None)
+        if pending is not None and pending.frames:
+            self._clips.put(pending)
+
+    def _encoder_loop(self):
+        while True:
+            clip = self._clips.get()
+            if clip is self._STOP:
+                self.db.close()
+                return
+            try:
+                path = self._write_clip(clip)
+                with self.db.transaction() as con:
+                    con.executemany(SQL.SET_VIOLATION_CLIP, [(path, episode_id) for episode_id in clip.episodes])
+            except Exception as e:
+                self.logger.error(f"Ошибка записи клипа ({clip.camera}): {str(e)}", exc_info=True)
+
+    def _write_clip(self, clip):
+        camera_dir = "".join(c if c.isalnum() or c in "-_." else "_" for c in clip.camera)
+        output_dir = os.path.join(self.settings['output_dir'], camera_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{datetime.fromtimestamp(clip.start):%Y-%m-%d_%H-%M-%S}_{clip.label[:8]}.mp4")
+
+        frames = clip.frames
+        duration = frames[-1][0] - frames[0][0]
+        fps = (len(frames) - 1) / duration if duration > 0 else 10.0
+
+        writer = None
+        try:
+            for _, jpeg in frames:
+                image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if writer is None:
+                    h, w = image.shape[:2]
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.settings['fourcc']), fps, (w, h))
+                writer.write(image)
+        finally:
+            if writer is not None:
+                writer.release()
+
+        self.logger.info(f"Клип нарушения сохранен: {path} ({len(frames)} кадров, {duration:.1f} сек)")
+        return path
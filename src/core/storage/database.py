@@ -0,0 +1,89 @@
+from contextlib import contextmanager
+from pathlib import Path
+import sqlite3
+import threading
+from config import Config
+from core.utils.logger import AppLogger
+from core.storage.camera_registry import CameraRegistry
+from sql_scripts import SQL
+
+
+class Database:
+    """Общий слой доступа к ppe.db.
+
+    На каждый путь к БД создаётся один экземпляр (Database.get), а внутри него —
+    одно долгоживущее соединение на поток. Схема инициализируется один раз на
+    процесс, соединения работают в режиме WAL и кэшируют подготовленные
+    выражения (все запросы берутся из констант SQL).
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    STATEMENT_CACHE_SIZE = 256
+
+    @classmethod
+    def get(cls, storage_path: str = None):
+        default_path = "data/config/" + Config.DB_NAME
+        storage_file = Path(storage_path) if storage_path else Path(default_path)
+        key = str(storage_file.absolute())
+
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(storage_file)
+            return cls._instances[key]
+
+    def __init__(self, storage_file: Path):
+        self.logger = AppLogger.get_logger()
+        self.storage_file = storage_file
+        self.storage_file.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.registry = CameraRegistry(self)
+
+        con = self.connection()
+        con.executescript(SQL.INIT_DB)
+        self._migrate(con)
+        self.logger.info(f"Хранилище инициализировано: {self.storage_file}")
+
+    def connection(self) -> sqlite3.Connection:
+        """Возвращает соединение текущего потока, создавая его при первом обращении"""
+        con = getattr(self._local, 'connection', None)
+        if con is None:
+            con = sqlite3.connect(self.storage_file, cached_statements=self.STATEMENT_CACHE_SIZE)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = con
+        return con
+
+    def _migrate(self, con):
+        """Добавляет колонки из SQL.MIGRATIONS, которых нет в существующей БД"""
+        for table, columns in SQL.MIGRATIONS.items():
+            existing = {row[1] for row in con.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns:
+                if column not in existing:
+                    con.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                    self.logger.info(f"Схема БД: добавлена колонка {table}.{column}")
+        con.commit()
+
+    def query(self, sql: str, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    def write(self, sql: str, params=()):
+        """Выполняет изменяющий запрос в транзакции и сбрасывает кэш реестра"""
+        with self.transaction() as con:
+            cursor = con.execute(sql, params)
+        self.registry.invalidate()
+        return cursor
+
+    @contextmanager
+    def transaction(self):
+        con = self.connection()
+        with con:
+            yield con
+
+    def close(self):
+        """Закрывает соединение текущего потока"""
+        con = getattr(self._local, 'connection', None)
+        if con is not None:
+            con.close()
+            self._local.connection = None
@@ -0,0 +1,346 @@
+from datetime import datetime
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from config import Config
+from core.utils.logger import AppLogger
+from core.detection.detection_frame import DetectionFrame, KEYPOINTS
+
+CACHE_VERSION = 2
+UNCHECKED = 2  # box_status бокса, который не проверялся (статус None)
+
+# Столбцы записи кэша: имя файла -> (dtype, форма одного элемента)
+_COLUMNS = {
+    'frames': (np.int32, ()),           # Номера кадров с результатом, по возрастанию
+    'people': (np.int16, ()),
+    'box_offsets': (np.int32, ()),      # Границы боксов кадра i: [box_offsets[i], box_offsets[i + 1])
+    'boxes': (np.int16, (4,)),
+    'box_cls': (np.int16, ()),
+    'box_conf': (np.float16, ()),
+    'box_status': (np.uint8, ()),       # 0 — нет, 1 — да, UNCHECKED — не проверялся
+    'person_offsets': (np.int32, ()),
+    'keypoints': (np.int16, (KEYPOINTS, 2)),
+    'missing_offsets': (np.int32, ()),
+    'missing': (np.int16, (4,)),
+    'missing_type': (np.uint8, ()),
+}
+
+
+def file_fingerprint(path, chunk_size):
+    """SHA-256 размера и трех фрагментов файла (начало, середина, конец).
+
+    Многогигабайтная запись не читается целиком, а перекодированный или
+    дописанный файл дает другой отпечаток.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, 'rb') as f:
+        for offset in sorted({0, max(0, size // 2 - chunk_size // 2), max(0, size - chunk_size)}):
+            f.seek(offset)
+            digest.update(f.read(chunk_size))
+    return digest.hexdigest()
+
+
+class DetectionRecord:
+    """Результат анализа одного кадра в компактном виде (целые пиксели, float16)"""
+    __slots__ = ('boxes', 'box_cls', 'box_conf', 'box_status', 'keypoints', 'missing_areas', 'people', 'detected')
+
+    def __init__(self, boxes, box_cls, box_conf, box_status, keypoints, missing_areas, people, detected):
+        self.boxes = boxes
+        self.box_cls = box_cls
+        self.box_conf = box_conf
+        self.box_status = box_status
+        self.keypoints = keypoints
+        self.missing_areas = missing_areas
+        self.people = people
+        self.detected = detected
+
+    @classmethod
+    def from_results(cls, detections, statuses, missing_areas, status):
+        """Из результатов FrameProcessor: DetectionFrame, статусы боксов, отсутствующие СИЗ и status"""
+        detections = detections if detections is not None else DetectionFrame()
+        xyxy = np.rint(detections.xyxy).astype(np.int16)
+        box_cls = detections.cls.astype(np.int16)
+        box_conf = detections.conf.astype(np.float16)
+        if isinstance(statuses, (list, tuple)):
+            box_status = np.array([UNCHECKED if i < len(statuses) and statuses[i] is None
+                                   else bool(i < len(statuses) and statuses[i]) for i in range(len(xyxy))],
+                                  dtype=np.uint8)
+        else:
+            box_status = np.zeros(len(xyxy), np.uint8)
+
+        keypoints = np.rint(detections.keypoints).astype(np.int16)
+        _, people, detected = status if status else ([], 0, {})
+        areas = [(tuple(int(v) for v in area), siz_type) for area, siz_type in missing_areas]
+        return cls(xyxy, box_cls, box_conf, box_status, keypoints, areas, int(people),
+                   {name: int(count) for name, count in (detected or {}).items()})
+
+    @property
+    def status(self):
+        return [None if s == UNCHECKED else bool(s) for s in self.box_status], self.people, dict(self.detected)
+
+    def detection_frame(self):
+        """DetectionFrame для DetectionDrawer"""
+        return DetectionFrame(self.boxes.astype(np.float32), self.box_conf.astype(np.float32),
+                              self.box_cls.astype(np.int32), self.keypoints.astype(np.float32))
+
+
+class DetectionCacheSession:
+    """Кэш результатов одного файла для одной модели и профиля.
+
+    Результаты прошлых просмотров читаются из столбцов .npy через np.load
+    (mmap_mode='r') — в память попадают только запрошенные кадры. Новые
+    результаты копятся в памяти и сливаются с сохраненными в close().
+    Для кадра без своего результата берется ближайший предыдущий не старше
+    max_gap кадров (пропуски при воспроизведении, шаг кадров профиля).
+    """
+
+    def __init__(self, cache, path, meta, max_gap):
+        self.logger = AppLogger.get_logger()
+        self.cache = cache
+        self.path = path
+        self.meta = meta
+        self.max_gap = max_gap
+        self.columns = None
+        self.hits = 0
+        self.misses = 0
+        self._new = {}  # frame -> DetectionRecord текущего просмотра
+        self._load()
+
+    @property
+    def cached_frames(self):
+        return 0 if self.columns is None else len(self.columns['frames'])
+
+    def _load(self):
+        if not self.meta.get('records'):
+            return
+        try:
+            self.columns = {name: self._load_column(name) for name in (*_COLUMNS, 'detected')}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Кэш детекций {self.path} поврежден и будет перезаписан: {str(e)}")
+            self.columns = None
+            self.meta['records'] = 0
+
+    def _load_column(self, name):
+        path = os.path.join(self.path, f"{name}.npy")
+        try:
+            return np.load(path, mmap_mode='r')
+        except ValueError:
+            # Пустой столбец (например, кадров без нарушений) не отображается в память
+            return np.load(path)
+
+    def lookup(self, frame_index):
+        """Сохраненный результат для кадра или None (тогда нужен анализ)"""
+        columns = self.columns
+        if columns is None:
+            self.misses += 1
+            return None
+        frames = columns['frames']
+        pos = int(np.searchsorted(frames, frame_index, side='right')) - 1
+        if pos < 0 or frame_index - int(frames[pos]) > self.max_gap:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._record_at(pos)
+
+    def store(self, frame_index, record):
+        self._new[frame_index] = record
+
+    def _record_at(self, pos):
+        c = self.columns
+        b0, b1 = int(c['box_offsets'][pos]), int(c['box_offsets'][pos + 1])
+        p0, p1 = int(c['person_offsets'][pos]), int(c['person_offsets'][pos + 1])
+        m0, m1 = int(c['missing_offsets'][pos]), int(c['missing_offsets'][pos + 1])
+        missing_names = self.meta['missing_names']
+        detected_names = self.meta['detected_names']
+        counts = c['detected'][pos]
+        return DetectionRecord(
+            np.array(c['boxes'][b0:b1]), np.array(c['box_cls'][b0:b1]), np.array(c['box_conf'][b0:b1]),
+            np.array(c['box_status'][b0:b1]), np.array(c['keypoints'][p0:p1]),
+            [(tuple(int(v) for v in area), missing_names[int(t)])
+             for area, t in zip(c['missing'][m0:m1], c['missing_type'][m0:m1])],
+            int(c['people'][pos]),
+            {name: int(count) for name, count in zip(detected_names, counts) if count}
+        )
+
+    def close(self):
+        """Сливает новые результаты с сохраненными и записывает столбцы"""
+        new, self._new = self._new, {}
+        if not new:
+            self.columns = None
+            return
+        records = {}
+        if self.columns is not None:
+            for pos, frame_index in enumerate(self.columns['frames']):
+                frame_index = int(frame_index)
+                if frame_index not in new:
+                    records[frame_index] = self._record_at(pos)
+        records.update(new)
+        # Отображения файлов закрываются до их замены (на Windows иначе замена невозможна)
+        self.columns = None
+        try:
+            self._write(records)
+            self.logger.info(f"Кэш детекций обновлен: {self.meta['source']} — {len(records)} кадров "
+                             f"(новых {len(new)}, из кэша {self.hits})")
+        except OSError as e:
+            self.logger.error(f"Не удалось сохранить кэш детекций: {str(e)}")
+        self.cache.evict(keep=self.path)
+
+    def _write(self, records):
+        order = sorted(records)
+        items = [records[i] for i in order]
+        missing_names = list(self.meta.get('missing_names') or [])
+        detected_names = list(self.meta.get('detected_names') or [])
+        for record in items:
+            for _, siz_type in record.missing_areas:
+                if siz_type not in missing_names:
+                    missing_names.append(siz_type)
+            for name in record.detected:
+                if name not in detected_names:
+                    detected_names.append(name)
+        missing_ids = {name: i for i, name in enumerate(missing_names)}
+        detected_ids = {name: i for i, name in enumerate(detected_names)}
+
+        def offsets(lengths):
+            result = np.zeros(len(lengths) + 1, np.int32)
+            result[1:] = np.cumsum(lengths)
+            return result
+
+        def stack(name, parts):
+            dtype, shape = _COLUMNS[name]
+            return np.concatenate(parts).astype(dtype) if parts else np.empty((0,) + shape, dtype)
+
+        detected = np.zeros((len(items), len(detected_names)), np.int16)
+        for row, record in enumerate(items):
+            for name, count in record.detected.items():
+                detected[row, detected_ids[name]] = count
+
+        columns = {
+            'frames': np.array(order, np.int32),
+            'people': np.array([r.people for r in items], np.int16),
+            'box_offsets': offsets([len(r.boxes) for r in items]),
+            'boxes': stack('boxes', [r.boxes for r in items]),
+            'box_cls': stack('box_cls', [r.box_cls for r in items]),
+            'box_conf': stack('box_conf', [r.box_conf for r in items]),
+            'box_status': stack('box_status', [r.box_status for r in items]),
+            'person_offsets': offsets([len(r.keypoints) for r in items]),
+            'keypoints': stack('keypoints', [r.keypoints for r in items]),
+            'missing_offsets': offsets([len(r.missing_areas) for r in items]),
+            'missing': np.array([area for r in items for area, _ in r.missing_areas], np.int16).reshape(-1, 4),
+            'missing_type': np.array([missing_ids[t] for r in items for _, t in r.missing_areas], np.uint8),
+            'detected': detected,
+        }
+        os.makedirs(self.path, exist_ok=True)
+        for name, array in columns.items():
+            np.save(os.path.join(self.path, f"{name}.tmp.npy"), array)
+
+        # Пока столбцы заменяются по одному, запись недействительна: после сбоя
+        # посреди замены смесь старых и новых столбцов не читается
+        meta_path = os.path.join(self.path, "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        for name in columns:
+            os.replace(os.path.join(self.path, f"{name}.tmp.npy"), os.path.join(self.path, f"{name}.npy"))
+
+        # meta.json пишется последним: без него запись кэша не читается
+        self.meta.update(records=len(items), missing_names=missing_names, detected_names=detected_names,
+                         updated=datetime.now().isoformat(timespec='seconds'))
+        self.cache.write_meta(self.path, self.meta)
+
+
+class DetectionCache:
+    """Постоянный кэш результатов анализа видеофайлов.
+
+    Запись кэша — папка в output_dir с ключом из отпечатка содержимого
+    файла, SHA-256 весов модели (из реестра), отпечатка модели поз и
+    профиля инференса. Повторно открытая запись воспроизводится с
+    разметкой без инференса, в том числе после перемотки.
+    """
+
+    def __init__(self, settings: dict = None):
+        self.logger = AppLogger.get_logger()
+        self.settings = {**Config.DETECTION_CACHE_SETTINGS, **(settings or {})}
+        self.output_dir = self.settings['output_dir']
+
+    def open(self, source, model_name, model_info, profile, fps):
+        """Сессия кэша для файла или None, если кэш выключен или модель без хэша весов"""
+        model_hash = (model_info or {}).get('content_hash')
+        if not self.settings['enabled'] or not model_hash or not os.path.isfile(source):
+            return None
+        chunk_size = self.settings['hash_chunk_size']
+        try:
+            source_hash = file_fingerprint(source, chunk_size)
+            from core.detection.pose_detection import PoseDetector
+            pose_path = PoseDetector.MODEL_PATH
+            pose_hash = file_fingerprint(pose_path, chunk_size) if os.path.isfile(pose_path) else pose_path
+        except OSError as e:
+            self.logger.warning(f"Кэш детекций недоступен для {source}: {str(e)}")
+            return None
+
+        profile_key = json.dumps(profile.to_row(), ensure_ascii=False)
+        key = hashlib.sha256(
+            f"{CACHE_VERSION}|{source_hash}|{model_hash}|{pose_hash}|{profile_key}".encode()
+        ).hexdigest()[:32]
+        path = os.path.join(self.output_dir, key)
+        meta = self.read_meta(path) or {
+            'version': CACHE_VERSION,
+            'source': os.path.basename(source),
+            'source_hash': source_hash,
+            'model': model_name,
+            'model_hash': model_hash,
+            'profile': profile_key,
+            'fps': fps,
+            'records': 0,
+            'missing_names': [],
+            'detected_names': [],
+            'created': datetime.now().isoformat(timespec='seconds')
+        }
+        max_gap = max(int(round(self.settings['max_gap_seconds'] * fps)), profile.stride or 1)
+        session = DetectionCacheSession(self, path, meta, max_gap)
+        if session.cached_frames:
+            self.logger.info(f"Кэш детекций: {meta['source']} — сохранено {session.cached_frames} кадров "
+                             f"({model_name}), анализ выполняется только для пропусков")
+        return session
+
+    @staticmethod
+    def read_meta(path):
+        try:
+            with open(os.path.join(path, "meta.json"), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('version') == CACHE_VERSION else None
+
+    @staticmethod
+    def write_meta(path, meta):
+        tmp_path = os.path.join(path, "meta.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+    def evict(self, keep=None):
+        """Удаляет давно обновлявшиеся записи, пока кэш больше max_size_mb"""
+        if not os.path.isdir(self.output_dir):
+            return
+        entries = []
+        for name in os.listdir(self.output_dir):
+            path = os.path.join(self.output_dir, name)
+            if not os.path.isdir(path):
+                continue
+            files = [os.path.join(path, f) for f in os.listdir(path)]
+            size = sum(os.path.getsize(f) for f in files if os.path.isfile(f))
+            meta_path = os.path.join(path, "meta.json")
+            mtime = os.path.getmtime(meta_path) if os.path.exists(meta_path) else 0
+            entries.append((mtime, size, path))
+        total = sum(size for _, size, _ in entries)
+        limit = self.settings['max_size_mb'] * 1024 * 1024
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.logger.info(f"Кэш детекций: удалена запись {os.path.basename(path)}")
@@ -0,0 +1,131 @@
+from datetime import datetime
+import os
+import shutil
+import subprocess
+import threading
+import time
+import cv2
+from config import Config
+from core.utils.logger import AppLogger
+from core.storage.database import Database
+from sql_scripts import SQL
+
+
+class _MainStreamJob:
+    __slots__ = ('camera', 'url', 'episodes', 'started_at', 'duration', 'process', 'thread', 'done')
+
+    def __init__(self, camera, url, episodes, duration):
+        self.camera = camera
+        self.url = url
+        self.episodes = list(episodes)
+        self.started_at = time.time()
+        self.duration = duration
+        self.process = None
+        self.thread = None
+        self.done = False  # Запись закончена, новые эпизоды к ней не относятся
+
+
+class MainStreamRecorder:
+    """Запись основного потока камеры (высокое разрешение) по требованию.
+
+    Анализ идет по субпотоку, а основной поток открывается только на время
+    записи доказательства нарушения. При наличии ffmpeg поток пишется без
+    декодирования (-c copy), иначе кадры читаются и пишутся через OpenCV.
+    """
+
+    def __init__(self, storage_path: str = None, settings: dict = None):
+        self.logger = AppLogger.get_logger()
+        self.settings = {**Config.CLIP_SETTINGS, **(settings or {})}
+        self.db = Database.get(storage_path)
+        self.ffmpeg = shutil.which('ffmpeg')
+        self._jobs = {}  # camera -> _MainStreamJob
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def record(self, camera, url, episodes):
+        """Записать post_seconds основного потока; во время записи эпизоды добавляются к ней"""
+        with self._lock:
+            job = self._jobs.get(camera)
+            if job is not None and not job.done:
+                job.episodes.extend(episode.episode_id for episode in episodes)
+                return
+            job = self._jobs[camera] = _MainStreamJob(
+                camera, url, (episode.episode_id for episode in episodes), self.settings['post_seconds']
+            )
+            job.thread = threading.Thread(target=self._run, args=(job,), name=f"MainStream-{camera}", daemon=True)
+            job.thread.start()
+
+    def close(self):
+        self._stop_event.set()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.process is not None and job.process.poll() is None:
+                job.process.terminate()  # ffmpeg по SIGTERM корректно закрывает MP4
+            job.thread.join(timeout=self.settings['main_open_timeout'])
+
+    def _run(self, job):
+        try:
+            path = self._output_path(job)
+            if self.ffmpeg:
+                self._record_ffmpeg(job, path)
+            else:
+                self._record_opencv(job, path)
+            if not os.path.exists(path) or not os.path.getsize(path):
+                raise RuntimeError("основной поток не дал ни одного кадра")
+
+            with self._lock:
+                job.done = True
+                episodes = list(job.episodes)
+            with self.db.transaction() as con:
+                con.executemany(SQL.SET_VIOLATION_MAIN_CLIP, [(path, episode_id) for episode_id in episodes])
+            self.logger.info(f"Запись основного потока сохранена: {path}")
+        except Exception as e:
+            self.logger.error(f"Ошибка записи основного потока ({job.camera}): {str(e)}")
+        finally:
+            job.done = True
+            self.db.close()
+
+    def _output_path(self, job):
+        camera_dir = "".join(c if c.isalnum() or c in "-_." else "_" for c in job.camera)
+        output_dir = os.path.join(self.settings['output_dir'], camera_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, f"{datetime.fromtimestamp(job.started_at):%Y-%m-%d_%H-%M-%S}_"
+                                        f"{job.episodes[0][:8]}_main.mp4")
+
+    def _record_ffmpeg(self, job, path):
+        command = [self.ffmpeg, '-y', '-loglevel', 'error']
+        if job.url.startswith('rtsp://'):
+            command += ['-rtsp_transport', 'tcp']
+        command += ['-i', job.url, '-t', f"{job.duration:.1f}", '-c', 'copy', '-an', path]
+        job.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            _, stderr = job.process.communicate(timeout=job.duration + self.settings['main_open_timeout'])
+        except subprocess.TimeoutExpired:
+            job.process.terminate()
+            _, stderr = job.process.communicate()
+        if job.process.returncode not in (0, 255) and not self._stop_event.is_set():
+            raise RuntimeError(f"ffmpeg завершился с кодом {job.process.returncode}: "
+                               f"{stderr.decode(errors='replace').strip()[:200]}")
+
+    def _record_opencv(self, job, path):
+        cap = cv2.VideoCapture(job.url, cv2.CAP_FFMPEG)
+        writer = None
+        try:
+            if not cap.isOpened():
+                raise RuntimeError("не удалось открыть основной поток")
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            fps = fps if 0 < fps <= 120 else 25.0
+            deadline = time.monotonic() + job.duration
+            while time.monotonic() < deadline and not self._stop_event.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if writer is None:
+                    h, w = frame.shape[:2]
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.settings['fourcc']), fps, (w, h))
+                writer.write(frame)
+        finally:
+            cap.release()
+            if writer is not None:
+                writer.release()
@@ -0,0 +1,210 @@
+from collections import OrderedDict
+import hashlib
+import os
+import queue
+import threading
+import cv2
+from config import Config
+from core.utils.logger import AppLogger
+from core.storage.database import Database
+from sql_scripts import SQL
+
+
+def dhash(image, hash_size=8):
+    """Разностный перцептивный хэш (64 бита) для сравнения почти одинаковых снимков"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def box_iou(a, b):
+    """IoU двух областей (x1, y1, x2, y2)"""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class SnapshotStore:
+    """Галерея размеченных снимков по эпизодам нарушений.
+
+    Кадровый цикл вызывает submit() с уже размеченным кадром и активными
+    эпизодами; отбор по интервалу делается сразу, а хэширование, сжатие
+    (JPEG/WebP), миниатюра и запись в SQLite — в потоке SnapshotWriter.
+    Файлы адресуются SHA-256 содержимого, поэтому одинаковые снимки не
+    дублируются на диске, а снимки того же человека, почти не отличающиеся
+    по dHash области нарушения, не сохраняются вовсе. Сравнение идет и с
+    сохраненными за dedup_window снимками той же камеры и типа нарушения
+    того же трека или в том же месте кадра (IoU области не ниже dedup_iou):
+    эпизод, переоткрытый после короткого пропуска, получает новый
+    episode_id, но не повторяет тот же снимок, а похожий работник в другом
+    месте кадра свой снимок получает.
+    """
+
+    _STOP = object()
+    MAX_TRACKED = 4096  # Сколько эпизодов помнить для отбора по интервалу и dHash
+
+    def __init__(self, storage_path: str = None, settings: dict = None):
+        self.logger = AppLogger.get_logger()
+        self.settings = {**Config.SNAPSHOT_SETTINGS, **(settings or {})}
+        self.db = Database.get(storage_path)
+        self.dropped = 0
+        self.duplicates = 0
+
+        self._queue = queue.Queue(maxsize=self.settings['queue_size'])
+        self._last_taken = {}  # episode_id -> время последнего снимка (поток кадров)
+        self._last_hash = OrderedDict()  # episode_id -> dHash последнего сохраненного снимка (поток записи)
+        # (камера, тип СИЗ) -> [(время, dHash, область, track_id)] сохраненных за dedup_window (поток записи)
+        self._recent_hashes = {}
+
+        self._thread = threading.Thread(target=self._writer_loop, name="SnapshotWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, camera, frame, episodes, timestamp, render=None):
+        """Ставит снимок в очередь, если хотя бы одному эпизоду пора; кадр не должен меняться после вызова.
+
+        render(frame) -> размеченный кадр вызывается в потоке записи, если
+        передан неразмеченный кадр (headless-режим).
+        """
+        if not episodes:
+            return
+        interval = self.settings['interval']
+        due = []
+        for episode in episodes:
+            last = self._last_taken.get(episode.episode_id)
+            if last is None or timestamp - last >= interval:
+                due.append((episode.episode_id, episode.track_id, episode.siz_type, episode.area))
+        if not due:
+            return
+
+        try:
+            self._queue.put_nowait((camera, frame, due, timestamp, render))
+        except queue.Full:
+            self.dropped += 1
+            return
+        for episode_id, _, _, _ in due:
+            self._last_taken[episode_id] = timestamp
+
+        # Эпизоды, давно не попадавшие в submit, больше не отслеживаем
+        if len(self._last_taken) > self.MAX_TRACKED:
+            horizon = timestamp - 10 * interval
+            self._last_taken = {key: value for key, value in self._last_taken.items() if value >= horizon}
+
+    def get_snapshots(self, episode_id=None, camera=None, limit=200):
+        query = ("SELECT episode_id, camera, track_id, siz_type, taken_at, path, thumb_path, width, height "
+                 "FROM snapshots WHERE 1=1")
+        params = []
+        if episode_id:
+            query += " AND episode_id = ?"
+            params.append(episode_id)
+        if camera:
+            query += " AND camera = ?"
+            params.append(camera)
+        query += " ORDER BY taken_at DESC LIMIT ?"
+        params.append(limit)
+        try:
+            cursor = self.db.connection().execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            self.logger.error(f"Ошибка чтения снимков: {e}")
+            return []
+
+    def close(self):
+        self._queue.put(self._STOP)
+        self._thread.join(timeout=10)
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                self.db.close()
+                return
+            try:
+                self._save(*item)
+            except Exception as e:
+                self.logger.error(f"Ошибка сохранения снимка: {str(e)}", exc_info=True)
+
+    def _save(self, camera, frame, due, timestamp, render):
+        threshold = self.settings['hash_threshold']
+        min_iou = self.settings['dedup_iou']
+        horizon = timestamp - self.settings['dedup_window']
+        kept = []
+        for episode_id, track_id, siz_type, area in due:
+            phash = dhash(self._crop(frame, area))
+            last = self._last_hash.get(episode_id)
+            recent = [item for item in self._recent_hashes.get((camera, siz_type), ()) if item[0] >= horizon]
+            if ((last is not None and bin(phash ^ last).count('1') <= threshold)
+                    or any(bin(phash ^ value).count('1') <= threshold
+                           and ((track_id is not None and track_id == track) or box_iou(area, place) >= min_iou)
+                           for _, value, place, track in recent)):
+                self.duplicates += 1
+                continue
+            recent.append((timestamp, phash, tuple(area), track_id))
+            self._recent_hashes[(camera, siz_type)] = recent
+            self._last_hash[episode_id] = phash
+            self._last_hash.move_to_end(episode_id)
+            if len(self._last_hash) > self.MAX_TRACKED:
+                self._last_hash.popitem(last=False)
+            kept.append((episode_id, track_id, siz_type, phash))
+        if not kept:
+            return
+
+        if render is not None:
+            frame = render(frame)
+
+        content_hash, path, thumb_path, size = self._store_image(frame)
+        height, width = frame.shape[:2]
+        with self.db.transaction() as con:
+            con.executemany(SQL.INSERT_SNAPSHOT, [
+                (episode_id, camera, track_id, siz_type, timestamp, content_hash, f"{phash:016x}",
+                 path, thumb_path, width, height, size)
+                for episode_id, track_id, siz_type, phash in kept
+            ])
+
+    @staticmethod
+    def _crop(frame, area):
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = (int(v) for v in area)
+        x1, x2 = max(0, min(x1, w - 1)), max(1, min(x2, w))
+        y1, y2 = max(0, min(y1, h - 1)), max(1, min(y2, h))
+        crop = frame[y1:y2, x1:x2]
+        return crop if crop.size else frame
+
+    def _store_image(self, frame):
+        fmt = self.settings['format']
+        if fmt == 'webp':
+            params = [int(cv2.IMWRITE_WEBP_QUALITY), self.settings['quality']]
+        else:
+            fmt = 'jpg'
+            params = [int(cv2.IMWRITE_JPEG_QUALITY), self.settings['quality']]
+
+        ok, encoded = cv2.imencode(f'.{fmt}', frame, params)
+        if not ok:
+            raise ValueError(f"Не удалось сжать снимок в {fmt}")
+        data = encoded.tobytes()
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        directory = os.path.join(self.settings['output_dir'], content_hash[:2], content_hash[2:4])
+        path = os.path.join(directory, f"{content_hash}.{fmt}")
+        thumb_path = os.path.join(directory, f"{content_hash}_thumb.{fmt}")
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+
+            thumb_width = self.settings['thumb_width']
+            h, w = frame.shape[:2]
+            thumb = cv2.resize(frame, (thumb_width, max(1, int(h * thumb_width / w))), interpolation=cv2.INTER_AREA)
+            ok, encoded_thumb = cv2.imencode(f'.{fmt}', thumb, params)
+            if ok:
+                with open(thumb_path, 'wb') as f:
+                    f.write(encoded_thumb.tobytes())
+        return content_hash, path, thumb_path, len(data)
@@ -0,0 +1,218 @@
+import queue
+import threading
+import time
+import uuid
+from config import Config
+from core.utils.logger import AppLogger
+from core.storage.database import Database
+from sql_scripts import SQL
+
+
+class ViolationEpisode:
+    """Непрерывный эпизод отсутствия одного типа СИЗ у одного человека"""
+    __slots__ = ('episode_id', 'camera', 'model', 'track_id', 'siz_type',
+                 'started_at', 'last_seen', 'frames', 'area')
+
+    def __init__(self, camera, model, track_id, siz_type, area, timestamp):
+        self.episode_id = uuid.uuid4().hex
+        self.camera = camera
+        self.model = model
+        self.track_id = track_id
+        self.siz_type = siz_type
+        self.started_at = timestamp
+        self.last_seen = timestamp
+        self.frames = 1
+        self.area = area
+
+
+class ViolationStore:
+    """Журнал нарушений СИЗ с фоновой пакетной записью в SQLite.
+
+    Кадровый цикл вызывает только record(): сопоставление областей с уже
+    открытыми эпизодами выполняется в памяти, а запись в БД — в отдельном
+    потоке пачками через executemany. Один эпизод = одна строка в таблице.
+    """
+
+    _STOP = object()
+
+    def __init__(self, storage_path: str = None, settings: dict = None):
+        self.logger = AppLogger.get_logger()
+        self.db = Database.get(storage_path)
+        self.settings = {**Config.VIOLATION_SETTINGS, **(settings or {})}
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._episodes = {}  # camera -> список открытых эпизодов
+        self._next_track_id = {}  # camera -> следующий номер трека
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._writer_loop, name="ViolationWriter", daemon=True)
+        self._thread.start()
+
+    def record(self, camera, model, missing_areas, timestamp=None):
+        """Регистрирует области отсутствующих СИЗ текущего кадра.
+
+        Возвращает список эпизодов, открытых этим вызовом.
+        """
+        if self._closed or not camera:
+            return []
+
+        now = timestamp if timestamp is not None else time.time()
+        opened = []
+        with self._lock:
+            self._expire_locked(camera, now)
+            episodes = self._episodes.setdefault(camera, [])
+            matched = set()
+
+            for area, siz_type in missing_areas or []:
+                episode = self._match_episode(episodes, matched, area, siz_type)
+                if episode is None:
+                    track_id = self._next_track_id.get(camera, 1)
+                    self._next_track_id[camera] = track_id + 1
+                    episode = ViolationEpisode(camera, model, track_id, siz_type, area, now)
+                    episodes.append(episode)
+                    opened.append(episode)
+                    self._queue.put(('open', episode))
+                else:
+                    episode.last_seen = now
+                    episode.frames += 1
+                    episode.area = area
+                matched.add(id(episode))
+        return opened
+
+    def close_camera(self, camera):
+        """Закрывает все открытые эпизоды камеры (остановка обработки)"""
+        with self._lock:
+            for episode in self._episodes.pop(camera, []):
+                self._queue.put(('close', episode))
+
+    def active_episodes(self, camera):
+        with self._lock:
+            return list(self._episodes.get(camera, []))
+
+    def get_violations(self, camera=None, siz_type=None, since=None, until=None, limit=1000):
+        """Выборка нарушений для отчётов (использует индексы camera/time/type)"""
+        query = ("SELECT episode_id, camera, model, track_id, siz_type, started_at, ended_at, frames, "
+                 "x1, y1, x2, y2, clip_path, main_clip_path FROM violations WHERE 1=1")
+        params = []
+        if camera:
+            query += " AND camera = ?"
+            params.append(camera)
+        if siz_type:
+            query += " AND siz_type = ?"
+            params.append(siz_type)
+        if since is not None:
+            query += " AND started_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND started_at < ?"
+            params.append(until)
+        query += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+
+        try:
+            cursor = self.db.connection().execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            self.logger.error(f"Ошибка чтения журнала нарушений: {e}")
+            return []
+
+    def close(self):
+        """Закрывает все эпизоды, сбрасывает очередь и останавливает поток записи"""
+        if self._closed:
+            return
+        with self._lock:
+            for camera in list(self._episodes):
+                for episode in self._episodes.pop(camera):
+                    self._queue.put(('close', episode))
+            self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout=5)
+
+    def _match_episode(self, episodes, matched, area, siz_type):
+        """Ищет открытый эпизод того же типа с ближайшей областью"""
+        cx = (area[0] + area[2]) / 2
+        cy = (area[1] + area[3]) / 2
+        best, best_distance = None, self.settings['match_distance']
+
+        for episode in episodes:
+            if episode.siz_type != siz_type or id(episode) in matched:
+                continue
+            ex1, ey1, ex2, ey2 = episode.area
+            size = max(ex2 - ex1, ey2 - ey1, 1)
+            distance = max(abs((ex1 + ex2) / 2 - cx), abs((ey1 + ey2) / 2 - cy)) / size
+            if distance <= best_distance:
+                best, best_distance = episode, distance
+        return best
+
+    def _expire_locked(self, camera, now):
+        episodes = self._episodes.get(camera)
+        if not episodes:
+            return
+        gap = self.settings['episode_gap']
+        alive = []
+        for episode in episodes:
+            if now - episode.last_seen > gap:
+                self._queue.put(('close', episode))
+            else:
+                alive.append(episode)
+        self._episodes[camera] = alive
+
+    def _expire_all(self):
+        now = time.time()
+        with self._lock:
+            for camera in list(self._episodes):
+                self._expire_locked(camera, now)
+
+    def _writer_loop(self):
+        try:
+            con = self.db.connection()
+        except Exception as e:
+            self.logger.error(f"Журнал нарушений недоступен: {e}")
+            return
+
+        opens, closes = [], []
+        last_flush = time.monotonic()
+        running = True
+
+        while running:
+            try:
+                item = self._queue.get(timeout=self.settings['flush_interval'])
+                if item is self._STOP:
+                    running = False
+                else:
+                    op, episode = item
+                    if op == 'open':
+                        opens.append(self._insert_params(episode))
+                    else:
+                        closes.append((episode.last_seen, episode.frames, episode.episode_id))
+            except queue.Empty:
+                self._expire_all()
+
+            pending = len(opens) + len(closes)
+            due = time.monotonic() - last_flush >= self.settings['flush_interval']
+            if pending and (not running or due or pending >= self.settings['batch_size']):
+                self._flush(con, opens, closes)
+                opens, closes = [], []
+                last_flush = time.monotonic()
+
+        self.db.close()
+        self.logger.info("Журнал нарушений закрыт")
+
+    def _flush(self, con, opens, closes):
+        try:
+            with con:
+                if opens:
+                    con.executemany(SQL.INSERT_VIOLATION, opens)
+                if closes:
+                    con.executemany(SQL.CLOSE_VIOLATION, closes)
+            self.logger.debug(f"Журнал нарушений: записано {len(opens)} новых, закрыто {len(closes)}")
+        except Exception as e:
+            self.logger.error(f"Ошибка записи журнала нарушений: {e}")
+
+    @staticmethod
+    def _insert_params(episode):
+        x1, y1, x2, y2 = (int(v) for v in episode.area)
+        return (episode.episode_id, episode.camera, episode.model, episode.track_id,
+                episode.siz_type, episode.started_at, episode.frames, x1, y1, x2, y2)
@@ -1,9 +1,8 @@
 import cv2
-import mediapipe as mp
 
-def draw_landmarks(image, pose_results):
-    """Рисование ключевых точек YOLOv11 Pose для нескольких людей"""
-    if pose_results is None or not hasattr(pose_results, 'keypoints'):
+def draw_landmarks(image, keypoints):
+    """Рисование ключевых точек YOLOv11 Pose для нескольких людей (keypoints — массив (P, 17, 2))"""
+    if keypoints is None or not len(keypoints):
         return image
     
     # Цвета для разных людей
@@ -19,7 +18,7 @@ def draw_landmarks(image, pose_results):
         [2, 4], [3, 5], [4, 6], [5, 7]
     ]
     
-    for i, kpts in enumerate(pose_results.keypoints.xy.cpu().numpy()):
+    for i, kpts in enumerate(keypoints):
         color = colors[i % len(colors)]
         
         # Рисуем соединения (скелет)
@@ -0,0 +1,262 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bisect
+import os
+import threading
+from core.utils.logger import AppLogger
+
+
+class _Child:
+    """Значение метрики для одного набора меток.
+
+    Одни и те же метки (тип источника, класс СИЗ) обновляются из нескольких
+    потоков, а += не атомарно, поэтому inc() идет под блокировкой своего
+    набора меток; чтение при экспорте допускает несогласованность в пределах
+    одного кадра.
+    """
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Metric:
+    def __init__(self, name, documentation, metric_type, labelnames=(), buckets=None):
+        self.name = name
+        self.documentation = documentation
+        self.type = metric_type
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Возвращает (и кэширует) дочернюю метрику; блокировка только при первом обращении"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = _HistogramChild(self.buckets) if self.type == 'histogram' else _Child()
+                    self._children[values] = child
+        return child
+
+    def remove(self, *values):
+        with self._lock:
+            self._children.pop(values, None)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for values, child in list(self._children.items()):
+            labels = self._format_labels(values)
+            if self.type == 'histogram':
+                cumulative = 0
+                for bound, count in zip(list(self.buckets) + ['+Inf'], list(child.counts)):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{{{labels + ',' if labels else ''}{le}}} {cumulative}")
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{self.name}_sum{suffix} {child.sum}")
+                lines.append(f"{self.name}_count{suffix} {child.count}")
+            else:
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{self.name}{suffix} {child.value}")
+        return lines
+
+    def _format_labels(self, values):
+        return ",".join(f'{name}="{self._escape(value)}"' for name, value in zip(self.labelnames, values))
+
+    @staticmethod
+    def _escape(value):
+        return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Реестр метрик в текстовом формате Prometheus.
+
+    Отдается по HTTP (/metrics) и/или периодически записывается в файл для
+    textfile-коллектора node_exporter.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self.logger = AppLogger.get_logger()
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._textfile_thread = None
+        self._stop_event = threading.Event()
+
+    def _register(self, name, documentation, metric_type, labelnames, buckets=None):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Metric(name, documentation, metric_type, labelnames, buckets)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(name, documentation, 'counter', labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(name, documentation, 'gauge', labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=None):
+        return self._register(name, documentation, 'histogram', labelnames, buckets)
+
+    def expose(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, host, port):
+        if self._server is not None:
+            return
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.expose().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Запросы Prometheus не засоряют журнал
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="MetricsHTTP", daemon=True).start()
+        self.logger.info(f"Метрики Prometheus: http://{host}:{port}/metrics")
+
+    def start_textfile_exporter(self, path, interval):
+        if self._textfile_thread is not None:
+            return
+        self._stop_event.clear()
+        self._textfile_thread = threading.Thread(
+            target=self._textfile_loop, args=(path, interval), name="MetricsTextfile", daemon=True
+        )
+        self._textfile_thread.start()
+        self.logger.info(f"Метрики Prometheus записываются в {path}")
+
+    def write_textfile(self, path):
+        """Атомарная запись (node_exporter не должен прочитать файл наполовину)"""
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.expose())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.error(f"Ошибка записи метрик в {path}: {str(e)}")
+
+    def _textfile_loop(self, path, interval):
+        while not self._stop_event.wait(interval):
+            self.write_textfile(path)
+        self.write_textfile(path)
+
+    def start_exporters(self, settings):
+        """Запуск экспортеров по настройкам вида Config.PROMETHEUS_SETTINGS"""
+        if settings.get('port'):
+            try:
+                self.start_http_server(settings['host'], settings['port'])
+            except OSError as e:
+                self.logger.error(f"Не удалось открыть порт метрик {settings['port']}: {str(e)}")
+        if settings.get('textfile_path'):
+            self.start_textfile_exporter(settings['textfile_path'], settings['textfile_interval'])
+
+    def stop(self):
+        self._stop_event.set()
+        if self._textfile_thread is not None:
+            self._textfile_thread.join(timeout=2)
+            self._textfile_thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Метрики конвейера (общие для GUI и headless-режима)
+_registry = MetricsRegistry.instance()
+
+FRAMES_PROCESSED = _registry.counter('ppe_frames_processed_total', "Обработанные кадры", ['camera'])
+FRAMES_DROPPED = _registry.counter('ppe_frames_dropped_total', "Пропущенные кадры", ['camera'])
+FPS = _registry.gauge('ppe_fps', "Фактическая частота обработки кадров", ['camera'])
+STAGE_LATENCY = _registry.histogram(
+    'ppe_stage_latency_seconds', "Длительность этапов обработки кадра", ['camera', 'stage'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+RECONNECTS = _registry.counter('ppe_reconnects_total', "Переподключения к источнику", ['camera'])
+WORKER_RESTARTS = _registry.counter('ppe_worker_restarts_total', "Перезапуски процессов камер", ['camera'])
+SOURCE_OPENS = _registry.counter('ppe_source_opens_total', "Попытки открытия источника", ['source_type', 'result'])
+CAPTURE_FAILURES = _registry.counter('ppe_capture_failures_total', "Неудачные чтения кадра", ['source_type'])
+PEOPLE = _registry.gauge('ppe_people_count', "Людей в последнем кадре", ['camera'])
+VIOLATION_FRAMES = _registry.counter('ppe_violation_frames_total', "Кадры с отсутствующими СИЗ", ['camera'])
+MISSING_ITEMS = _registry.counter('ppe_missing_items_total', "Отсутствующие СИЗ по кадрам", ['camera', 'siz_type'])
+VIOLATION_EPISODES = _registry.counter('ppe_violation_episodes_total', "Начатые эпизоды нарушений", ['camera', 'siz_type'])
+SIZ_CHECKS = _registry.counter('ppe_siz_checks_total', "Проверки СИЗ по боксам детектора", ['siz_type', 'result'])
+CAMERA_FROZEN = _registry.gauge('ppe_camera_frozen', "Изображение камеры не меняется (1 — зависла)", ['camera'])
+FREEZES = _registry.counter('ppe_camera_freezes_total', "Зависания камеры", ['camera'])
+FRAMES_REUSED = _registry.counter('ppe_frames_reused_total', "Кадры-повторы без инференса", ['camera'])
+
+
+def record_frame(camera, people_count, missing_areas, opened_episodes=(), reused=False):
+    """Метрики кадра, общие для VideoProcessor и headless-потоков; reused — повтор без инференса"""
+    FRAMES_PROCESSED.labels(camera).inc()
+    if reused:
+        FRAMES_REUSED.labels(camera).inc()
+    PEOPLE.labels(camera).set(people_count)
+    if missing_areas:
+        VIOLATION_FRAMES.labels(camera).inc()
+        for _, siz_type in missing_areas:
+            MISSING_ITEMS.labels(camera, siz_type).inc()
+    for episode in opened_episodes:
+        VIOLATION_EPISODES.labels(camera, episode.siz_type).inc()
+
+
+def record_freeze(camera, frozen):
+    """Событие зависания камеры ('frozen') или возобновления изображения"""
+    CAMERA_FROZEN.labels(camera).set(1 if frozen else 0)
+    if frozen:
+        FREEZES.labels(camera).inc()
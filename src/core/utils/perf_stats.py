@@ -0,0 +1,112 @@
+from collections import deque
+import os
+import time
+import numpy as np
+
+
+class LatencyStats:
+    """Накопитель длительностей этапа с перцентилями (в миллисекундах).
+
+    maxlen ограничивает окно для долгоживущих счетчиков; None — хранить все
+    замеры (бенчмарки).
+    """
+
+    def __init__(self, maxlen=None):
+        self.samples = deque(maxlen=maxlen)
+        self.total_count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.total_count += 1
+
+    def clear(self):
+        self.samples.clear()
+
+    def summary(self):
+        if not self.samples:
+            return {'count': 0}
+        values = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples)) * 1000.0
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        mean = float(values.mean())
+        return {
+            'count': len(values),
+            'mean_ms': round(mean, 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(values.max()), 3),
+            'fps': round(1000.0 / mean, 2) if mean > 0 else None
+        }
+
+
+class ResourceSampler:
+    """CPU% процесса между вызовами sample() и текущий RSS.
+
+    Использует psutil, если он установлен, иначе process_time и /proc (Linux).
+    """
+
+    def __init__(self):
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+        self.reset()
+
+    def reset(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def sample(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        elapsed = wall - self._wall
+        cpu_percent = (cpu - self._cpu) / elapsed * 100.0 if elapsed > 0 else 0.0
+        self._wall, self._cpu = wall, cpu
+        rss = self.rss_bytes()
+        return {
+            'cpu_percent': round(cpu_percent, 1),
+            'rss_mb': round(rss / (1 << 20), 1) if rss is not None else None
+        }
+
+    def rss_bytes(self):
+        if self._process is not None:
+            return self._process.memory_info().rss
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+
+def process_memory(pid=None):
+    """Память процесса в МБ: rss, pss (доля общих страниц) и uss (только собственные страницы).
+
+    uss — прирост памяти, который дает процесс сверх общих с родителем
+    страниц (например, весов моделей, унаследованных через fork).
+    Читает /proc/<pid>/smaps_rollup (Linux), иначе psutil; None, если недоступно.
+    """
+    pid = pid or os.getpid()
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) * 1024
+    except OSError:
+        try:
+            import psutil
+            info = psutil.Process(pid).memory_full_info()
+            fields = {'Rss': info.rss, 'Pss': getattr(info, 'pss', 0),
+                      'Private_Clean': getattr(info, 'uss', 0), 'Private_Dirty': 0}
+        except Exception:
+            return None
+
+    to_mb = lambda value: round(value / (1 << 20), 1)
+    uss = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {
+        'rss_mb': to_mb(fields.get('Rss', 0)),
+        'pss_mb': to_mb(fields.get('Pss', 0)),
+        'uss_mb': to_mb(uss),
+        'shared_mb': to_mb(fields.get('Rss', 0) - uss)
+    }
@@ -0,0 +1,154 @@
+from contextlib import contextmanager
+import bisect
+import threading
+import time
+from core.utils.perf_stats import LatencyStats
+from core.utils import metrics_registry
+from core.utils.tracer import TRACER
+
+
+class PipelineMetrics:
+    """Замеры этапов обработки кадра.
+
+    По каждому этапу хранится скользящее окно длительностей (перцентили для
+    оверлея и строки состояния) и накопительная гистограмма по фиксированным
+    границам (для экспорта), а также окно полного времени обработки кадра —
+    суммы этапов между вызовами frame_done(). Методы потокобезопасны — один
+    экземпляр можно разделять между потоками headless-режима.
+    """
+
+    STAGES = ('capture', 'preprocess', 'pose', 'detection', 'compliance', 'drawing', 'conversion', 'display')
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+    def __init__(self, window=300):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._histograms = {}
+        self._sums = {}
+        self._frame_times = LatencyStats(maxlen=window)
+        self._frame_latency = LatencyStats(maxlen=window)  # Сумма этапов каждого кадра
+        self._frame_work = 0.0  # Время этапов с последнего frame_done()
+        self._last_frame = None
+        self.frames = 0
+        self.camera = None
+        self._exported = None  # {stage: гистограмма Prometheus} после export_to()
+        self._fps_gauge = None
+        self._fps_ema = 0.0
+
+    def export_to(self, camera):
+        """Дублирует замеры в метрики Prometheus с меткой camera"""
+        with self._lock:
+            self.camera = camera
+            self._exported = {}
+            self._fps_gauge = metrics_registry.FPS.labels(camera)
+            self._fps_ema = 0.0
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            self.record(name, duration / 1e9)
+            if TRACER.enabled:
+                TRACER.add_complete(name, 'pipeline', start, duration)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = LatencyStats(maxlen=self.window)
+                self._histograms[name] = [0] * (len(self.BUCKETS_MS) + 1)
+                self._sums[name] = 0.0
+            stats.add(seconds)
+            self._histograms[name][bisect.bisect_left(self.BUCKETS_MS, seconds * 1000.0)] += 1
+            self._sums[name] += seconds
+            self._frame_work += seconds
+            if self._exported is not None:
+                histogram = self._exported.get(name)
+                if histogram is None:
+                    histogram = self._exported[name] = metrics_registry.STAGE_LATENCY.labels(self.camera, name)
+                histogram.observe(seconds)
+
+    def frame_done(self):
+        """Отмечает конец обработки кадра: интервал между кадрами дает реальный FPS"""
+        now = time.perf_counter()
+        with self._lock:
+            if self._last_frame is not None:
+                interval = now - self._last_frame
+                self._frame_times.add(interval)
+                if self._fps_gauge is not None and interval > 0:
+                    # Сглаженный FPS без пересчета перцентилей на каждом кадре
+                    self._fps_ema = 1.0 / interval if not self._fps_ema else 0.9 * self._fps_ema + 0.1 / interval
+                    self._fps_gauge.set(round(self._fps_ema, 2))
+            self._last_frame = now
+            self._frame_latency.add(self._frame_work)
+            self._frame_work = 0.0
+            self.frames += 1
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._histograms.clear()
+            self._sums.clear()
+            self._frame_times.clear()
+            self._frame_latency.clear()
+            self._frame_work = 0.0
+            self._last_frame = None
+            self.frames = 0
+
+    def fps(self):
+        with self._lock:
+            summary = self._frame_times.summary()
+        return summary.get('fps') or 0.0
+
+    def snapshot(self):
+        """Сводка для экспорта: FPS, перцентили по этапам и накопительные гистограммы"""
+        with self._lock:
+            frame_summary = self._frame_times.summary()
+            latency_summary = self._frame_latency.summary()
+            stages = {}
+            for name in self._ordered_names():
+                stages[name] = dict(
+                    self._stages[name].summary(),
+                    total=self._stages[name].total_count,
+                    sum_seconds=round(self._sums[name], 6),
+                    histogram=dict(zip([str(b) for b in self.BUCKETS_MS] + ['+Inf'], self._histograms[name]))
+                )
+            return {
+                'frames': self.frames,
+                'fps': frame_summary.get('fps') or 0.0,
+                'frame_interval_p95_ms': frame_summary.get('p95_ms'),
+                'frame_latency_p95_ms': latency_summary.get('p95_ms'),
+                'buckets_ms': list(self.BUCKETS_MS),
+                'stages': stages
+            }
+
+    def overlay_lines(self):
+        """Короткие строки для оверлея на видео"""
+        snapshot = self.snapshot()
+        total = sum(s.get('mean_ms', 0) for s in snapshot['stages'].values())
+        lines = [f"FPS {snapshot['fps']:.1f} | {total:.1f} ms"]
+        for name, stats in snapshot['stages'].items():
+            if stats.get('count'):
+                lines.append(f"{name}: {stats['p50_ms']:.1f} / p95 {stats['p95_ms']:.1f} ms")
+        return lines
+
+    def status_text(self):
+        """Одна строка для строки состояния"""
+        snapshot = self.snapshot()
+        stages = snapshot['stages']
+        slowest = max(stages.items(), key=lambda item: item[1].get('mean_ms', 0), default=None)
+        text = f"FPS: {snapshot['fps']:.1f}"
+        latency_p95 = snapshot['frame_latency_p95_ms']
+        if latency_p95 is not None:
+            text += f" | задержка p95: {latency_p95:.0f} мс"
+        if slowest and slowest[1].get('count'):
+            text += f" | узкое место: {slowest[0]} ({slowest[1]['mean_ms']:.1f} мс)"
+        return text
+
+    def _ordered_names(self):
+        known = [name for name in self.STAGES if name in self._stages]
+        return known + sorted(name for name in self._stages if name not in self.STAGES)
@@ -0,0 +1,34 @@
+import threading
+import time
+from core.utils.logger import AppLogger
+
+class StartupTimer:
+    """Замер длительности этапов запуска приложения"""
+
+    def __init__(self):
+        self.logger = AppLogger.get_logger()
+        self._start = time.perf_counter()
+        self._last = self._start
+        self._stages = []
+        self._lock = threading.Lock()
+
+    def mark(self, stage):
+        """Фиксирует этап, длившийся с предыдущей отметки (для последовательных шагов)"""
+        now = time.perf_counter()
+        with self._lock:
+            self._stages.append((stage, now - self._last))
+            self._last = now
+
+    def record(self, stage, seconds):
+        """Добавляет этап с известной длительностью (для фоновых задач)"""
+        with self._lock:
+            self._stages.append((stage, seconds))
+
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def log_summary(self):
+        with self._lock:
+            stages = list(self._stages)
+        lines = [f"  {stage}: {seconds:.2f} сек" for stage, seconds in stages]
+        self.logger.info(f"Запуск завершен за {self.elapsed():.2f} сек:\n" + "\n".join(lines))
@@ -0,0 +1,126 @@
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import os
+import signal
+import threading
+import time
+from config import Config
+from core.utils.logger import AppLogger
+
+
+class _NullSpan:
+    """Пустой контекст — единственная стоимость выключенной трассировки"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Запись интервалов этапов в формате Chrome Trace Event (chrome://tracing, Perfetto).
+
+    Пока трассировка выключена, span() возвращает общий пустой контекст.
+    Во включенном состоянии события копятся в deque фиксированной длины
+    (старые вытесняются), а при выключении записываются в JSON-файл.
+    """
+
+    def __init__(self, settings=None):
+        self.logger = AppLogger.get_logger()
+        self.settings = settings or Config.TRACE_SETTINGS
+        self.enabled = False
+        self._events = deque(maxlen=self.settings['max_events'])
+        self._threads = {}
+        # RLock: обработчик сигнала выполняется в главном потоке и может прервать его же start()/stop()
+        self._lock = threading.RLock()
+        self._started_at = None
+
+    def span(self, name, category='pipeline', **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._record(name, category, args)
+
+    @contextmanager
+    def _record(self, name, category, args):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add_complete(name, category, start, time.perf_counter_ns() - start, args)
+
+    def add_complete(self, name, category, start_ns, duration_ns, args=None):
+        """Событие 'X' (начало + длительность) для текущего потока"""
+        if not self.enabled:
+            return
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        event = {
+            'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+            'ts': start_ns // 1000, 'dur': duration_ns // 1000
+        }
+        if args:
+            event['args'] = args
+        self._events.append(event)
+
+    def start(self):
+        with self._lock:
+            if self.enabled:
+                return
+            self._events.clear()
+            self._threads.clear()
+            self._started_at = datetime.now()
+            self.enabled = True
+        self.logger.info(f"Трассировка включена (не более {self._events.maxlen} событий)")
+
+    def stop(self):
+        """Выключает трассировку и сохраняет файл; возвращает путь к нему"""
+        with self._lock:
+            if not self.enabled:
+                return None
+            self.enabled = False
+            events = list(self._events)
+            threads = dict(self._threads)
+
+        pid = os.getpid()  # Процесс камеры после fork пишет свой pid, а не родителя
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in threads.items()
+        ]
+        path = os.path.join(self.settings['output_dir'], f"trace_{self._started_at:%Y-%m-%d_%H-%M-%S}.json")
+        try:
+            os.makedirs(self.settings['output_dir'], exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+            self.logger.info(f"Трассировка сохранена: {path} ({len(events)} событий)")
+            return path
+        except Exception as e:
+            self.logger.error(f"Ошибка сохранения трассировки: {str(e)}")
+            return None
+
+    def toggle(self):
+        """Переключает трассировку; при выключении возвращает путь к файлу"""
+        with self._lock:
+            if self.enabled:
+                return self.stop()
+            self.start()
+            return None
+
+    def install_signal_handler(self):
+        """Переключение трассировки сигналом (по умолчанию SIGUSR2, только POSIX)"""
+        signum = getattr(signal, self.settings['signal'], None)
+        if signum is None:
+            return False
+        signal.signal(signum, lambda *_: self.toggle())
+        self.logger.info(f"Трассировка переключается сигналом {self.settings['signal']}")
+        return True
+
+
+TRACER = Tracer()
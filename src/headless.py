@@ -0,0 +1,73 @@
+import argparse
+import logging
+import os
+import signal
+import sys
+from core.utils.logger import AppLogger
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Контроль СИЗ без графического интерфейса")
+    parser.add_argument('--camera', action='append', dest='cameras',
+                        help="Имя камеры из ppe.db (можно указать несколько раз; по умолчанию — все)")
+    parser.add_argument('--metrics-file', default=None,
+                        help="JSON со сводкой метрик этапов (по умолчанию data/metrics/headless.json)")
+    parser.add_argument('--prometheus-port', type=int, default=None, help="Порт HTTP-эндпоинта /metrics")
+    parser.add_argument('--prometheus-host', default=None, help="Адрес HTTP-эндпоинта /metrics")
+    parser.add_argument('--prometheus-textfile', default=None,
+                        help="Файл .prom для textfile-коллектора node_exporter")
+    parser.add_argument('--processes', action='store_true',
+                        help="Отдельный процесс на камеру (кадры передаются через shared_memory)")
+    parser.add_argument('--db', default=None, help="Путь к ppe.db (по умолчанию data/config/ppe.db)")
+    return parser.parse_args()
+
+def prometheus_settings(args):
+    settings = {}
+    if args.prometheus_port:
+        settings['port'] = args.prometheus_port
+    if args.prometheus_host:
+        settings['host'] = args.prometheus_host
+    if args.prometheus_textfile:
+        settings['textfile_path'] = args.prometheus_textfile
+    return settings
+
+def main():
+    args = parse_args()
+    logger = AppLogger.get_logger()
+
+    # Дублируем журнал в stdout для systemd/docker
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(asctime)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+    logger.addHandler(console)
+    logger.info("Запуск в headless-режиме")
+
+    # Добавление корневой директории в PYTHONPATH
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.append(root_dir)
+
+    from core.processing.headless_service import HeadlessService
+
+    service = HeadlessService(storage_path=args.db, camera_names=args.cameras,
+                              metrics_path=args.metrics_file,
+                              prometheus_settings=prometheus_settings(args),
+                              mode='processes' if args.processes else None)
+
+    def handle_signal(signum, frame):
+        logger.info(f"Получен сигнал {signal.Signals(signum).name}, остановка...")
+        service.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    from core.utils.tracer import TRACER
+    TRACER.install_signal_handler()
+
+    if not service.start():
+        service.shutdown()
+        sys.exit(1)
+
+    service.run_forever()
+    TRACER.stop()
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,19 @@
 import sys
 import os
-import cv2
 from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtCore import QSettings
 from config import Config
 from core.utils.logger import AppLogger
+from core.utils.startup_timer import StartupTimer
 from PyQt6.QtGui import QIcon
 
 def check_camera():
     """Проверка доступности камеры"""
+    import cv2
     logger = AppLogger.get_logger()
     cap = cv2.VideoCapture(Config.CAMERA_INDEX)
     if not cap.isOpened():
+        cap.release()
         logger.warning("Камера не доступна")
         return False
     cap.release()
@@ -66,11 +68,14 @@ def check_models():
         logger.error(f"Ошибка проверки моделей: {str(e)}", exc_info=True)
         return False
 
-def show_warning_messages(app):
+def preload_ultralytics():
+    """Импорт ultralytics/torch заранее, чтобы активация модели не ждала его"""
+    import ultralytics  # noqa: F401
+    return True
+
+def show_warning_messages(app, camera_available):
     """Показать предупреждения (но не блокировать запуск)"""
-    # Проверка камеры
-    cap = cv2.VideoCapture(Config.CAMERA_INDEX)
-    if not cap.isOpened():
+    if not camera_available:
         msg_box = QMessageBox()
         msg_box.setWindowTitle("Предупреждение")
         msg_box.setText("Камера не доступна! Некоторые функции будут недоступны.")
@@ -82,11 +87,11 @@ def show_warning_messages(app):
             msg_box.setStyleSheet(app.styleSheet())
             
         msg_box.exec()
-    cap.release()
 
 def main():
     logger = AppLogger.get_logger()
     logger.info("Запуск приложения")
+    timer = StartupTimer()
     
     # Добавление корневой директории в PYTHONPATH
     root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -106,26 +111,49 @@ def main():
     settings = QSettings("MyCompany", "SIZDetector")
     dark_mode = settings.value("dark_mode", False, type=bool)
     app.setProperty("class", "dark-mode" if dark_mode else "")
-
-    # Показать предупреждения (не блокирующие)
-    show_warning_messages(app)
+    timer.mark("Qt и стили")
     
     try:
         from src.core.controllers.main_controller import MainController
         from src.ui.ui_window import MainWindowUI
+        from core.controllers.startup_loader import StartupLoader
         
         # Создание окна ПОСЛЕ применения стилей
         window = MainWindowUI()
         controller = MainController(window)
 
         window.show()
-        status_message = "Система инициализирована"
-        if not check_camera():
-            status_message += " (камера не доступна)"
-        if not check_models():
-            status_message += " (модели не найдены)"
-        
-        window.statusBar().showMessage(status_message, 3000)
+        timer.mark("Главное окно")
+
+        # Тяжелые шаги (torch, модель позы, камера, модели) — в фоне, окно уже отзывчиво
+        loader = StartupLoader([
+            ('ultralytics', "Загрузка ultralytics/torch", preload_ultralytics),
+            ('pose', "Загрузка модели позы", controller.detection_controller.pose.load),
+            ('camera', "Проверка камеры", check_camera),
+            ('models', "Проверка моделей", check_models),
+        ], timer=timer)
+        status_bar = window.ui_builder.status_bar
+
+        def on_startup_finished(results):
+            status_bar.hide_progress()
+            status_message = "Система инициализирована"
+            if not results.get('camera'):
+                status_message += " (камера не доступна)"
+            if not results.get('models'):
+                status_message += " (модели не найдены)"
+            status_bar.show_message(status_message, 3000)
+            timer.log_summary()
+
+            # Показать предупреждения (не блокирующие)
+            show_warning_messages(app, bool(results.get('camera')))
+
+        loader.progress.connect(status_bar.show_progress)
+        loader.finished.connect(on_startup_finished)
+        loader.start()
+
+        from core.utils.tracer import TRACER
+        TRACER.install_signal_handler()
+
         sys.exit(app.exec())
     except Exception as e:
         logger.error(f"Не удалось запустить приложение: {str(e)}", exc_info=True)
@@ -5,6 +5,7 @@ import shutil
 import yaml
 from src.config import Config
 from core.utils.logger import AppLogger
+from core.models.model_registry import ModelRegistry
 
 class ModelHandler(QObject):
     model_loaded = pyqtSignal(str, dict)
@@ -17,6 +18,8 @@ class ModelHandler(QObject):
         self._current_model = None
         self._model_activated = False
         self.yolo = None
+        self.registry = ModelRegistry.instance()
+        self.registry.add_listener(self.models_updated.emit)
 
     def current_model(self):
         return self._current_model
@@ -25,11 +28,7 @@ class ModelHandler(QObject):
         return self._model_activated and bool(self._current_model)
     
     def refresh_models_list(self):
-        if not os.path.exists(Config.MODELS_DIR):
-            os.makedirs(Config.MODELS_ROOT, exist_ok=True)
-            return []
-            
-        return sorted(Config.get_available_models().keys())
+        return sorted(self.registry.get_available_models().keys())
     
     def get_available_models(self):
         """Возвращает словарь доступных моделей"""
@@ -48,6 +47,7 @@ class ModelHandler(QObject):
                 return False
                 
             os.rename(old_dir, new_dir)
+            self.registry.invalidate()
             self.models_updated.emit()
             return True
         except Exception as e:
@@ -91,6 +91,7 @@ class ModelHandler(QObject):
             model_dir = os.path.join(Config.MODELS_ROOT, model_name)
             if os.path.exists(model_dir):
                 shutil.rmtree(model_dir)
+                self.registry.invalidate()
                 self.models_updated.emit()
                 return True
             return False
@@ -123,14 +124,13 @@ class ModelHandler(QObject):
             
         try:
             self.model_loading.emit(model_name)
-            models = Config.get_available_models()
+            # Хэш весов считается здесь, при первой загрузке модели, а не при сканировании папки
+            model_info = self.registry.get_model_info(model_name)
             
-            if model_name not in models:
+            if model_info is None:
                 error_msg = f"Модель {model_name} не найдена"
                 self.logger.error(error_msg)
                 raise ValueError(error_msg)
-                
-            model_info = models[model_name]
             
             # Проверка файлов модели
             if not os.path.exists(model_info['pt_file']):
@@ -197,6 +197,7 @@ class ModelHandler(QObject):
                 shutil.copy2(src, dst)
 
             self.logger.info(f"Модель '{model_name}' успешно добавлена")
+            self.registry.invalidate()
             self.models_updated.emit()
             return True
             
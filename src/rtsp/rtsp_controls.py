@@ -38,7 +38,8 @@ class RtspControls(QWidget):
         
         if dialog.exec():
             data = dialog.get_data()
-            if self.manager.rtsp_storage.add_rtsp(data["name"], data["url"], data["comment"], data["model"]):
+            if self.manager.rtsp_storage.add_rtsp(data["name"], data["url"], data["comment"], data["model"],
+                                                  data["profile"], data["record_url"]):
                 self.manager.load_data()
                 self.manager.data_changed.emit()
             else:
@@ -66,11 +67,16 @@ class RtspControls(QWidget):
         dialog.comment_input.setPlainText(selected['comment'])
         if 'model' in selected:
             dialog.set_model(selected['model'])
+        camera = self.manager.rtsp_storage.get_rtsp(selected['name'])
+        if camera:
+            dialog.record_url_input.setText(camera['record_url'] or "")
+            dialog.set_profile(camera['profile'])
         
         if dialog.exec():
             new_data = dialog.get_data()
             if (self.manager.rtsp_storage.remove_rtsp(selected['name']) and 
-                self.manager.rtsp_storage.add_rtsp(new_data["name"], new_data["url"], new_data["comment"], new_data["model"])):
+                self.manager.rtsp_storage.add_rtsp(new_data["name"], new_data["url"], new_data["comment"], new_data["model"],
+                                                   new_data["profile"], new_data["record_url"])):
                 self.manager.load_data()
                 self.manager.data_changed.emit()
             else:
@@ -1,9 +1,15 @@
+import json
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QFormLayout, 
-    QLineEdit, QTextEdit, QDialogButtonBox, QMessageBox, QComboBox
+    QLineEdit, QTextEdit, QDialogButtonBox, QMessageBox, QComboBox,
+    QSpinBox, QDoubleSpinBox, QGroupBox, QCheckBox, QHBoxLayout
 )
 from PyQt6.QtCore import Qt
+from config import Config
 from core.utils.rtsp_validator import RtspValidator
+from core.detection.inference_profile import InferenceProfile, SIZ_TYPES
+
+SIZ_LABELS = {'glasses': 'Очки', 'glove': 'Перчатки', 'helmet': 'Каска', 'pants': 'Штаны', 'vest': 'Жилет'}
 
 
 class RtspEditDialog(QDialog):
@@ -30,6 +36,11 @@ class RtspEditDialog(QDialog):
         form.addRow("URL:", self.url_input)
         self.url_input.textChanged.connect(self._validate_url)
 
+        # Основной поток: декодируется только на время записи нарушения
+        self.record_url_input = QLineEdit()
+        self.record_url_input.setPlaceholderText("Необязательно: основной поток камеры для записи нарушений")
+        form.addRow("URL для записи:", self.record_url_input)
+
         # Поле для комментария
         self.comment_input = QTextEdit()
         form.addRow("Комментарий:", self.comment_input)
@@ -37,6 +48,55 @@ class RtspEditDialog(QDialog):
         # Комбобокс для выбора модели
         self.model_combo = QComboBox()
         form.addRow("Привязать модель:", self.model_combo)
+
+        # Профиль инференса камеры (0 / пусто — значение по умолчанию)
+        profile_group = QGroupBox("Профиль инференса")
+        profile_form = QFormLayout()
+
+        self.imgsz_input = QSpinBox()
+        self.imgsz_input.setRange(0, 1920)
+        self.imgsz_input.setSingleStep(32)
+        self.imgsz_input.setSpecialValueText("по умолчанию")
+        profile_form.addRow("Размер входа (imgsz):", self.imgsz_input)
+
+        self.conf_input = QDoubleSpinBox()
+        self.conf_input.setRange(0.0, 1.0)
+        self.conf_input.setSingleStep(0.05)
+        self.conf_input.setDecimals(2)
+        self.conf_input.setSpecialValueText("по умолчанию")
+        profile_form.addRow("Порог уверенности:", self.conf_input)
+
+        self.stride_input = QSpinBox()
+        self.stride_input.setRange(1, 30)
+        profile_form.addRow("Анализировать каждый N-й кадр:", self.stride_input)
+
+        self.roi_input = QLineEdit()
+        self.roi_input.setPlaceholderText("x1,y1,x2,y2 в долях кадра, например 0,0.2,1,1")
+        profile_form.addRow("Область анализа (ROI):", self.roi_input)
+
+        # Обязательные СИЗ: модель ищет и проверяются только отмеченные классы
+        siz_layout = QHBoxLayout()
+        self.siz_checks = {}
+        for siz_type in SIZ_TYPES:
+            check = QCheckBox(SIZ_LABELS[siz_type])
+            check.setChecked(True)
+            self.siz_checks[siz_type] = check
+            siz_layout.addWidget(check)
+        profile_form.addRow("Обязательные СИЗ:", siz_layout)
+
+        self.siz_params_input = QLineEdit()
+        self.siz_params_input.setPlaceholderText('{"helmet": {"min_coverage": 0.4}}')
+        profile_form.addRow("Пороги СИЗ (JSON):", self.siz_params_input)
+
+        self.zones_input = QLineEdit()
+        self.zones_input.setPlaceholderText('[{"name": "цех", "points": [[0,0.4],[1,0.4],[1,1],[0,1]], "siz": ["helmet"]}]')
+        self.zones_input.setToolTip("Вне рабочих зон СИЗ не проверяются; вершины — доли кадра, siz — обязательные в зоне СИЗ")
+        profile_form.addRow("Рабочие зоны (JSON):", self.zones_input)
+
+        self.cascade_check = QCheckBox("СИЗ на вырезках людей (для мелких людей на большом кадре)")
+        profile_form.addRow("Каскад:", self.cascade_check)
+
+        profile_group.setLayout(profile_form)
         
         # Кнопки OK/Cancel
         self.buttons = QDialogButtonBox(
@@ -53,6 +113,7 @@ class RtspEditDialog(QDialog):
         self.buttons.rejected.connect(self.reject)
         
         layout.addLayout(form)
+        layout.addWidget(profile_group)
         layout.addWidget(self.buttons)
         self.setLayout(layout)
         
@@ -95,13 +156,16 @@ class RtspEditDialog(QDialog):
             self.ok_button.setText("Сохранить изменения")
             self.name_input.setToolTip("Редактирование существующего названия RTSP потока")
             self.url_input.setToolTip("Редактирование RTSP URL. Формат: rtsp://[user:pass@]host[:port]/path")
+            self.record_url_input.setToolTip("Редактирование URL основного потока для записи нарушений")
             self.comment_input.setToolTip("Редактирование комментария")
             self.model_combo.setToolTip("Редактирование привязанной модели")
         else:
             self.setWindowTitle("Добавить новый RTSP поток")
             self.ok_button.setText("Добавить поток")
             self.name_input.setToolTip("Введите уникальное название для нового RTSP потока")
-            self.url_input.setToolTip("Введите RTSP URL. Формат: rtsp://[user:pass@]host[:port]/path")
+            self.url_input.setToolTip("Введите RTSP URL потока для анализа (лучше субпоток низкого разрешения). "
+                                      "Формат: rtsp://[user:pass@]host[:port]/path")
+            self.record_url_input.setToolTip("RTSP URL основного потока; открывается только для записи нарушений")
             self.comment_input.setToolTip("Добавьте комментарий (необязательно)")
             self.model_combo.setToolTip("Выберите модель для привязки к потоку")
 
@@ -121,6 +185,15 @@ class RtspEditDialog(QDialog):
             self.url_input.selectAll()
             return
             
+        record_url = self.record_url_input.text().strip()
+        if record_url:
+            is_valid, error_msg = RtspValidator.validate_rtsp_url(record_url)
+            if not is_valid:
+                QMessageBox.warning(self, "Ошибка", f"URL для записи: {error_msg}")
+                self.record_url_input.setFocus()
+                self.record_url_input.selectAll()
+                return
+            
         if not self.is_edit_mode and name in self.existing_names:
             QMessageBox.warning(
                 self, 
@@ -134,20 +207,68 @@ class RtspEditDialog(QDialog):
         if not self.model_combo.currentData():
             QMessageBox.warning(self, "Ошибка", "Необходимо выбрать модель для RTSP потока")
             return
+
+        try:
+            self._build_profile()
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", f"Некорректный профиль инференса: {e}")
+            return
         
         self.accept()
 
+    def _build_profile(self):
+        """Собирает InferenceProfile из полей; ValueError при неверном ROI или JSON"""
+        siz_params = self.siz_params_input.text().strip()
+        if siz_params:
+            try:
+                siz_params = json.loads(siz_params)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"пороги СИЗ не являются JSON ({e.msg})")
+            if not isinstance(siz_params, dict) or not all(isinstance(v, dict) for v in siz_params.values()):
+                raise ValueError('пороги СИЗ задаются как {"тип": {"параметр": значение}}')
+        required_siz = [siz_type for siz_type, check in self.siz_checks.items() if check.isChecked()]
+        if not required_siz:
+            raise ValueError("отметьте хотя бы один обязательный тип СИЗ")
+        cascade = self.cascade_check.isChecked()
+        return InferenceProfile(
+            imgsz=self.imgsz_input.value() or None,
+            conf=self.conf_input.value() or None,
+            stride=self.stride_input.value() if self.stride_input.value() > 1 else None,
+            roi=InferenceProfile.parse_roi(self.roi_input.text()),
+            siz_params=siz_params or None,
+            required_siz=required_siz if len(required_siz) < len(SIZ_TYPES) else None,
+            # Совпадающее с CASCADE_SETTINGS значение не сохраняется: камера следует общей настройке
+            cascade=cascade if cascade != Config.CASCADE_SETTINGS['enabled'] else None,
+            zones=InferenceProfile.parse_zones(self.zones_input.text())
+        )
+
     def get_data(self):
         """Возвращает введённые данные в виде словаря"""
         return {
             "name": self.name_input.text().strip(),
             "url": self.url_input.text().strip(),
+            "record_url": self.record_url_input.text().strip() or None,
             "comment": self.comment_input.toPlainText().strip(),
-            "model": self.model_combo.currentData()
+            "model": self.model_combo.currentData(),
+            "profile": self._build_profile()
         }
     
     def set_model(self, model_name):
         """Устанавливает выбранную модель в комбобоксе"""
-        index = self.model_combo.findData(model_name)
+        # В данных комбобокса id модели, в таблице — ее имя
+        index = self.model_combo.findText(model_name)
         if index >= 0:
-            self.model_combo.setCurrentIndex(index)
\ No newline at end of file
+            self.model_combo.setCurrentIndex(index)
+
+    def set_profile(self, profile):
+        """Заполняет поля профиля инференса камеры"""
+        imgsz, conf, stride, roi, siz_params, _, _, zones = profile.to_row()
+        self.imgsz_input.setValue(imgsz or 0)
+        self.conf_input.setValue(conf or 0.0)
+        self.stride_input.setValue(stride or 1)
+        self.roi_input.setText(roi or "")
+        self.siz_params_input.setText(siz_params or "")
+        self.zones_input.setText(zones or "")
+        for siz_type, check in self.siz_checks.items():
+            check.setChecked(siz_type in profile.siz_types)
+        self.cascade_check.setChecked(profile.use_cascade)
\ No newline at end of file
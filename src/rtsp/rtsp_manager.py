@@ -53,7 +53,8 @@ class RtspManagerDialog(QDialog):
         
         if dialog.exec() == QDialog.DialogCode.Accepted:
             data = dialog.get_data()
-            if self.rtsp_storage.add_rtsp(data['name'], data['url'], data['comment'], data['model']):
+            if self.rtsp_storage.add_rtsp(data['name'], data['url'], data['comment'], data['model'],
+                                          data['profile'], data['record_url']):
                 self.load_data()
                 self.list_updated.emit()
             else:
@@ -80,11 +81,16 @@ class RtspManagerDialog(QDialog):
         dialog.comment_input.setPlainText(selected['comment'])
         if 'model' in selected:
             dialog.set_model(selected['model'])
+        camera = self.rtsp_storage.get_rtsp(selected['name'])
+        if camera:
+            dialog.record_url_input.setText(camera['record_url'] or "")
+            dialog.set_profile(camera['profile'])
         
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_data = dialog.get_data()
             if (self.rtsp_storage.remove_rtsp(selected['name']) and 
-                self.rtsp_storage.add_rtsp(new_data['name'], new_data['url'], new_data['comment'], new_data['model'])):
+                self.rtsp_storage.add_rtsp(new_data['name'], new_data['url'], new_data['comment'], new_data['model'],
+                                           new_data['profile'], new_data['record_url'])):
                 self.load_data()
                 self.list_updated.emit()
             else:
@@ -1,44 +1,42 @@
-from pathlib import Path
-import sqlite3
-from typing import Dict
+from typing import Dict, Optional
 from core.utils.logger import AppLogger
 from core.utils.rtsp_validator import RtspValidator
-from config import Config
+from core.storage.database import Database
+from core.detection.inference_profile import DEFAULT_PROFILE
 from sql_scripts import SQL
 
 
 class RtspStorage:
     def __init__(self, storage_path: str = None):
         self.logger = AppLogger.get_logger()
-        default_path = "data/config/" + Config.DB_NAME
-        self.storage_file = Path(storage_path) if storage_path else Path(default_path)
-        self.storage_file.parent.mkdir(parents=True, exist_ok=True)
-        self._ensure_storage_exists()
+        self.db = Database.get(storage_path)
+        self.storage_file = self.db.storage_file
 
-    def _ensure_storage_exists(self):
-        """Создаёт файл хранилища, если он не существует"""
+    def add_rtsp(self, name: str, url: str, comment: str = "", model_id: int = None, profile=None,
+                 record_url: str = None) -> bool:
+        """Добавляет RTSP-поток в хранилище вместе с профилем инференса (InferenceProfile).
 
-        with sqlite3.connect(self.storage_file) as con:
-            con.executescript(SQL.INIT_DB)
-            self.logger.info(f"Создан новый файл хранилища: {self.storage_file}")
-            
-
-    def add_rtsp(self, name: str, url: str, comment: str = "", model_id: int = None) -> bool:
-        """Добавляет RTSP-поток в хранилище"""
+        url — поток для анализа (субпоток камеры), record_url — основной поток
+        для записи нарушений; без него записывается url.
+        """
         try:
             # Валидация через общий RtspValidator
             is_valid, error_msg = RtspValidator.validate_rtsp_url(url)
             if not is_valid:
                 self.logger.error(f"Некорректный RTSP URL: {error_msg}")
                 return False
-            
+            if record_url:
+                is_valid, error_msg = RtspValidator.validate_rtsp_url(record_url)
+                if not is_valid:
+                    self.logger.error(f"Некорректный RTSP URL основного потока: {error_msg}")
+                    return False
+
             self.logger.info((name, url, comment, model_id))
 
-            with sqlite3.connect(self.storage_file) as con:
-                c = con.cursor()
-                c.execute("INSERT INTO cameras (name, rtsp_source, comment, model_id) VALUES (?,?,?, ?)", (name, url, comment, model_id))
-                return True
-            
+            self.db.write(SQL.INSERT_CAMERA, (name, url, record_url or None, comment, model_id)
+                          + (profile or DEFAULT_PROFILE).to_row())
+            return True
+
         except Exception as e:
             self.logger.error(f"Ошибка добавления RTSP: {e}")
             return False
@@ -46,34 +44,25 @@ class RtspStorage:
     def get_all_rtsp(self) -> Dict[str, dict]:
         """Возвращает все RTSP-потоки из хранилища"""
         try:
-            with sqlite3.connect(self.storage_file) as con:
-                c = con.cursor()
-                c.execute("SELECT c.name, c.rtsp_source, c.comment, m.name FROM cameras c JOIN camera_models m ON c.model_id = m.id")
-                items = c.fetchall()
-                                
-                res = {
-                    name: {
-                        "url": rtsp,
-                        "comment": comment,
-                        "model": model
-                        } for name, rtsp, comment, model in items
-                }
-                
-                return res
-
+            return dict(self.db.registry.cameras())
         except Exception as e:
             self.logger.error(f"Ошибка чтения RTSP: {e}")
             return {}
 
+    def get_rtsp(self, name: str) -> Optional[dict]:
+        """Возвращает RTSP-поток по имени из кэша реестра"""
+        try:
+            return self.db.registry.get_camera(name)
+        except Exception as e:
+            self.logger.error(f"Ошибка чтения RTSP: {e}")
+            return None
+
     def remove_rtsp(self, name: str) -> bool:
         """Удаляет RTSP-поток из хранилища"""
         try:
-            with sqlite3.connect(self.storage_file) as con:
-                c = con.cursor()
-                c.execute("DELETE FROM cameras WHERE name=?", (name,))
-
+            self.db.write(SQL.DELETE_CAMERA, (name,))
             return True
 
         except Exception as e:
             self.logger.error(f"Ошибка удаления RTSP: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -18,4 +18,150 @@ class SQL:
     CREATE INDEX IF NOT EXISTS idx_name ON camera_models(name);
     CREATE INDEX IF NOT EXISTS idx_rtsp_source ON cameras(rtsp_source);
     CREATE INDEX IF NOT EXISTS idx_model_id ON cameras(model_id);
-  """
\ No newline at end of file
+
+    CREATE TABLE IF NOT EXISTS violations (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      episode_id TEXT NOT NULL UNIQUE,
+      camera TEXT NOT NULL,
+      model TEXT,
+      track_id INTEGER NOT NULL,
+      siz_type TEXT NOT NULL,
+      started_at REAL NOT NULL,
+      ended_at REAL,
+      frames INTEGER NOT NULL DEFAULT 1,
+      x1 INTEGER,
+      y1 INTEGER,
+      x2 INTEGER,
+      y2 INTEGER
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_violations_camera_time ON violations(camera, started_at);
+    CREATE INDEX IF NOT EXISTS idx_violations_time ON violations(started_at);
+    CREATE INDEX IF NOT EXISTS idx_violations_type_time ON violations(siz_type, started_at);
+
+    CREATE TABLE IF NOT EXISTS snapshots (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      episode_id TEXT NOT NULL,
+      camera TEXT NOT NULL,
+      track_id INTEGER,
+      siz_type TEXT,
+      taken_at REAL NOT NULL,
+      content_hash TEXT NOT NULL,
+      phash TEXT NOT NULL,
+      path TEXT NOT NULL,
+      thumb_path TEXT NOT NULL,
+      width INTEGER,
+      height INTEGER,
+      size INTEGER,
+      UNIQUE(episode_id, content_hash)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_snapshots_episode ON snapshots(episode_id);
+    CREATE INDEX IF NOT EXISTS idx_snapshots_camera_time ON snapshots(camera, taken_at);
+
+    -- Метаданные папок data/models (ModelRegistry); не связаны с привязкой моделей к камерам
+    CREATE TABLE IF NOT EXISTS model_metadata (
+      name TEXT PRIMARY KEY,
+      pt_file TEXT NOT NULL,
+      yaml_file TEXT NOT NULL,
+      classes TEXT,
+      pt_size INTEGER,
+      yaml_size INTEGER,
+      pt_mtime INTEGER,
+      content_hash TEXT NOT NULL
+    );
+  """
+
+  # Колонки, добавленные после первой версии схемы: {таблица: [(колонка, тип), ...]}
+  MIGRATIONS = {
+    'violations': [
+      ('clip_path', 'TEXT'),
+      ('main_clip_path', 'TEXT'),
+    ],
+    # Профиль инференса камеры: NULL — значение по умолчанию
+    'cameras': [
+      ('imgsz', 'INTEGER'),
+      ('conf', 'REAL'),
+      ('stride', 'INTEGER'),
+      ('roi', 'TEXT'),
+      ('siz_params', 'TEXT'),
+      ('required_siz', 'TEXT'),
+      ('record_source', 'TEXT'),  # Основной поток для записи; rtsp_source — субпоток для анализа
+      ('cascade', 'INTEGER'),     # 1 — СИЗ ищутся на вырезках людей, 0 — на всем кадре
+      ('zones', 'TEXT'),          # JSON рабочих зон; вне зон СИЗ не проверяются
+    ],
+  }
+
+  INSERT_VIOLATION = """
+    INSERT OR IGNORE INTO violations
+      (episode_id, camera, model, track_id, siz_type, started_at, frames, x1, y1, x2, y2)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+  """
+
+  CLOSE_VIOLATION = """
+    UPDATE violations SET ended_at = ?, frames = ? WHERE episode_id = ?
+  """
+
+  INSERT_SNAPSHOT = """
+    INSERT OR IGNORE INTO snapshots
+      (episode_id, camera, track_id, siz_type, taken_at, content_hash, phash, path, thumb_path, width, height, size)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+  """
+
+  SET_VIOLATION_CLIP = """
+    UPDATE violations SET clip_path = ? WHERE episode_id = ?
+  """
+
+  SET_VIOLATION_MAIN_CLIP = """
+    UPDATE violations SET main_clip_path = ? WHERE episode_id = ?
+  """
+  INSERT_CAMERA = """
+    INSERT INTO cameras
+      (name, rtsp_source, record_source, comment, model_id, imgsz, conf, stride, roi, siz_params, required_siz, cascade,
+       zones)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+  """
+
+  SELECT_CAMERAS = """
+    SELECT c.name, c.rtsp_source, c.record_source, c.comment, m.name, c.imgsz, c.conf, c.stride, c.roi, c.siz_params, c.required_siz,
+      c.cascade, c.zones
+    FROM cameras c JOIN camera_models m ON c.model_id = m.id
+  """
+
+  DELETE_CAMERA = """
+    DELETE FROM cameras WHERE name = ?
+  """
+
+  INSERT_MODEL = """
+    INSERT INTO camera_models (name, comment) VALUES (?, ?)
+  """
+
+  SELECT_MODELS = """
+    SELECT id, name, comment FROM camera_models
+  """
+
+  SELECT_MODEL_METADATA = """
+    SELECT name, pt_file, yaml_file, classes, pt_size, yaml_size, pt_mtime, content_hash
+    FROM model_metadata
+  """
+
+  UPSERT_MODEL_METADATA = """
+    INSERT INTO model_metadata (name, pt_file, yaml_file, classes, pt_size, yaml_size, pt_mtime, content_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(name) DO UPDATE SET
+      pt_file = excluded.pt_file,
+      yaml_file = excluded.yaml_file,
+      classes = excluded.classes,
+      pt_size = excluded.pt_size,
+      yaml_size = excluded.yaml_size,
+      pt_mtime = excluded.pt_mtime,
+      content_hash = excluded.content_hash
+  """
+
+  UPDATE_MODEL = """
+    UPDATE camera_models SET name = ?, comment = ? WHERE name = ?
+  """
+
+  DELETE_MODEL = """
+    DELETE FROM camera_models WHERE name = ?
+  """
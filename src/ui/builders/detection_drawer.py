@@ -1,5 +1,4 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 from core.utils.logger import AppLogger
 from core.utils.drawing_utils import draw_landmarks  # Импорт оригинальной функции
@@ -9,9 +8,6 @@ class DetectionDrawer:
         self.logger = AppLogger.get_logger()
         self.detectors = {}
         self.show_landmarks = False
-        self.drawing_spec = mp.solutions.drawing_utils.DrawingSpec(
-            color=(0, 255, 0), thickness=1, circle_radius=1
-        )
 
     def set_show_landmarks(self, show):
         """Устанавливает флаг отображения ключевых точек"""
@@ -21,35 +17,43 @@ class DetectionDrawer:
         self.detectors['yolo'] = yolo
         self.detectors['siz'] = siz
 
-    def draw_detections(self, frame, boxes, statuses, model_type, pose_results=None, missing_areas=None):
-        if boxes is None or not hasattr(boxes, 'xyxy'):
+    def draw_detections(self, frame, detections, statuses, model_type, missing_areas=None):
+        """detections — DetectionFrame кадра: боксы, их классы и уверенность, позы людей"""
+        if detections is None or not len(detections):
             self.logger.warning("No boxes to draw")
             # Рисуем отсутствующие СИЗ, даже если нет боксов
             if missing_areas:
                 frame = self.draw_missing_siz(frame, missing_areas)
             # Рисуем ключевые точки, если включено
-            if self.show_landmarks and pose_results:
-                frame = self.draw_landmarks(frame, pose_results)
+            if self.show_landmarks and detections is not None and detections.people:
+                frame = self.draw_landmarks(frame, detections)
             return frame
             
         class_names = self.detectors['yolo'].class_names.get(model_type, [])
+        count = len(detections)
         
         if isinstance(statuses, str):  # "nothing"
-            statuses = [False] * len(boxes.xyxy)
+            statuses = [False] * count
         elif isinstance(statuses, (bool, int, float)):
-            statuses = [bool(statuses)] * len(boxes.xyxy)
+            statuses = [bool(statuses)] * count
         elif not hasattr(statuses, '__iter__'):
-            statuses = [False] * len(boxes.xyxy)
+            statuses = [False] * count
         
-        self.logger.debug(f"Drawing {len(boxes.xyxy)} boxes with statuses: {statuses}")
+        self.logger.debug(f"Drawing {count} boxes with statuses: {statuses}")
         
-        for i, box in enumerate(boxes.xyxy):
+        # Одно преобразование на кадр вместо вызовов на каждый бокс
+        boxes = detections.xyxy.astype(int).tolist()
+        cls_ids = detections.cls.tolist()
+        confs = detections.conf.tolist()
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
             try:
-                x1, y1, x2, y2 = map(int, box.cpu().numpy())
-                status = bool(statuses[i]) if i < len(statuses) else False
+                status = statuses[i] if i < len(statuses) else False
+                if status is None:
+                    continue  # Бокс не проверялся (вне рабочих зон или СИЗ не обязательно)
+                status = bool(status)
                 
-                cls_id = int(boxes.cls[i].cpu().numpy()) if i < len(boxes.cls) else 0
-                conf = float(boxes.conf[i].cpu().numpy()) if i < len(boxes.conf) else 0.0
+                cls_id = cls_ids[i]
+                conf = confs[i]
                 class_name = str(class_names[cls_id]) if (class_names and cls_id < len(class_names)) else f"Class {cls_id}"
                 
                 # Цвет зависит от статуса (True - зеленый, False - красный)
@@ -67,19 +71,19 @@ class DetectionDrawer:
             frame = self.draw_missing_siz(frame, missing_areas)
             
         # Рисуем ключевые точки, если включено
-        if self.show_landmarks and pose_results is not None:
-            frame = self.draw_landmarks(frame, pose_results)
+        if self.show_landmarks and detections.people:
+            frame = self.draw_landmarks(frame, detections)
 
         return frame
 
-    def draw_landmarks(self, frame, pose_results):
+    def draw_landmarks(self, frame, detections):
         try:
-            if pose_results is None or not hasattr(pose_results, 'keypoints'):
+            if detections is None or not detections.people:
                 return frame
                 
             # Создаем копию кадра для рисования
             image_to_draw = frame.copy()
-            image_with_landmarks = draw_landmarks(image_to_draw, pose_results)
+            image_with_landmarks = draw_landmarks(image_to_draw, detections.keypoints)
             
             # Наложение обратно на исходный кадр
             cv2.addWeighted(image_with_landmarks, 0.7, frame, 0.3, 0, frame)
@@ -63,6 +63,8 @@ class ControlPanel:
         
         self.landmarks_check = QCheckBox("Показывать ключевые точки")
         self.landmarks_check.setChecked(False)
+        self.overlay_check = QCheckBox("Показывать FPS и задержки")
+        self.overlay_check.setChecked(False)
         spacer = QSpacerItem(20, 20, 
                             QSizePolicy.Policy.Expanding, 
                             QSizePolicy.Policy.Minimum)
@@ -74,6 +76,7 @@ class ControlPanel:
         self.start_btn.setEnabled(False)
         
         bottom_layout.addWidget(self.landmarks_check)
+        bottom_layout.addWidget(self.overlay_check)
         bottom_layout.addItem(spacer)
         bottom_layout.addWidget(self.manage_models_btn)  # Добавлено перед кнопкой запуска
         bottom_layout.addWidget(self.start_btn)
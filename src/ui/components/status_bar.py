@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import QStatusBar, QPushButton, QSizePolicy
+from PyQt6.QtWidgets import QStatusBar, QPushButton, QSizePolicy, QProgressBar, QLabel
 
 class StatusBar:
     def __init__(self, main_window):
@@ -11,6 +11,18 @@ class StatusBar:
             QSizePolicy.Policy.Expanding, 
             QSizePolicy.Policy.Fixed
         )
+
+        self.stats_label = QLabel()
+        self.stats_label.setObjectName("statsLabel")
+        self.bar.addPermanentWidget(self.stats_label)
+
+        self.progress = QProgressBar()
+        self.progress.setObjectName("startupProgress")
+        self.progress.setRange(0, 100)
+        self.progress.setFixedWidth(160)
+        self.progress.setTextVisible(False)
+        self.progress.hide()
+        self.bar.addPermanentWidget(self.progress)
         
         self.theme_btn = QPushButton("🌙")
         self.theme_btn.setObjectName("themeButton")
@@ -18,4 +30,17 @@ class StatusBar:
         self.bar.addPermanentWidget(self.theme_btn)
     
     def show_message(self, message, timeout=0):
-        self.bar.showMessage(message, timeout)
\ No newline at end of file
+        self.bar.showMessage(message, timeout)
+
+    def set_stats(self, text):
+        """Статистика конвейера (FPS, задержка) справа в строке состояния"""
+        self.stats_label.setText(text)
+
+    def show_progress(self, value, message=""):
+        self.progress.setValue(value)
+        self.progress.show()
+        if message:
+            self.bar.showMessage(message)
+
+    def hide_progress(self):
+        self.progress.hide()
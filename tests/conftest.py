@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Код импортирует модули и как `core...` (из src), и как `src.ui...` (из корня)
+for path in (ROOT, os.path.join(ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# AppLogger создает logs/ в текущей папке — журналы тестов уходят во временную
+os.chdir(tempfile.mkdtemp(prefix='ppe_tests_'))
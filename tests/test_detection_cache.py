@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+import pytest
+
+from core.detection.detection_frame import DetectionFrame, KEYPOINTS
+from core.detection.inference_profile import DEFAULT_PROFILE, InferenceProfile
+from core.storage.detection_cache import DetectionCache, DetectionRecord
+
+FPS = 10.0
+MODEL_INFO = {'content_hash': 'a' * 64}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DetectionCache({'enabled': True, 'output_dir': str(tmp_path / 'cache'), 'max_gap_seconds': 0.5})
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(b'not really a video')
+    return str(path)
+
+
+def open_session(cache, source, profile=DEFAULT_PROFILE):
+    return cache.open(source, 'siz', MODEL_INFO, profile, FPS)
+
+
+def make_record(shift, statuses=(True, None), missing=(((1, 2, 3, 4), 'helmet'),)):
+    xyxy = np.array([[10, 10, 20, 20], [30, 30, 40, 40]], np.float32) + shift
+    keypoints = np.full((1, KEYPOINTS, 2), 5 + shift, np.float32)
+    detections = DetectionFrame(xyxy, np.array([0.9, 0.5], np.float32), np.array([0, 1], np.int32), keypoints)
+    status = (list(statuses), 1, {'helmet': 1})
+    return DetectionRecord.from_results(detections, list(statuses), list(missing), status)
+
+
+def test_empty_session_misses(cache, source):
+    session = open_session(cache, source)
+    assert session.cached_frames == 0
+    assert session.lookup(0) is None
+    assert session.misses == 1
+
+
+def test_store_close_lookup_round_trip(cache, source):
+    session = open_session(cache, source)
+    session.store(0, make_record(0))
+    session.store(10, make_record(100, statuses=(False, False), missing=()))
+    session.close()
+
+    session = open_session(cache, source)
+    assert session.cached_frames == 2
+    record = session.lookup(0)
+    assert record.boxes.tolist() == [[10, 10, 20, 20], [30, 30, 40, 40]]
+    assert record.box_cls.tolist() == [0, 1]
+    assert record.status == ([True, None], 1, {'helmet': 1})
+    assert record.missing_areas == [((1, 2, 3, 4), 'helmet')]
+    assert record.keypoints.shape == (1, KEYPOINTS, 2)
+
+    record = session.lookup(10)
+    assert record.boxes[0].tolist() == [110, 110, 120, 120]
+    assert record.status[0] == [False, False]
+    assert record.missing_areas == []
+
+
+def test_lookup_respects_max_gap(cache, source):
+    session = open_session(cache, source)
+    session.store(0, make_record(0))
+    session.store(10, make_record(100))
+    session.close()
+
+    session = open_session(cache, source)
+    assert session.max_gap == 5  # max_gap_seconds * FPS
+    assert session.lookup(5).boxes[0, 0] == 10   # Ближайший предыдущий кадр в пределах max_gap
+    assert session.lookup(6) is None             # Дальше max_gap — нужен анализ
+    assert session.lookup(12).boxes[0, 0] == 110
+    assert session.lookup(16) is None
+    assert (session.hits, session.misses) == (2, 2)
+
+
+def test_max_gap_covers_profile_stride(cache, source):
+    session = open_session(cache, source, InferenceProfile(stride=8))
+    assert session.max_gap == 8
+
+
+def test_close_merges_new_results_with_stored(cache, source):
+    session = open_session(cache, source)
+    session.store(0, make_record(0))
+    session.store(10, make_record(100))
+    session.close()
+
+    session = open_session(cache, source)
+    session.store(10, make_record(200))  # Новый результат заменяет сохраненный
+    session.store(20, make_record(300))
+    session.close()
+
+    session = open_session(cache, source)
+    assert session.cached_frames == 3
+    assert [session.lookup(frame).boxes[0, 0] for frame in (0, 10, 20)] == [10, 210, 310]
+
+
+def test_other_profile_does_not_share_entry(cache, source):
+    session = open_session(cache, source)
+    session.store(0, make_record(0))
+    session.close()
+
+    assert open_session(cache, source, InferenceProfile(imgsz=320)).cached_frames == 0
+
+
+def test_cache_requires_model_hash(cache, source):
+    assert cache.open(source, 'siz', {'content_hash': None}, DEFAULT_PROFILE, FPS) is None
+
+
+def test_interrupted_rewrite_invalidates_entry(cache, source, monkeypatch):
+    session = open_session(cache, source)
+    session.store(0, make_record(0))
+    session.close()
+
+    session = open_session(cache, source)
+    session.store(10, make_record(100))
+    replace = os.replace
+    calls = []
+
+    def crash_after_first_column(src, dst):
+        calls.append(dst)
+        if len(calls) > 1:
+            raise OSError("сбой записи")
+        replace(src, dst)
+
+    monkeypatch.setattr(os, 'replace', crash_after_first_column)
+    session.close()  # Ошибка записи журналируется
+    monkeypatch.setattr(os, 'replace', replace)
+
+    # Часть столбцов уже новая, часть старая: запись не должна читаться
+    assert open_session(cache, source).cached_frames == 0
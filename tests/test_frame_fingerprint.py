@@ -0,0 +1,45 @@
+import numpy as np
+
+from core.processing.frame_fingerprint import FrameFingerprint
+
+
+def scene(seed=0):
+    return np.random.default_rng(seed).integers(0, 200, (480, 640, 3), np.uint8)
+
+
+def test_repeated_frame_is_exact_duplicate():
+    fingerprint = FrameFingerprint()
+    frame = scene()
+    fingerprint.update(frame, now=0.0)
+    assert fingerprint.duplicate is False
+    fingerprint.update(frame.copy(), now=0.1)
+    assert fingerprint.duplicate == 'exact'
+
+
+def test_small_patch_is_not_exact_duplicate():
+    fingerprint = FrameFingerprint()
+    frame = scene()
+    fingerprint.update(frame, now=0.0)
+    changed = frame.copy()
+    changed[100:102, 100:102] += 40  # Незаметно в миниатюре 32×32
+    fingerprint.update(changed, now=0.1)
+    assert fingerprint.duplicate == 'near'
+
+
+def test_live_scene_with_small_motion_never_freezes():
+    fingerprint = FrameFingerprint({'freeze_seconds': 30.0})
+    frame = scene()
+    changed = frame.copy()
+    changed[100:108, 100:108] += 40
+    events = [fingerprint.update(changed if second % 2 else frame, now=float(second)) for second in range(60)]
+    assert 'frozen' not in events
+    assert not fingerprint.frozen
+
+
+def test_frozen_and_resumed_events():
+    fingerprint = FrameFingerprint({'freeze_seconds': 30.0})
+    frame = scene()
+    events = [fingerprint.update(frame, now=float(second)) for second in range(31)]
+    assert events[-1] == 'frozen' and events.count('frozen') == 1
+    assert fingerprint.update(scene(1), now=31.0) == 'resumed'
+    assert not fingerprint.frozen
@@ -0,0 +1,127 @@
+import numpy as np
+
+from core.detection.detection_frame import DetectionFrame, KEYPOINTS
+from core.detection.person_cascade import PersonCascade, nms
+
+SIZ_TYPES = ('helmet', 'vest')
+
+
+def boxes(*rows):
+    return np.array(rows, np.float32).reshape(-1, 4)
+
+
+class FakeYOLO:
+    """detect_batch как у YOLODetector: боксы в координатах каждой вырезки"""
+
+    def __init__(self, outputs):
+        self.outputs = outputs  # Вырезка i -> (xyxy, conf, cls) в координатах вырезки
+        self.crops = []
+        self.kwargs = None
+
+    def detect_batch(self, images, model_type, profile=None, imgsz=None, batch_size=16):
+        self.crops = list(images)
+        self.kwargs = {'model_type': model_type, 'imgsz': imgsz, 'batch_size': batch_size}
+        return [self.outputs[i] for i in range(len(images))]
+
+
+def people(*person_boxes):
+    """DetectionFrame с рамками людей; точки — углы рамки, чтобы люди были видимы"""
+    persons = boxes(*person_boxes)
+    keypoints = np.zeros((len(persons), KEYPOINTS, 2), np.float32)
+    keypoints[:, :, 0] = persons[:, [0]]
+    keypoints[:, :, 1] = persons[:, [1]]
+    keypoints[:, 1::2, 0] = persons[:, [2]]
+    keypoints[:, 1::2, 1] = persons[:, [3]]
+    return DetectionFrame(keypoints=keypoints, shape=(480, 640), persons=persons)
+
+
+def in_crop(frame_boxes, region):
+    x1, y1 = region[:2]
+    return boxes(*frame_boxes) - np.array((x1, y1, x1, y1), np.float32)
+
+
+def test_nms_empty():
+    assert nms(boxes(), np.empty(0, np.float32), np.empty(0, np.int32), 0.5).tolist() == []
+
+
+def test_nms_keeps_most_confident_of_overlapping_same_class():
+    keep = nms(boxes((0, 0, 10, 10), (1, 1, 11, 11), (50, 50, 60, 60)),
+               np.array([0.6, 0.9, 0.3], np.float32), np.zeros(3, np.int32), 0.5)
+    assert keep.tolist() == [1, 2]
+
+
+def test_nms_keeps_overlapping_boxes_of_different_classes():
+    keep = nms(boxes((0, 0, 10, 10), (0, 0, 10, 10)), np.array([0.9, 0.8], np.float32),
+               np.array([0, 1], np.int32), 0.5)
+    assert sorted(keep.tolist()) == [0, 1]
+
+
+def test_nms_keeps_boxes_below_iou_threshold():
+    # IoU = 25 / 175 ≈ 0.14: ниже порога оба бокса остаются
+    keep = nms(boxes((0, 0, 10, 10), (5, 5, 15, 15)), np.array([0.9, 0.8], np.float32),
+               np.zeros(2, np.int32), 0.5)
+    assert sorted(keep.tolist()) == [0, 1]
+
+
+def test_regions_pad_person_box_and_clip_to_frame():
+    cascade = PersonCascade({'padding': 0.15, 'min_crop': 64, 'max_people': 0})
+    indices, regions = cascade.regions(people((100, 100, 200, 300), (600, 400, 640, 480)), (480, 640))
+    assert indices.tolist() == [0, 1]
+    assert regions[0].tolist() == [85, 70, 215, 330]
+    # Маленький человек у края: вырезка не меньше min_crop и обрезана по кадру
+    assert regions[1].tolist() == [588, 388, 640, 480]
+
+
+def test_detect_maps_crop_boxes_to_frame_and_drops_foreign_centers():
+    cascade = PersonCascade({'padding': 0.15, 'min_crop': 64, 'max_people': 0, 'crop_size': 160, 'batch_size': 4})
+    detections = people((100, 100, 200, 300))
+    frame = np.zeros((480, 640, 3), np.uint8)
+    _, regions = cascade.regions(detections, frame.shape)
+    yolo = FakeYOLO({0: (in_crop([(110, 110, 150, 150), (86, 71, 96, 81)], regions[0]),
+                         np.array([0.9, 0.8], np.float32), np.array([0, 1], np.int32))})
+
+    assert cascade.detect(yolo, frame, 'siz', detections) == 1
+    assert yolo.crops[0].shape == (260, 130, 3)
+    assert yolo.kwargs == {'model_type': 'siz', 'imgsz': 160, 'batch_size': 4}
+    # Второй бокс попал в отступ вырезки, его центр вне рамки человека
+    assert detections.xyxy.tolist() == [[110, 110, 150, 150]]
+    assert detections.conf.tolist() == [np.float32(0.9)]
+    assert detections.cls.tolist() == [0]
+
+
+def test_detect_suppresses_duplicates_from_overlapping_crops():
+    cascade = PersonCascade({'padding': 0.15, 'min_crop': 64, 'max_people': 0})
+    detections = people((100, 100, 200, 300), (180, 100, 280, 300))
+    frame = np.zeros((480, 640, 3), np.uint8)
+    _, regions = cascade.regions(detections, frame.shape)
+    shared = (185, 150, 195, 160)  # Центр внутри рамок обоих людей
+    yolo = FakeYOLO({
+        0: (in_crop([shared], regions[0]), np.array([0.7], np.float32), np.array([0], np.int32)),
+        1: (in_crop([shared, (240, 120, 260, 140)], regions[1]), np.array([0.9, 0.6], np.float32),
+            np.array([0, 1], np.int32)),
+    })
+
+    assert cascade.detect(yolo, frame, 'siz', detections) == 2
+    kept = sorted(zip(detections.xyxy.tolist(), detections.conf.tolist()))
+    assert kept == [([185, 150, 195, 160], np.float32(0.9)), ([240, 120, 260, 140], np.float32(0.6))]
+
+
+def test_people_outside_work_zones_are_not_cropped():
+    cascade = PersonCascade({'max_people': 0})
+    detections = people((100, 100, 200, 300), (300, 100, 400, 300))
+    required = np.zeros((2, len(SIZ_TYPES)), bool)
+    required[1] = True
+    detections.set_required(required, SIZ_TYPES)
+    frame = np.zeros((480, 640, 3), np.uint8)
+    yolo = FakeYOLO({0: (boxes(), np.empty(0, np.float32), np.empty(0, np.int32))})
+
+    assert cascade.detect(yolo, frame, 'siz', detections) == 1
+    indices, _ = cascade.regions(detections, frame.shape)
+    assert indices.tolist() == [1]
+    assert len(detections) == 0
+
+
+def test_max_people_keeps_largest():
+    cascade = PersonCascade({'max_people': 1})
+    indices, _ = cascade.regions(people((0, 0, 10, 10), (100, 100, 200, 300)), (480, 640))
+    assert indices.tolist() == [1]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from core.processing.shared_frame_ring import SharedFrameRing
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing.create(3, (8, 10, 3))
+    yield ring
+    ring.close()
+
+
+def frame(value, shape=(8, 10, 3)):
+    return np.full(shape, value, np.uint8)
+
+
+def test_write_read_round_trip(ring):
+    seq = ring.write(frame(7), 12.5)
+    result = ring.read(seq)
+    assert seq == 1
+    assert result.shape == (8, 10, 3)
+    assert (result == 7).all()
+
+
+def test_smaller_frame_keeps_its_shape(ring):
+    seq = ring.write(frame(3, (4, 5, 3)), 0.0)
+    assert ring.read(seq).shape == (4, 5, 3)
+
+
+def test_read_returns_copy(ring):
+    seq = ring.write(frame(1), 0.0)
+    result = ring.read(seq)
+    ring.write(frame(2), 0.0)
+    assert (result == 1).all()
+
+
+def test_overwritten_slot_reads_as_none(ring):
+    first = ring.write(frame(1), 0.0)
+    for value in range(2, 2 + ring.slots):
+        last = ring.write(frame(value), 0.0)
+    assert ring.read(first) is None
+    assert (ring.read(last) == last).all()
+
+
+def test_frame_larger_than_slot_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.write(frame(0, (9, 10, 3)), 0.0)
+
+
+def test_attach_reads_and_continues_numbering(ring):
+    seq = ring.write(frame(5), 0.0)
+    reader = SharedFrameRing.attach(*ring.spec())
+    try:
+        assert (reader.read(seq) == 5).all()
+        # Перезапущенный писатель не повторяет номера уже опубликованных кадров
+        assert reader.write(frame(6), 0.0) == seq + 1
+        assert (ring.read(seq + 1) == 6).all()
+    finally:
+        reader.close()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from core.storage.snapshot_store import SnapshotStore, box_iou
+
+LEFT = (10, 10, 60, 110)
+RIGHT = (200, 10, 250, 110)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'ppe.db'), {'output_dir': str(tmp_path / 'snapshots')})
+    yield store
+    store.close()
+
+
+def worker_frame():
+    """Два одинаковых работника без каски: слева и справа"""
+    frame = np.zeros((120, 260, 3), np.uint8)
+    figure = np.random.default_rng(0).integers(0, 255, (100, 50, 3), np.uint8)
+    frame[10:110, 10:60] = figure
+    frame[10:110, 200:250] = figure
+    return frame
+
+
+def test_box_iou():
+    assert box_iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert box_iou((0, 0, 10, 10), (5, 0, 15, 10)) == pytest.approx(1 / 3)
+    assert box_iou(LEFT, RIGHT) == 0.0
+
+
+def test_reopened_episode_in_same_place_is_duplicate(store):
+    frame = worker_frame()
+    store._save('cam', frame, [('ep1', 1, 'helmet', LEFT)], 0.0, None)
+    store._save('cam', frame, [('ep2', 2, 'helmet', LEFT)], 5.0, None)
+    assert store.duplicates == 1
+
+
+def test_same_track_elsewhere_is_duplicate(store):
+    frame = worker_frame()
+    store._save('cam', frame, [('ep1', 1, 'helmet', LEFT)], 0.0, None)
+    store._save('cam', frame, [('ep2', 1, 'helmet', RIGHT)], 5.0, None)
+    assert store.duplicates == 1
+
+
+def test_similar_worker_elsewhere_keeps_snapshot(store):
+    frame = worker_frame()
+    store._save('cam', frame, [('ep1', 1, 'helmet', LEFT)], 0.0, None)
+    store._save('cam', frame, [('ep2', 2, 'helmet', RIGHT)], 5.0, None)
+    assert store.duplicates == 0
+    assert len(store.get_snapshots(camera='cam')) == 2
+
+
+def test_window_expires(store):
+    frame = worker_frame()
+    store._save('cam', frame, [('ep1', 1, 'helmet', LEFT)], 0.0, None)
+    store._save('cam', frame, [('ep2', 2, 'helmet', LEFT)], 120.0, None)
+    assert store.duplicates == 0
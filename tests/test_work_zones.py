@@ -0,0 +1,141 @@
+import json
+import numpy as np
+import pytest
+
+from core.detection.detection_frame import DetectionFrame, KEYPOINTS
+from core.detection.work_zones import FOOT_POINTS, WorkZones, points_in_polygon
+
+SIZ_TYPES = ('helmet', 'vest', 'glove')
+SQUARE = np.array([(0, 0), (10, 0), (10, 10), (0, 10)], np.float32)
+# Буква П: выемка сверху посередине
+U_SHAPE = np.array([(0, 0), (3, 0), (3, 6), (7, 6), (7, 0), (10, 0), (10, 10), (0, 10)], np.float32)
+
+
+def person(x, y, ankles=True):
+    """Точки человека: плечи над (x, y), лодыжки в (x, y) или невидимы"""
+    keypoints = np.zeros((KEYPOINTS, 2), np.float32)
+    keypoints[5:7] = ((x - 5, y - 40), (x + 5, y - 40))
+    keypoints[11:13] = ((x - 4, y - 20), (x + 4, y - 20))
+    if ankles:
+        keypoints[FOOT_POINTS] = ((x - 2, y), (x + 2, y))
+    else:
+        keypoints[13:15] = ((x - 3, y - 10), (x + 3, y - 10))  # Колени — низ рамки
+    return keypoints
+
+
+def frame_of(*keypoints):
+    return DetectionFrame(keypoints=np.stack(keypoints), shape=(100, 200))
+
+
+def parse(zones):
+    return WorkZones.parse(json.dumps(zones), SIZ_TYPES)
+
+
+def test_points_in_square():
+    points = np.array([(5, 5), (15, 5), (-1, 5), (5, 11), (9.9, 0.1)], np.float32)
+    assert points_in_polygon(points, SQUARE).tolist() == [True, False, False, False, True]
+
+
+def test_points_in_concave_polygon():
+    points = np.array([(5, 3), (5, 8), (1, 3), (8.5, 3)], np.float32)
+    assert points_in_polygon(points, U_SHAPE).tolist() == [False, True, True, True]
+
+
+def test_points_in_polygon_empty():
+    assert points_in_polygon(np.empty((0, 2), np.float32), SQUARE).shape == (0,)
+
+
+def test_parse_empty_is_none():
+    assert WorkZones.parse('', SIZ_TYPES) is None
+    assert WorkZones.parse('[]', SIZ_TYPES) is None
+
+
+@pytest.mark.parametrize('text', [
+    'not json',
+    '{"name": "a"}',
+    '[{"points": [[0, 0], [1, 0]]}]',
+    '[{"points": [[0, 0], [2, 0], [0, 1]]}]',
+    '[{"points": [[0, 0], [1, 0], [0, 1]], "siz": ["boots"]}]',
+])
+def test_parse_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        WorkZones.parse(text, SIZ_TYPES)
+
+
+def test_parse_round_trip_orders_types_like_camera():
+    zones = parse([{'name': 'цех', 'points': [[0, 0], [1, 0], [1, 1]], 'siz': 'vest, helmet'}])
+    assert zones.zones[0].siz_types == ('helmet', 'vest')
+    assert WorkZones.parse(zones.to_text(), SIZ_TYPES).zones[0].siz_types == ('helmet', 'vest')
+
+
+def test_anchor_is_ankles_or_bottom_of_box():
+    anchors = WorkZones.anchors(frame_of(person(50, 80), person(150, 80, ankles=False)))
+    assert anchors.tolist() == [[50, 80], [150, 70]]
+
+
+def test_required_by_zone():
+    # Левая половина кадра — цех (все СИЗ), правая — без зон
+    zones = parse([{'name': 'цех', 'points': [[0, 0], [0.5, 0], [0.5, 1], [0, 1]]}])
+    detections = frame_of(person(50, 80), person(150, 80))
+    required = zones.required(detections, (100, 200), SIZ_TYPES)
+    assert required.tolist() == [[True, True, True], [False, False, False]]
+
+
+def test_required_union_of_overlapping_zones():
+    zones = parse([
+        {'name': 'a', 'points': [[0, 0], [1, 0], [1, 1], [0, 1]], 'siz': ['helmet']},
+        {'name': 'b', 'points': [[0, 0.5], [1, 0.5], [1, 1], [0, 1]], 'siz': ['glove']},
+    ])
+    detections = frame_of(person(50, 80), person(50, 30))
+    required = zones.required(detections, (100, 200), SIZ_TYPES)
+    assert required.tolist() == [[True, False, True], [True, False, False]]
+
+
+def test_required_with_roi_offset():
+    # Детекции в координатах ROI, начинающейся с x=100: человек стоит в правой половине кадра
+    zones = parse([{'name': 'право', 'points': [[0.5, 0], [1, 0], [1, 1], [0.5, 1]]}])
+    detections = frame_of(person(50, 80))
+    assert zones.required(detections, (100, 200), SIZ_TYPES).tolist() == [[False, False, False]]
+    assert zones.required(detections, (100, 200), SIZ_TYPES, offset=(100, 0)).tolist() == [[True, True, True]]
+
+
+def test_required_without_people():
+    zones = parse([{'name': 'a', 'points': [[0, 0], [1, 0], [1, 1]]}])
+    assert zones.required(DetectionFrame(shape=(100, 200)), (100, 200), SIZ_TYPES).shape == (0, 3)
+
+
+def test_active_and_best_person_follow_zones():
+    zones = parse([{'name': 'цех', 'points': [[0, 0], [0.5, 0], [0.5, 1], [0, 1]], 'siz': ['helmet']}])
+    detections = frame_of(person(50, 80), person(150, 80))
+    detections.set_required(zones.required(detections, (100, 200), SIZ_TYPES), SIZ_TYPES)
+    assert detections.active.tolist() == [True, False]
+    assert detections.people_requiring('helmet').tolist() == [0]
+    assert detections.people_requiring('vest').tolist() == []
+
+    box = np.array((145, 35, 155, 45), np.float32)  # Каска у человека вне зоны
+    assert detections.best_person(box) == 0
+    assert detections.best_person(box, active_only=False) == 1
+
+
+def test_check_items_skips_boxes_of_people_outside_zones():
+    from core.detection.siz_detection import SIZDetector
+    from core.utils.metrics_registry import SIZ_CHECKS
+
+    zones = parse([{'name': 'цех', 'points': [[0, 0], [0.5, 0], [0.5, 1], [0, 1]], 'siz': ['helmet']}])
+    detections = frame_of(person(50, 80), person(150, 80))
+    detections.set_required(zones.required(detections, (100, 200), SIZ_TYPES), SIZ_TYPES)
+    detections.xyxy = np.array([(45, 30, 55, 40), (145, 30, 155, 40), (40, 40, 60, 60)], np.float32)
+    detections.conf = np.ones(3, np.float32)
+    detections.cls = np.array([0, 0, 1], np.int32)
+    checks = SIZ_CHECKS.labels('helmet', 'fail').value + SIZ_CHECKS.labels('helmet', 'ok').value
+
+    statuses, people_count, detected = SIZDetector().check_items(detections, (100, 200), ['helmet', 'vest'],
+                                                                 SIZ_TYPES)
+
+    assert people_count == 2
+    assert statuses[0] is not None
+    assert statuses[1] is None   # Человек вне зоны
+    assert statuses[2] is None   # Жилет не обязателен в зоне
+    assert detected == {'helmet': 1, 'vest': 0}
+    # Проверен и учтен в метриках только бокс человека в зоне
+    assert SIZ_CHECKS.labels('helmet', 'fail').value + SIZ_CHECKS.labels('helmet', 'ok').value == checks + 1
@@ -0,0 +1,76 @@
+import gc
+import sys
+import types
+import weakref
+
+import numpy as np
+import pytest
+
+from core.detection.yolo_detector import YOLODetector
+from core.models.model_cache import ModelCache
+
+WEIGHTS_SIZE = 1024
+
+
+class FakeYOLO:
+    """Модель ultralytics: размер в кэше — по файлу весов, у результата один бокс"""
+
+    loads = []
+
+    def __init__(self, path):
+        self.path = path
+        FakeYOLO.loads.append(path)
+
+    def __call__(self, frame, verbose=False, **kwargs):
+        return [types.SimpleNamespace(boxes=[object()])]
+
+
+@pytest.fixture
+def models(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'ultralytics', types.SimpleNamespace(YOLO=FakeYOLO))
+    FakeYOLO.loads = []
+    infos = {}
+    for name in 'ABC':
+        pt_file = tmp_path / f'{name}.pt'
+        pt_file.write_bytes(b'\0' * WEIGHTS_SIZE)
+        infos[name] = {'pt_file': str(pt_file), 'yaml_file': str(pt_file), 'classes': ['helmet'],
+                       'content_hash': name * 64}
+    return infos
+
+
+def detector(budget_models):
+    yolo = YOLODetector()
+    yolo.cache = ModelCache(memory_budget_mb=(budget_models + 0.5) * WEIGHTS_SIZE / (1024 * 1024))
+    return yolo
+
+
+def test_evicted_models_are_released(models):
+    yolo = detector(1)
+    refs = []
+    for name in 'ABC':
+        assert yolo.load_model(name, models[name], warmup=False)
+        refs.append(weakref.ref(yolo.model(name)))
+    gc.collect()
+
+    assert yolo.cache.names() == ['C']
+    assert [ref() is None for ref in refs] == [True, True, False]
+
+
+def test_detect_reloads_evicted_model(models):
+    yolo = detector(2)
+    for name in 'ABC':
+        assert yolo.load_model(name, models[name], warmup=False)
+    assert yolo.cache.names() == ['B', 'C']
+
+    frame = np.zeros((4, 4, 3), np.uint8)
+    _, boxes = yolo.detect(frame, 'A', plot=False)
+
+    assert boxes is not None
+    assert FakeYOLO.loads.count(models['A']['pt_file']) == 2
+    assert yolo.cache.names() == ['C', 'A']
+    assert yolo.class_names['A'] == ['helmet']
+
+
+def test_unknown_model_is_not_detected(models):
+    frame = np.zeros((4, 4, 3), np.uint8)
+    assert detector(1).detect(frame, 'A') == (frame, None)